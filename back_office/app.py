@@ -1,4 +1,4 @@
-from typing import Any, Dict, Mapping, Tuple
+from typing import Any, Dict, List, Mapping, Tuple
 
 from dash import Input, Output, dcc, html
 from dash.development.base_component import Component
@@ -11,11 +11,15 @@ from back_office.components import login_redirect
 from back_office.components.header import header
 from back_office.config import LOGIN_SECRET_KEY
 from back_office.helpers.login import UNIQUE_USER, get_current_user
+from back_office.helpers.request_cache import log_saved_round_trips
+from back_office.helpers.slack import start_slack_sender
+from back_office.helpers.warm_up import schedule_nightly_warm_up
 from back_office.pages.am_apercu import PAGE as am_apercu_page
 from back_office.pages.am_applicability import PAGE as am_applicability_page
 from back_office.pages.am_metadata import PAGE as am_metadata_page
 from back_office.pages.content import PAGE as am_content_page
 from back_office.pages.delete_am import PAGE as delete_am_page
+from back_office.pages.drift_report import PAGE as drift_report_page
 from back_office.pages.edit_am import PAGE as edit_am_page
 from back_office.pages.edit_parameter_element import PAGE_ALTERNATIVE_SECTION as alternative_section_page
 from back_office.pages.edit_parameter_element import PAGE_CONDITION as condition_page
@@ -31,7 +35,7 @@ from back_office.pages.parametrization import PAGE as am_parametrization_page
 from back_office.pages.regulation_engine import PAGE as regulation_engine_page
 from back_office.pages.topics import PAGE as am_topics_page
 from back_office.routing import ROUTER, Endpoint, Page
-from back_office.utils import ensure_not_none
+from back_office.utils import DATA_FETCHER, ensure_not_none
 
 _ENDPOINT_TO_PAGE: Dict[Endpoint, Page] = {
     Endpoint.LEGIFRANCE_COMPARE: legifrance_compare_page,
@@ -53,23 +57,43 @@ _ENDPOINT_TO_PAGE: Dict[Endpoint, Page] = {
     Endpoint.ADD_INAPPLICABILITY: condition_page,
     Endpoint.ADD_WARNING: warning_page,
     Endpoint.AM_APPLICABILITY: am_applicability_page,
+    Endpoint.DRIFT_REPORT: drift_report_page,
+}
+
+_ENDPOINT_TO_PREFETCHED_ENTITIES: Dict[Endpoint, List[str]] = {
+    Endpoint.AM_APERCU: ['metadata', 'am', 'parametrization'],
+    Endpoint.AM_CONTENT: ['metadata', 'am'],
+    Endpoint.EDIT_AM: ['metadata', 'am'],
+    Endpoint.PARAMETRIZATION: ['metadata', 'am', 'parametrization'],
+    Endpoint.TOPICS: ['metadata', 'outline'],
+    Endpoint.ADD_WARNING: ['metadata', 'am', 'parametrization'],
+    Endpoint.ADD_INAPPLICABILITY: ['metadata', 'am', 'parametrization'],
+    Endpoint.ADD_ALTERNATIVE_SECTION: ['metadata', 'am', 'parametrization'],
 }
 
 
-def _route(pathname: str) -> Tuple[Page, Mapping[str, Any]]:
+def _route(pathname: str) -> Tuple[Endpoint, Mapping[str, Any]]:
     endpoint, kwargs = ROUTER.match(pathname)
-    return (_ENDPOINT_TO_PAGE[Endpoint(endpoint)], kwargs)
+    return Endpoint(endpoint), kwargs
+
+
+def _prefetch(endpoint: Endpoint, kwargs: Mapping[str, Any]) -> None:
+    entities = _ENDPOINT_TO_PREFETCHED_ENTITIES.get(endpoint, [])
+    if entities and 'am_id' in kwargs:
+        DATA_FETCHER.prefetch([(entity, kwargs['am_id']) for entity in entities])
 
 
 def router(pathname: str) -> Component:
     if not pathname.startswith('/'):
         raise ValueError(f'Expecting pathname to start with /, received {pathname}')
     try:
-        page, kwargs = _route(pathname)
+        endpoint, kwargs = _route(pathname)
     except NotFound:
         return html.H3('404 error: Unknown path {}'.format(pathname))
+    page = _ENDPOINT_TO_PAGE[endpoint]
     if page.login_required and not get_current_user().is_authenticated:
         return login_redirect(pathname)
+    _prefetch(endpoint, kwargs)
     return page.layout(**kwargs)
 
 
@@ -90,6 +114,10 @@ APP: Flask = ensure_not_none(app.server)  # for gunicorn deployment
 
 APP.secret_key = LOGIN_SECRET_KEY
 
+log_saved_round_trips(APP)
+schedule_nightly_warm_up(APP)
+start_slack_sender(APP)
+
 
 @login_manager.user_loader
 def load_user(_):
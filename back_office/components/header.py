@@ -17,6 +17,7 @@ def _nav() -> Component:
     nav = html.Span(
         [
             _header_link('Liste des arrêtés', href='/'),
+            _header_link('Écarts avec Légifrance', href=f'/{Endpoint.DRIFT_REPORT}', hidden=user_not_auth),
             _header_link("S'identifier", href=f'/{Endpoint.LOGIN}', hidden=not user_not_auth, left=True),
             _header_link('Se déconnecter', href=f'/{Endpoint.LOGOUT}', hidden=user_not_auth, left=True),
             _header_link("Aide", href='https://envinorma.github.io/back_office', left=True),
@@ -6,7 +6,7 @@ from dash import Dash, Input, Output, html
 from dash.development.base_component import Component
 
 from back_office.components import error_component
-from back_office.helpers.upload_ams import upload_ams
+from back_office.helpers.upload_ams import AMExportError, upload_ams
 from back_office.utils import generate_id
 
 _BUTTON = generate_id('upload-ams', 'trigger-upload')
@@ -57,12 +57,18 @@ def upload_ams_callbacks(app: Dash) -> None:
     def _callback(set_progress: Callable[[Tuple[int]], None], _):
         set_progress((5,))
         try:
-            filename = upload_ams(set_progress)
+            export = upload_ams(set_progress)
             bucket = 'https://storage.sbg.cloud.ovh.net/v1/AUTH_3287ea227a904f04ad4e8bceb0776108/am/'
             return html.Div(
-                f'AMs exportés avec succès. Nom du fichier créé dans le bucket {bucket} : {filename} ',
+                [
+                    f'AMs exportés avec succès. Nom du fichier créé dans le bucket {bucket} : {export.filename}. ',
+                    f'Différentiel ({export.nb_changed_ams} AM modifié(s), {export.nb_removed_ams} supprimé(s)) : ',
+                    export.delta_filename,
+                ],
                 className='alert alert-success',
             )
+        except AMExportError as exc:
+            return error_component(str(exc))
         except Exception:
             return [
                 error_component('Une erreur est survenue pendant l\'exportation :'),
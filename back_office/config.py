@@ -42,14 +42,23 @@ def _load_from_file_or_env(key: str) -> str:
     return candidate
 
 
+def _load_optional_from_file_or_env(key: str, default: str) -> str:
+    return _load_from_file(key) or _load_from_env(key) or default
+
+
 LEGIFRANCE_CLIENT_ID = _load_from_file_or_env('legifrance.client_id')
 LEGIFRANCE_CLIENT_SECRET = _load_from_file_or_env('legifrance.client_secret')
 LOGIN_USERNAME = _load_from_file_or_env('login.username')
 LOGIN_PASSWORD = _load_from_file_or_env('login.password')
 LOGIN_SECRET_KEY = _load_from_file_or_env('login.secret_key')
 SLACK_ENRICHMENT_NOTIFICATION_URL = _load_from_file_or_env('slack.enrichment_notification_url')
+SLACK_OUTBOX_DIRECTORY = _load_optional_from_file_or_env('slack.outbox_directory', '/tmp/slack-outbox')
 AIDA_URL = 'https://aida.ineris.fr/consultation_document/'
 PSQL_DSN = _load_from_file_or_env('storage.psql_dsn')
+PSQL_POOL_SIZE = int(_load_optional_from_file_or_env('storage.psql_pool_size', '4'))
+_MAX_EXPORT_NB_WORKERS = 4
+# os.cpu_count() reports the CPUs of the host, not of the dyno: the pool size is configured and capped.
+EXPORT_NB_WORKERS = max(1, min(int(_load_optional_from_file_or_env('export.nb_workers', '2')), _MAX_EXPORT_NB_WORKERS))
 
 
 class EnvironmentType(Enum):
@@ -62,3 +71,11 @@ def _load_environment_type() -> EnvironmentType:
 
 
 ENVIRONMENT_TYPE = _load_environment_type()
+
+
+class AMStorageFormat(Enum):
+    JSON = 'json'
+    COMPACT = 'compact'
+
+
+AM_STORAGE_FORMAT = AMStorageFormat(_load_optional_from_file_or_env('storage.am_format', 'json'))
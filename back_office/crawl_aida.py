@@ -0,0 +1,141 @@
+"""Compares the AIDA version of every AM with the Envinorma version.
+
+    python -m back_office.crawl_aida aida_report.csv [--nb-workers 2] [--delay 1] [--restart]
+
+An interrupted crawl resumes where it stopped, failed AMs being crawled again.
+"""
+import argparse
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from envinorma.models import AMMetadata, ArreteMinisteriel, StructuredText
+from tqdm import tqdm
+
+from back_office.helpers.aida import extract_aida_am
+from back_office.helpers.diff import compute_am_diff
+from back_office.helpers.drift import drift_from_diff
+from back_office.utils import DATA_FETCHER
+
+
+@dataclass
+class AIDACrawlRow:
+    am_id: str
+    aida_page: str
+    success: bool
+    nb_sections: int = 0
+    nb_changed_lines: Optional[int] = None
+    similarity: Optional[float] = None
+    error: str = ''
+
+
+class _Politeness:
+    """Ensures at least delay seconds between two requests, whatever the number of threads."""
+
+    def __init__(self, delay_seconds: float):
+        self.delay_seconds = delay_seconds
+        self._next_request = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait_seconds = max(self._next_request - now, 0.0)
+            self._next_request = now + wait_seconds + self.delay_seconds
+        time.sleep(wait_seconds)
+
+
+def count_sections(sections: List[StructuredText]) -> int:
+    return sum(1 + count_sections(section.sections) for section in sections)
+
+
+def _compare(row: AIDACrawlRow, aida_version: ArreteMinisteriel) -> None:
+    envinorma_version = DATA_FETCHER.load_am(row.am_id)
+    if not envinorma_version:
+        row.error = 'AM introuvable dans la base.'
+        return
+    diff = compute_am_diff(aida_version, envinorma_version, normalize_text=True)
+    drift = drift_from_diff(row.am_id, diff, datetime.now())
+    row.nb_changed_lines, row.similarity = drift.nb_changed_lines, drift.similarity
+
+
+def _crawl_am(metadata: AMMetadata, politeness: _Politeness) -> AIDACrawlRow:
+    row = AIDACrawlRow(metadata.cid, metadata.aida_page, success=False)
+    politeness.wait()
+    try:
+        aida_version = extract_aida_am(metadata.aida_page, am_id=metadata.cid)
+    except Exception as exc:
+        row.error = f'{type(exc).__name__}: {exc}'
+        return row
+    if not aida_version:
+        row.error = 'Contenu introuvable dans la page AIDA.'
+        return row
+    row.success = True
+    row.nb_sections = count_sections(aida_version.sections)
+    try:
+        _compare(row, aida_version)
+    except Exception as exc:
+        row.error = f'{type(exc).__name__}: {exc}'
+    return row
+
+
+def _successful_rows(filename: str) -> List[Dict[str, str]]:
+    if not os.path.exists(filename):
+        return []
+    with open(filename, newline='') as file_:
+        return [row for row in csv.DictReader(file_) if row['success'] == 'True']
+
+
+def _keep_successful_rows(filename: str, field_names: List[str]) -> Set[str]:
+    """Rewrites the report without its failed rows, so that these AMs are crawled again."""
+    rows = _successful_rows(filename)
+    with open(filename + '.tmp', 'w', newline='') as file_:
+        writer = csv.DictWriter(file_, fieldnames=field_names)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(filename + '.tmp', filename)
+    return {row['am_id'] for row in rows}
+
+
+def _ams_to_crawl(done: Set[str]) -> List[AMMetadata]:
+    metadata = DATA_FETCHER.load_all_am_metadata().values()
+    return sorted((md for md in metadata if md.aida_page and md.cid not in done), key=lambda md: md.cid)
+
+
+def crawl(filename: str, nb_workers: int, delay_seconds: float, restart: bool) -> None:
+    if restart and os.path.exists(filename):
+        os.remove(filename)
+    field_names = [field.name for field in fields(AIDACrawlRow)]
+    done = _keep_successful_rows(filename, field_names)
+    ams = _ams_to_crawl(done)
+    print(f'{len(done)} AMs already crawled, {len(ams)} to crawl.')
+    politeness = _Politeness(delay_seconds)
+    with open(filename, 'a', newline='') as file_, ThreadPoolExecutor(nb_workers) as executor:
+        writer = csv.DictWriter(file_, fieldnames=field_names)
+        futures = [executor.submit(_crawl_am, md, politeness) for md in ams]
+        nb_failures = 0
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            row = future.result()
+            nb_failures += 0 if row.success else 1
+            writer.writerow(asdict(row))
+            file_.flush()
+    print(f'{len(ams) - nb_failures} AMs parsed, {nb_failures} failures. Report written in {filename}.')
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('filename', help='CSV report, completed if it already exists.')
+    parser.add_argument('--nb-workers', type=int, default=2, help='Number of pages processed concurrently.')
+    parser.add_argument('--delay', type=float, default=1.0, help='Minimum delay between two requests (s).')
+    parser.add_argument('--restart', action='store_true', help='Discard the existing report.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = _parse_args()
+    crawl(args.filename, args.nb_workers, args.delay, args.restart)
@@ -1,45 +1,108 @@
+import hashlib
 import re
 from copy import copy
 from dataclasses import replace
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+import diskcache
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from bs4.element import Comment, NavigableString, Tag
 from envinorma.io.parse_html import extract_text_elements
 from envinorma.models import StructuredText
 from envinorma.models.arrete_ministeriel import ArreteMinisteriel
 from envinorma.models.text_elements import EnrichedString
 from envinorma.structure import build_structured_text
+from requests.adapters import HTTPAdapter
 
 from back_office.config import AIDA_URL
+from back_office.helpers.disk_cache import process_cache, process_singleton
 
 NOR_REGEXP = r'[A-Z]{4}[0-9]{7}[A-Z]'
+_CACHE_DIRECTORY = '/tmp/aida-pages'
+_CACHE_SIZE_LIMIT = 2 ** 29
+_TIMEOUT_SECONDS = (5, 30)
+_MISSING = object()
+_CONTENT_DIV = SoupStrainer('div', {'id': 'content-inner'})
+
+
+def _aida_cache() -> diskcache.Cache:
+    return process_cache(_CACHE_DIRECTORY, size_limit=_CACHE_SIZE_LIMIT, eviction_policy='least-recently-used')
+
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_maxsize=8))
+    return session
+
+
+def _session() -> requests.Session:
+    """Keep-alive session of the current process."""
+    return process_singleton('aida.session', _new_session)
+
+
+def _revalidation_headers(cached_page: Optional[Dict[str, str]]) -> Dict[str, str]:
+    if not cached_page:
+        return {}
+    headers = {}
+    if cached_page.get('etag'):
+        headers['If-None-Match'] = cached_page['etag']
+    if cached_page.get('last_modified'):
+        headers['If-Modified-Since'] = cached_page['last_modified']
+    return headers
 
 
 def _download_html(document_id: str) -> str:
-    response = requests.get(AIDA_URL + document_id)
+    """Page content, revalidated with ETag/Last-Modified when the page is already cached."""
+    key = ('html', document_id)
+    cached_page: Optional[Dict[str, str]] = _aida_cache().get(key)
+    headers = _revalidation_headers(cached_page)
+    response = _session().get(AIDA_URL + document_id, headers=headers, timeout=_TIMEOUT_SECONDS)
+    if response.status_code == 304 and cached_page:
+        return cached_page['html']
     if response.status_code != 200:
         raise ValueError(f'Request failed with status code {response.status_code}')
-    return response.content.decode()
+    html = response.content.decode()
+    page = {'html': html, 'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+    _aida_cache().set(key, page)
+    return html
 
 
-def _remove_comments(soup: Tag) -> Tag:
-    comments = soup.findAll(text=lambda text: isinstance(text, Comment))
-    for comment in comments:
-        comment.extract()
-    return soup
+class _CommentFreeSoup(BeautifulSoup):
+    """BeautifulSoup dropping comments while parsing, instead of building them and removing them afterwards."""
 
+    def endData(self, containerClass: Optional[type] = None) -> None:
+        if containerClass is Comment:
+            self.current_data = []
+            return
+        super().endData(containerClass)
 
-def _parse_aida_text(document_id: str) -> Optional[StructuredText]:
-    page_content = _download_html(document_id)
-    soup = BeautifulSoup(page_content, 'html.parser')
+
+def _content_div(page_content: str, fast: bool = True) -> Optional[Tag]:
+    """Content div of a page, without comments. In fast mode, only this div is turned into a tree."""
+    soup = _CommentFreeSoup(page_content, 'html.parser', parse_only=_CONTENT_DIV if fast else None)
     content_div = soup.find('div', {'id': 'content-inner'})
     if not content_div or isinstance(content_div, NavigableString):
         return None
-    clean_tree = _remove_comments(content_div)
-    elements = extract_text_elements(clean_tree)
-    return build_structured_text('', elements)
+    return content_div
+
+
+def _parse_aida_html(page_content: str) -> Optional[StructuredText]:
+    content_div = _content_div(page_content)
+    if content_div is None:
+        return None
+    return build_structured_text('', extract_text_elements(content_div))
+
+
+def _parse_aida_text(document_id: str) -> Optional[StructuredText]:
+    """Parsed content of a page, cached by page hash, None if the page has no content."""
+    page_content = _download_html(document_id)
+    key = ('text', hashlib.sha256(page_content.encode()).hexdigest())
+    text = _aida_cache().get(key, default=_MISSING)
+    if text is _MISSING:
+        text = _parse_aida_html(page_content)
+        _aida_cache().set(key, text)
+    return text
 
 
 def _extract_section(text: StructuredText) -> StructuredText:
@@ -70,16 +133,11 @@ def _truncate_title(title: str) -> str:
     return title
 
 
-def _truncate_unneccessarily_long_titles(text: StructuredText) -> StructuredText:
-    new_text = copy(text)
-    new_text.sections = [_truncate_unneccessarily_long_titles(section) for section in new_text.sections]
-    new_text.title.text = _truncate_title(new_text.title.text)
-    return new_text
-
-
-def _remove_empty_alineas(text: StructuredText) -> StructuredText:
+def _clean_text(text: StructuredText, sections: List[StructuredText]) -> StructuredText:
+    """Truncates long titles and removes empty alineas, leaving input sections untouched."""
     new_text = copy(text)
-    new_text.sections = [_remove_empty_alineas(section) for section in new_text.sections]
+    new_text.title = replace(text.title, text=_truncate_title(text.title.text))
+    new_text.sections = [_clean_text(section, section.sections) for section in sections]
     new_text.outer_alineas = [
         replace(alinea, text=alinea.text.strip())
         for alinea in text.outer_alineas
@@ -89,9 +147,7 @@ def _remove_empty_alineas(text: StructuredText) -> StructuredText:
 
 
 def _clean_section(text: StructuredText) -> StructuredText:
-    new_text = copy(text)
-    new_text.sections = _remove_sections_before_visa(text.sections)
-    return _remove_empty_alineas(_truncate_unneccessarily_long_titles(new_text))
+    return _clean_text(text, _remove_sections_before_visa(text.sections))
 
 
 def _build_am(section: StructuredText, am_id: str) -> ArreteMinisteriel:
@@ -0,0 +1,279 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, List, Optional, Tuple, Type, TypeVar
+
+import psycopg2
+from envinorma.models import AMMetadata, ArreteMinisteriel
+from envinorma.parametrization import ParameterElement, Parametrization
+
+from back_office.helpers.am_outline import AMOutline
+from back_office.helpers.am_patch import AMPatch
+
+T = TypeVar('T')
+_Key = Tuple[str, str]
+_CHANNEL = 'back_office_cache'
+# AMs are large, outlines and parametrizations are small and metadata are tiny.
+_MAX_SIZES = {'am': 32, 'outline': 128, 'parametrization': 128, 'metadata': 1024, 'all_metadata': 2}
+_MAX_TRACKED_INVALIDATIONS = 1024
+# Writes made outside of CachedDataFetcher (scripts, other services) are not notified: they are seen after this delay.
+_TTL_SECONDS = 300.0
+
+
+class VersionedLRUCache(Generic[T]):
+    """Thread safe LRU cache with expiring entries, rejecting values loaded before their key was invalidated."""
+
+    def __init__(
+        self,
+        max_size: int,
+        max_tracked_invalidations: int = _MAX_TRACKED_INVALIDATIONS,
+        ttl_seconds: float = _TTL_SECONDS,
+    ):
+        self.max_size = max_size
+        self.max_tracked_invalidations = max_tracked_invalidations
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[Hashable, Tuple[T, float]]' = OrderedDict()
+        self._clock = 0
+        self._invalidations: 'OrderedDict[Hashable, int]' = OrderedDict()
+        self._forgotten_invalidations_clock = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def version(self, key: Hashable) -> int:
+        with self._lock:
+            return self._clock
+
+    def _last_invalidation(self, key: Hashable) -> int:
+        return self._invalidations.get(key, self._forgotten_invalidations_clock)
+
+    def get(self, key: Hashable) -> Optional[T]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            value, expires_at = self._entries[key]
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: T, version: int) -> bool:
+        with self._lock:
+            if self._last_invalidation(key) > version:
+                return False
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._clock += 1
+            self._invalidations[key] = self._clock
+            self._invalidations.move_to_end(key)
+            while len(self._invalidations) > self.max_tracked_invalidations:
+                _, clock = self._invalidations.popitem(last=False)
+                self._forgotten_invalidations_clock = max(self._forgotten_invalidations_clock, clock)
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clock += 1
+            self._forgotten_invalidations_clock = self._clock
+            self._invalidations.clear()
+            self._entries.clear()
+
+
+class _InvalidationChannel:
+    """Propagates invalidations between workers with postgres LISTEN/NOTIFY."""
+
+    def __init__(self, psql_dsn: str):
+        self.psql_dsn = psql_dsn
+        self._connection: Optional[Any] = None
+        self._pid: Optional[int] = None
+        self._token = ''
+        self._may_have_missed_notifications = True
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Any:
+        if self._connection is not None and self._pid == os.getpid() and not self._connection.closed:
+            return self._connection
+        connection = psycopg2.connect(self.psql_dsn)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {_CHANNEL};')
+        self._connection, self._pid, self._token = connection, os.getpid(), uuid.uuid4().hex
+        self._may_have_missed_notifications = True
+        return connection
+
+    def _drop_connection(self) -> None:
+        if self._connection is not None and self._pid == os.getpid():
+            try:
+                self._connection.close()
+            except psycopg2.Error:
+                pass
+        self._connection = None
+
+    def poll(self) -> Optional[List[str]]:
+        """Payloads notified by other workers, None if some may have been missed."""
+        with self._lock:
+            try:
+                connection = self._connect()
+                connection.poll()
+            except psycopg2.Error:
+                logging.exception('Cache invalidation channel unavailable.')
+                self._drop_connection()
+                return None
+            notifies, connection.notifies = connection.notifies, []
+            if self._may_have_missed_notifications:
+                self._may_have_missed_notifications = False
+                return None
+            prefix = f'{self._token}:'
+            return [notify.payload for notify in notifies if not notify.payload.startswith(prefix)]
+
+    def notify(self, payload: str) -> None:
+        with self._lock:
+            try:
+                connection = self._connect()
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_notify(%s, %s);', (_CHANNEL, f'{self._token}:{payload}'))
+            except psycopg2.Error:
+                logging.exception('Could not notify cache invalidation.')
+                self._drop_connection()
+
+
+def _dependent_keys(key: _Key) -> List[_Key]:
+    kind, am_id = key
+    if kind == 'am':
+        return [('outline', am_id)]
+    if kind == 'metadata':
+        return [('all_metadata', str(True)), ('all_metadata', str(False))]
+    return []
+
+
+def _payload(key: _Key) -> str:
+    kind, am_id = key
+    return f'{kind}:{am_id}'
+
+
+def _parse_payload(payload: str) -> _Key:
+    _, kind, am_id = payload.split(':', 2)
+    return kind, am_id
+
+
+def _dict_loader(loader: Callable[[str], Optional[Any]]) -> Callable[[str], Optional[Dict[str, Any]]]:
+    def _load(am_id: str) -> Optional[Dict[str, Any]]:
+        value = loader(am_id)
+        return value.to_dict() if value is not None else None
+
+    return _load
+
+
+class CachedDataFetcher:
+    """Per-process cache of AMs, outlines, metadata and parametrizations.
+
+    Values are cached as dicts and rebuilt with from_dict on each read, so that callers can edit what they get.
+    """
+
+    def __init__(self, fetcher: Any, psql_dsn: str, max_sizes: Optional[Dict[str, int]] = None):
+        self._fetcher = fetcher
+        self._caches: Dict[str, VersionedLRUCache[Any]] = {
+            kind: VersionedLRUCache(max_size) for kind, max_size in (max_sizes or _MAX_SIZES).items()
+        }
+        self._channel = _InvalidationChannel(psql_dsn)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._fetcher, name)
+
+    def _apply_remote_invalidations(self) -> None:
+        payloads = self._channel.poll()
+        if payloads is None:
+            for cache in self._caches.values():
+                cache.clear()
+            return
+        for payload in payloads:
+            self._invalidate_locally(_parse_payload(payload))
+
+    def _load(self, key: _Key, loader: Callable[[str], Optional[Any]], from_dict: Callable[[Any], T]) -> Optional[T]:
+        """loader returns the dict form of the value, None if there is no value."""
+        self._apply_remote_invalidations()
+        cache = self._caches[key[0]]
+        cached = cache.get(key)
+        if cached is not None:
+            return from_dict(cached)
+        version = cache.version(key)
+        value = loader(key[1])
+        self._apply_remote_invalidations()
+        if value is None:
+            return None
+        cache.put(key, value, version)
+        return from_dict(value)
+
+    def _invalidate_locally(self, key: _Key) -> None:
+        for key_to_invalidate in [key, *_dependent_keys(key)]:
+            self._caches[key_to_invalidate[0]].invalidate(key_to_invalidate)
+
+    def _invalidate(self, key: _Key) -> None:
+        self._invalidate_locally(key)
+        self._channel.notify(_payload(key))
+
+    def load_am(self, am_id: str) -> Optional[ArreteMinisteriel]:
+        return self._load(('am', am_id), self._fetcher.load_am_dict, ArreteMinisteriel.from_dict)
+
+    def load_am_metadata(self, am_id: str) -> Optional[AMMetadata]:
+        return self._load(('metadata', am_id), _dict_loader(self._fetcher.load_am_metadata), AMMetadata.from_dict)
+
+    def load_am_outline(self, am_id: str) -> Optional[AMOutline]:
+        return self._load(('outline', am_id), _dict_loader(self._fetcher.load_am_outline), AMOutline.from_dict)
+
+    def load_all_am_metadata(self, with_deleted_ams: bool = False) -> Dict[str, AMMetadata]:
+        def _loader(_: str) -> Dict[str, Dict[str, Any]]:
+            all_metadata = self._fetcher.load_all_am_metadata(with_deleted_ams=with_deleted_ams)
+            return {am_id: metadata.to_dict() for am_id, metadata in all_metadata.items()}
+
+        def _from_dict(dicts: Dict[str, Dict[str, Any]]) -> Dict[str, AMMetadata]:
+            return {am_id: AMMetadata.from_dict(dict_) for am_id, dict_ in dicts.items()}
+
+        return self._load(('all_metadata', str(with_deleted_ams)), _loader, _from_dict) or {}
+
+    def load_or_init_parametrization(self, am_id: str) -> Parametrization:
+        key = ('parametrization', am_id)
+        parametrization = self._load(
+            key, _dict_loader(self._fetcher.load_or_init_parametrization), Parametrization.from_dict
+        )
+        assert parametrization is not None
+        return parametrization
+
+    def upsert_am(self, am_id: str, am: ArreteMinisteriel) -> None:
+        self._fetcher.upsert_am(am_id, am)
+        self._invalidate(('am', am_id))
+
+    def patch_am(self, am_id: str, patch: AMPatch) -> None:
+        try:
+            self._fetcher.patch_am(am_id, patch)
+        finally:  # a stale patch means the cached AM is stale as well
+            self._invalidate(('am', am_id))
+
+    def upsert_am_metadata(self, am_metadata: AMMetadata) -> None:
+        self._fetcher.upsert_am_metadata(am_metadata)
+        self._invalidate(('metadata', am_metadata.cid))
+
+    def upsert_parameter(self, am_id: str, parameter: ParameterElement, parameter_id: Optional[str]) -> None:
+        self._fetcher.upsert_parameter(am_id, parameter, parameter_id)
+        self._invalidate(('parametrization', am_id))
+
+    def upsert_parameters(
+        self, am_id: str, parameters: List[ParameterElement], parameter_id: Optional[str] = None
+    ) -> None:
+        self._fetcher.upsert_parameters(am_id, parameters, parameter_id)
+        self._invalidate(('parametrization', am_id))
+
+    def remove_parameter(self, am_id: str, parameter_type: Type[ParameterElement], parameter_id: str) -> None:
+        self._fetcher.remove_parameter(am_id, parameter_type, parameter_id)
+        self._invalidate(('parametrization', am_id))
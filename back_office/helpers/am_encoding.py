@@ -0,0 +1,62 @@
+from typing import Any, Dict, List, Optional
+
+import msgpack
+import zstandard
+
+_COMPRESSION_LEVEL = 10
+_DICTIONARY_SIZE = 112_640
+
+
+class UnknownDictionaryError(Exception):
+    pass
+
+
+def train_dictionary(samples: List[Dict[str, Any]]) -> bytes:
+    """Trains a zstd dictionary on msgpack-encoded AM dicts and returns its raw content."""
+    packed = [msgpack.packb(sample, use_bin_type=True) for sample in samples]
+    return zstandard.train_dictionary(_DICTIONARY_SIZE, packed).as_bytes()
+
+
+def dictionary_id(dictionary: bytes) -> int:
+    return zstandard.ZstdCompressionDict(dictionary).dict_id()
+
+
+def frame_dictionary_id(blob: bytes) -> int:
+    """Id of the dictionary a blob was compressed with, 0 if none."""
+    return zstandard.get_frame_parameters(blob).dict_id
+
+
+class AMCodec:
+    """Encodes AM dicts as msgpack compressed with the last zstd dictionary. Not thread safe."""
+
+    def __init__(self, dictionaries: Optional[List[bytes]] = None):
+        self._dictionaries: Dict[int, Any] = {}
+        self.current_dictionary_id = 0
+        for dictionary in dictionaries or []:
+            zstd_dictionary = zstandard.ZstdCompressionDict(dictionary)
+            self.current_dictionary_id = zstd_dictionary.dict_id()
+            self._dictionaries[self.current_dictionary_id] = zstd_dictionary
+        dict_data = self._dict_data(self.current_dictionary_id)
+        self._compressor = zstandard.ZstdCompressor(level=_COMPRESSION_LEVEL, **dict_data)
+        self._decompressors: Dict[int, Any] = {}
+
+    def _dict_data(self, dictionary_id: int) -> Dict[str, Any]:
+        # zstandard's C backend rejects dict_data=None
+        return {'dict_data': self._dictionaries[dictionary_id]} if dictionary_id in self._dictionaries else {}
+
+    def knows_dictionary(self, dictionary_id: int) -> bool:
+        return dictionary_id == 0 or dictionary_id in self._dictionaries
+
+    def _decompressor(self, dictionary_id: int) -> Any:
+        if dictionary_id not in self._decompressors:
+            if not self.knows_dictionary(dictionary_id):
+                raise UnknownDictionaryError(f'Unknown zstd dictionary {dictionary_id}.')
+            self._decompressors[dictionary_id] = zstandard.ZstdDecompressor(**self._dict_data(dictionary_id))
+        return self._decompressors[dictionary_id]
+
+    def encode(self, am_dict: Dict[str, Any]) -> bytes:
+        return self._compressor.compress(msgpack.packb(am_dict, use_bin_type=True))
+
+    def decode(self, blob: bytes) -> Dict[str, Any]:
+        dictionary_id = frame_dictionary_id(blob)
+        return msgpack.unpackb(self._decompressor(dictionary_id).decompress(blob), raw=False)
@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from envinorma.models import Annotations, ArreteMinisteriel, StructuredText
+from envinorma.topics.patterns import TopicName
+
+
+@dataclass
+class SectionOutline:
+    id: str
+    title: str
+    depth: int
+    topic: Optional[TopicName]
+    sections: List['SectionOutline']
+
+    def descendent_sections(self) -> List['SectionOutline']:
+        return [desc for section in self.sections for desc in [section, *section.descendent_sections()]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'title': self.title,
+            'depth': self.depth,
+            'topic': self.topic.value if self.topic else None,
+            'sections': [section.to_dict() for section in self.sections],
+        }
+
+    @classmethod
+    def from_dict(cls, dict_: Dict[str, Any]) -> 'SectionOutline':
+        topic = TopicName(dict_['topic']) if dict_['topic'] else None
+        sections = [cls.from_dict(section) for section in dict_['sections']]
+        return cls(dict_['id'], dict_['title'], dict_['depth'], topic, sections)
+
+
+@dataclass
+class AMOutline:
+    """Structure of an AM without alineas, with its applicability as stored."""
+
+    id: str
+    title: str
+    sections: List[SectionOutline]
+    applicability: Optional[Dict[str, Any]] = None
+
+    def descendent_sections(self) -> List[SectionOutline]:
+        return [desc for section in self.sections for desc in [section, *section.descendent_sections()]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'title': self.title,
+            'sections': [section.to_dict() for section in self.sections],
+            'applicability': self.applicability,
+        }
+
+    @classmethod
+    def from_dict(cls, dict_: Dict[str, Any]) -> 'AMOutline':
+        sections = [SectionOutline.from_dict(section) for section in dict_['sections']]
+        return cls(dict_['id'], dict_['title'], sections, dict_['applicability'])
+
+
+def outline_from_text(text: StructuredText, depth: int = 0) -> SectionOutline:
+    topic = text.annotations.topic if text.annotations else None
+    sections = [outline_from_text(section, depth + 1) for section in text.sections]
+    return SectionOutline(text.id, text.title.text, depth, topic, sections)
+
+
+def outline_from_am(am: ArreteMinisteriel) -> AMOutline:
+    sections = [outline_from_text(section, 1) for section in am.sections]
+    applicability = am.applicability.to_dict() if am.applicability else None
+    return AMOutline(am.id or '', am.title.text, sections, applicability)
+
+
+def _section_outline_from_dict(section: Dict[str, Any], depth: int) -> SectionOutline:
+    annotations = section.get('annotations')
+    topic = Annotations.from_dict(annotations).topic if annotations else None
+    sections = [_section_outline_from_dict(subsection, depth + 1) for subsection in section.get('sections') or []]
+    return SectionOutline(section['id'], section['title']['text'], depth, topic, sections)
+
+
+def outline_from_dict(am_dict: Dict[str, Any]) -> AMOutline:
+    """Builds the outline from the serialized AM, without deserializing alineas and tables."""
+    sections = [_section_outline_from_dict(section, 1) for section in am_dict.get('sections') or []]
+    return AMOutline(am_dict.get('id') or '', am_dict['title']['text'], sections, am_dict.get('applicability'))
@@ -0,0 +1,84 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from envinorma.models import Annotations
+from envinorma.models.am_applicability import AMApplicability
+from envinorma.topics.patterns import TopicName
+
+from back_office.helpers.am_outline import AMOutline, SectionOutline
+from back_office.helpers.psql_tables import AM_TABLE
+
+
+class StaleAMError(Exception):
+    """Raised when the AM changed since the patch was computed."""
+
+
+@dataclass
+class AMPatch:
+    """Merges `changes` into the json object at `path` if each `expected` path holds an accepted value."""
+
+    path: List[str]
+    changes: Dict[str, Any]
+    expected: List[Tuple[List[str], List[Any]]]
+
+
+def _section_path(sections: List[SectionOutline], section_id: str) -> Optional[List[str]]:
+    for rank, section in enumerate(sections):
+        if section.id == section_id:
+            return ['sections', str(rank)]
+        subpath = _section_path(section.sections, section_id)
+        if subpath:
+            return ['sections', str(rank), *subpath]
+    return None
+
+
+def section_path(am: AMOutline, section_id: str) -> List[str]:
+    """Path of a section in the serialized AM."""
+    path = _section_path(am.sections, section_id)
+    if path is None:
+        raise ValueError(f'Section {section_id} not found in AM {am.id}.')
+    return path
+
+
+def _subsection_paths(section: SectionOutline, path: List[str]) -> List[List[str]]:
+    paths = []
+    for rank, subsection in enumerate(section.sections):
+        subpath = [*path, 'sections', str(rank)]
+        paths.extend([subpath, *_subsection_paths(subsection, subpath)])
+    return paths
+
+
+def topic_patch(am: AMOutline, section_id: str, topic: Optional[TopicName]) -> AMPatch:
+    """Sets the topic of a section. The patch is rejected if the section moved since am was loaded, or, when
+    setting a topic, if one of its ascendants or descendants has a topic."""
+    path = section_path(am, section_id)
+    topic_value = Annotations(topic=topic).to_dict()['topic']
+    expected: List[Tuple[List[str], List[Any]]] = [([*path, 'id'], [section_id])]
+    if topic is not None:
+        ascendant_paths = [path[:index] for index in range(2, len(path), 2)]
+        section = next(section for section in am.descendent_sections() if section.id == section_id)
+        for other_path in [*ascendant_paths, *_subsection_paths(section, path)]:
+            expected.append(([*other_path, 'annotations', 'topic'], [None]))
+    return AMPatch([*path, 'annotations'], {'topic': topic_value}, expected)
+
+
+def applicability_patch(applicability: AMApplicability, previous: Optional[Dict[str, Any]]) -> AMPatch:
+    """Replaces the applicability, which must still be equal to previous, as stored (see AMOutline)."""
+    return AMPatch([], {'applicability': applicability.to_dict()}, [(['applicability'], [previous])])
+
+
+def patch_query(am_id: str, patch: AMPatch) -> Tuple[str, List[Any]]:
+    """Single UPDATE statement applying the patch to a json, jsonb or text column, returning the new data."""
+    changes = json.dumps(patch.changes)
+    if patch.path:
+        target = "COALESCE(NULLIF(data::jsonb #> %s, 'null'::jsonb), '{}'::jsonb) || %s::jsonb"
+        new_value, params = f'jsonb_set(data::jsonb, %s, {target})', [patch.path, patch.path, changes]
+    else:
+        new_value, params = 'data::jsonb || %s::jsonb', [changes]
+    conditions = ['am_id = %s']
+    params.append(am_id)
+    for path, values in patch.expected:
+        conditions.append("COALESCE(data::jsonb #> %s, 'null'::jsonb) = ANY(%s::jsonb[])")
+        params.extend([path, [json.dumps(value) for value in values]])
+    return f'UPDATE {AM_TABLE} SET data = {new_value} WHERE {" AND ".join(conditions)} RETURNING data;', params
@@ -0,0 +1,48 @@
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+from envinorma.data_fetcher import DataFetcher
+from envinorma.enriching import enrich
+from envinorma.models import AMMetadata, AMState, ArreteMinisteriel
+
+from back_office.helpers.data_fetcher import BackOfficeDataFetcher
+from back_office.helpers.psql_tables import select_am_data_query
+from back_office.utils import DATA_FETCHER_POOL
+
+_BATCH_SIZE = 20
+
+
+@dataclass
+class AMBundle:
+    am: ArreteMinisteriel
+    metadata: AMMetadata
+
+    def enriched_am(self) -> ArreteMinisteriel:
+        return enrich(self.am, self.metadata)
+
+
+def _select_ams(fetcher: DataFetcher, state: Optional[AMState]) -> Dict[str, AMMetadata]:
+    all_metadata = fetcher.load_all_am_metadata(with_deleted_ams=True)
+    return {am_id: md for am_id, md in all_metadata.items() if state is None or md.state == state}
+
+
+def select_ams(state: Optional[AMState] = AMState.VIGUEUR) -> Dict[str, AMMetadata]:
+    """Metadata of the AMs in the given state, or of every AM if state is None."""
+    with DATA_FETCHER_POOL.checkout() as fetcher:
+        return _select_ams(fetcher, state)
+
+
+def iter_ams(state: Optional[AMState] = AMState.VIGUEUR) -> Iterator[AMBundle]:
+    """Yields the AMs in the given state (every AM if None), sorted by id, streamed through a server-side cursor."""
+    with DATA_FETCHER_POOL.checkout() as fetcher:
+        assert isinstance(fetcher, BackOfficeDataFetcher)
+        id_to_metadata = _select_ams(fetcher, state)
+        if fetcher.compact_storage:
+            fetcher.load_codec()
+        query = select_am_data_query(fetcher.compact_storage, 'am_id = ANY(%s)') + ' ORDER BY am_id;'
+        with fetcher.psql_conn.cursor(name='back_office_iter_ams') as cursor:
+            cursor.itersize = _BATCH_SIZE
+            cursor.execute(query, (sorted(id_to_metadata),))
+            for am_id, compact_data, json_data in cursor:
+                am = ArreteMinisteriel.from_dict(fetcher.decode_am_data(compact_data, json_data))
+                yield AMBundle(am, id_to_metadata[am_id])
@@ -0,0 +1,220 @@
+import json
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from envinorma.data_fetcher import DataFetcher
+from envinorma.models import ArreteMinisteriel, StructuredText
+from envinorma.parametrization import (
+    AlternativeSection,
+    AMWarning,
+    InapplicableSection,
+    ParameterElement,
+    Parametrization,
+)
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from back_office.config import AM_STORAGE_FORMAT, AMStorageFormat
+from back_office.helpers.am_encoding import AMCodec, frame_dictionary_id
+from back_office.helpers.am_outline import AMOutline, outline_from_dict
+from back_office.helpers.am_patch import AMPatch, StaleAMError, patch_query
+from back_office.helpers.psql_tables import (
+    AM_COMPACT_DICTIONARY_TABLE,
+    AM_COMPACT_TABLE,
+    AM_OUTLINE_TABLE,
+    AM_TABLE,
+    PARAMETRIZATION_TABLE,
+    json_column,
+    select_am_data_query,
+)
+
+
+def _empty_parametrization() -> Parametrization:
+    return Parametrization(inapplicable_sections=[], alternative_sections=[], warnings=[])
+
+
+def _upsert_in_list(elements: List, parameter: ParameterElement, parameter_id: Optional[str]) -> List:
+    if parameter_id is None:
+        return [*elements, parameter]
+    new_parameter = replace(parameter, id=parameter_id)
+    if parameter_id not in {element.id for element in elements}:
+        raise ValueError(f'Parameter with id {parameter_id} not found.')
+    return [new_parameter if element.id == parameter_id else element for element in elements]
+
+
+def add_parameters(
+    parametrization: Parametrization, parameters: List[ParameterElement], parameter_id: Optional[str] = None
+) -> Parametrization:
+    """Returns a new parametrization containing the new parameters, replacing parameter_id if given."""
+    if parameter_id is not None and len(parameters) != 1:
+        raise ValueError('Must have only one parameter when updating a specific parameter.')
+    inapplicable_sections = parametrization.inapplicable_sections
+    alternative_sections = parametrization.alternative_sections
+    warnings = parametrization.warnings
+    for parameter in parameters:
+        if isinstance(parameter, InapplicableSection):
+            inapplicable_sections = _upsert_in_list(inapplicable_sections, parameter, parameter_id)
+        elif isinstance(parameter, AlternativeSection):
+            alternative_sections = _upsert_in_list(alternative_sections, parameter, parameter_id)
+        elif isinstance(parameter, AMWarning):
+            warnings = _upsert_in_list(warnings, parameter, parameter_id)
+        else:
+            raise NotImplementedError(f'Unhandled parameter type {type(parameter)}')
+    return Parametrization(
+        inapplicable_sections=inapplicable_sections, alternative_sections=alternative_sections, warnings=warnings
+    )
+
+
+def _upsert_query(table: str) -> str:
+    return f'INSERT INTO {table}(am_id, data) VALUES(%s, %s) ON CONFLICT (am_id) DO UPDATE SET data = EXCLUDED.data;'
+
+
+class BackOfficeDataFetcher(DataFetcher):
+    """DataFetcher with back-office specific queries."""
+
+    storage_format: AMStorageFormat = AM_STORAGE_FORMAT
+
+    def __init__(self, psql_dsn: str):
+        super().__init__(psql_dsn)
+        self._codec: Optional[AMCodec] = None
+
+    @property
+    def compact_storage(self) -> bool:
+        return self.storage_format == AMStorageFormat.COMPACT
+
+    def load_codec(self) -> AMCodec:
+        if self._codec is None:
+            # Do not end a transaction opened by the caller (e.g. a named cursor being iterated)
+            was_idle = self.psql_conn.get_transaction_status() == TRANSACTION_STATUS_IDLE
+            with self.psql_conn.cursor() as cursor:
+                cursor.execute(f'SELECT data FROM {AM_COMPACT_DICTIONARY_TABLE} ORDER BY created_at;')
+                dictionaries = [bytes(row[0]) for row in cursor.fetchall()]
+            if was_idle:
+                self.psql_conn.rollback()
+            self._codec = AMCodec(dictionaries)
+        return self._codec
+
+    def decode_am_data(self, compact_data: Optional[Any], json_data: Optional[Any]) -> Dict[str, Any]:
+        """Decodes a row returned by select_am_data_query."""
+        if compact_data is None:
+            if json_data is None:
+                raise ValueError('AM row has neither compact nor json data.')
+            return json_column(json_data)
+        blob = bytes(compact_data)
+        codec = self.load_codec()
+        if not codec.knows_dictionary(frame_dictionary_id(blob)):
+            self._codec = None  # a dictionary was added since the codec was built
+            codec = self.load_codec()
+        return codec.decode(blob)
+
+    def _load_am_data(self, am_id: str) -> Optional[Tuple[Optional[Any], Optional[Any]]]:
+        connection = self.psql_conn
+        with connection.cursor() as cursor:
+            cursor.execute(select_am_data_query(self.compact_storage, 'am_id = %s') + ';', (am_id,))
+            row = cursor.fetchone()
+        connection.rollback()
+        return (row[1], row[2]) if row else None
+
+    def load_am_dict(self, am_id: str) -> Optional[Dict[str, Any]]:
+        """Serialized AM, None if it does not exist."""
+        row = self._load_am_data(am_id)
+        return self.decode_am_data(*row) if row else None
+
+    def load_am(self, am_id: str) -> Optional[ArreteMinisteriel]:
+        if not self.compact_storage:
+            return super().load_am(am_id)
+        am_dict = self.load_am_dict(am_id)
+        return ArreteMinisteriel.from_dict(am_dict) if am_dict else None
+
+    def _load_stored_outline(self, am_id: str) -> Optional[AMOutline]:
+        connection = self.psql_conn
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT data FROM {AM_OUTLINE_TABLE} WHERE am_id = %s;', (am_id,))
+            row = cursor.fetchone()
+        connection.rollback()
+        return AMOutline.from_dict(json_column(row[0])) if row else None
+
+    def load_am_outline(self, am_id: str) -> Optional[AMOutline]:
+        """Reads the outline stored with the compact blob, or builds it from the whole AM if there is none."""
+        if self.compact_storage:
+            outline = self._load_stored_outline(am_id)
+            if outline:
+                return outline
+        am_dict = self.load_am_dict(am_id)
+        return outline_from_dict(am_dict) if am_dict else None
+
+    def load_am_section(self, am_id: str, path: List[str]) -> Optional[StructuredText]:
+        """Loads the section at path (see am_patch.section_path), only this section being read from json storage."""
+        if self.compact_storage:
+            row = self._load_am_data(am_id)
+            if not row:
+                return None
+            section_dict: Any = self.decode_am_data(*row)
+            for key in path:
+                section_dict = section_dict[int(key)] if isinstance(section_dict, list) else section_dict[key]
+        else:
+            connection = self.psql_conn
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT data::jsonb #> %s FROM {AM_TABLE} WHERE am_id = %s;', (path, am_id))
+                row = cursor.fetchone()
+            connection.rollback()
+            section_dict = row[0] if row else None
+        return StructuredText.from_dict(json_column(section_dict)) if section_dict else None
+
+    def upsert_am(self, am_id: str, am: ArreteMinisteriel) -> None:
+        """Writes the json version, then the compact one."""
+        super().upsert_am(am_id, am)
+        if self.compact_storage:
+            self.upsert_compact_am(am_id, am.to_dict())
+
+    def patch_am(self, am_id: str, patch: AMPatch) -> None:
+        """Applies a partial update in place, raises StaleAMError if the AM is missing or changed."""
+        query, params = patch_query(am_id, patch)
+        connection = self.psql_conn
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query, params)
+                if cursor.rowcount != 1:
+                    raise StaleAMError(f'AM {am_id} not found or modified since the patch was computed.')
+                new_data = cursor.fetchone()[0]
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        if self.compact_storage:  # the update dropped the compact blob
+            self.upsert_compact_am(am_id, json_column(new_data))
+
+    def upsert_compact_am(self, am_id: str, am_dict: Dict[str, Any]) -> None:
+        """Writes the blob and outline only if the locked json row still holds am_dict, i.e. no save happened since."""
+        lock_query = f'SELECT data::jsonb = %s::jsonb FROM {AM_TABLE} WHERE am_id = %s FOR UPDATE;'
+        blob = self.load_codec().encode(am_dict)
+        outline = json.dumps(outline_from_dict(am_dict).to_dict())
+        connection = self.psql_conn
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(lock_query, (json.dumps(am_dict), am_id))
+                row = cursor.fetchone()
+                if row and row[0]:
+                    cursor.execute(_upsert_query(AM_COMPACT_TABLE), (am_id, blob))
+                    cursor.execute(_upsert_query(AM_OUTLINE_TABLE), (am_id, outline))
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+
+    def upsert_parameters(
+        self, am_id: str, parameters: List[ParameterElement], parameter_id: Optional[str] = None
+    ) -> None:
+        """Adds several parameters to the parametrization of an AM in a single transaction."""
+        select_query = f'SELECT data FROM {PARAMETRIZATION_TABLE} WHERE am_id = %s FOR UPDATE;'
+        connection = self.psql_conn
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(select_query, (am_id,))
+                row = cursor.fetchone()
+                parametrization = Parametrization.from_dict(json_column(row[0])) if row else _empty_parametrization()
+                new_parametrization = add_parameters(parametrization, parameters, parameter_id)
+                cursor.execute(_upsert_query(PARAMETRIZATION_TABLE), (am_id, json.dumps(new_parametrization.to_dict())))
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
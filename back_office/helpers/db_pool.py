@@ -0,0 +1,199 @@
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Any, Iterator, Optional, Tuple, Type
+
+import psycopg2
+from envinorma.data_fetcher import DataFetcher
+
+_HEALTH_CHECK_AFTER_IDLE_SECONDS = 60.0
+_SLOW_CHECKOUT_SECONDS = 1.0
+_METRICS_LOG_INTERVAL_SECONDS = 600.0
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+@dataclass
+class PoolMetrics:
+    checkouts: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    timeouts: int = 0
+    discarded_connections: int = 0
+    connections: int = 0
+
+    @property
+    def mean_wait_seconds(self) -> float:
+        return self.total_wait_seconds / self.checkouts if self.checkouts else 0.0
+
+    def summary(self, max_size: int) -> str:
+        return (
+            f'{self.connections}/{max_size} connections, {self.checkouts} checkouts, '
+            f'mean wait {self.mean_wait_seconds * 1000:.1f}ms, max wait {self.max_wait_seconds * 1000:.1f}ms, '
+            f'{self.timeouts} timeouts, {self.discarded_connections} discarded connections'
+        )
+
+
+def _ping(fetcher: DataFetcher) -> bool:
+    try:
+        with fetcher.psql_conn.cursor() as cursor:
+            cursor.execute('SELECT 1;')
+        fetcher.psql_conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _close(fetcher: DataFetcher) -> None:
+    try:
+        fetcher.psql_conn.close()
+    except psycopg2.Error:
+        pass
+
+
+class DataFetcherPool:
+    """Bounded pool of DataFetcher instances, created lazily in each process."""
+
+    def __init__(
+        self,
+        psql_dsn: str,
+        max_size: int,
+        timeout_seconds: float = 30.0,
+        factory: Type[DataFetcher] = DataFetcher,
+    ):
+        self.psql_dsn = psql_dsn
+        self.max_size = max_size
+        self.timeout_seconds = timeout_seconds
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._idle: 'queue.LifoQueue[Tuple[Optional[DataFetcher], float]]' = queue.LifoQueue()
+        self._nb_created = 0
+        self._metrics = PoolMetrics()
+        self._last_metrics_log = time.monotonic()
+
+    def _ensure_current_process(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._idle = queue.LifoQueue()
+                self._nb_created = 0
+                self._metrics = PoolMetrics()
+                self._last_metrics_log = time.monotonic()
+                self._pid = os.getpid()
+
+    def _create_if_allowed(self) -> Optional[DataFetcher]:
+        with self._lock:
+            if self._nb_created >= self.max_size:
+                return None
+            self._nb_created += 1
+        try:
+            return self.factory(self.psql_dsn)
+        except BaseException:
+            self._release_slot()
+            raise
+
+    def _release_slot(self) -> None:
+        """Frees a slot and wakes up a waiting thread."""
+        with self._lock:
+            self._nb_created -= 1
+        self._idle.put((None, 0.0))
+
+    def _discard(self, fetcher: DataFetcher) -> None:
+        _close(fetcher)
+        with self._lock:
+            self._metrics.discarded_connections += 1
+        self._release_slot()
+
+    def _next_idle(self, deadline: float) -> Tuple[Optional[DataFetcher], float]:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        fetcher = self._create_if_allowed()
+        if fetcher:
+            return fetcher, time.monotonic()
+        try:
+            return self._idle.get(timeout=max(deadline - time.monotonic(), 0.0))
+        except queue.Empty:
+            with self._lock:
+                self._metrics.timeouts += 1
+            raise PoolTimeoutError(f'No database connection available after {self.timeout_seconds}s.')
+
+    def _acquire(self) -> DataFetcher:
+        deadline = time.monotonic() + self.timeout_seconds
+        while True:
+            fetcher, idle_since = self._next_idle(deadline)
+            if fetcher is None:  # a slot was freed, a new fetcher may be created
+                continue
+            if time.monotonic() - idle_since > _HEALTH_CHECK_AFTER_IDLE_SECONDS and not _ping(fetcher):
+                self._discard(fetcher)
+                continue
+            return fetcher
+
+    def _record_wait(self, wait_seconds: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._metrics.checkouts += 1
+            self._metrics.total_wait_seconds += wait_seconds
+            self._metrics.max_wait_seconds = max(self._metrics.max_wait_seconds, wait_seconds)
+            log_metrics = now - self._last_metrics_log >= _METRICS_LOG_INTERVAL_SECONDS
+            if log_metrics:
+                self._last_metrics_log = now
+        if wait_seconds > _SLOW_CHECKOUT_SECONDS:
+            logging.warning(f'Waited {wait_seconds:.2f}s for a database connection.')
+        if log_metrics:
+            logging.info(f'Database pool of process {os.getpid()}: {self.metrics().summary(self.max_size)}.')
+
+    @contextmanager
+    def checkout(self) -> Iterator[DataFetcher]:
+        self._ensure_current_process()
+        start = time.monotonic()
+        fetcher = self._acquire()
+        self._record_wait(time.monotonic() - start)
+        try:
+            yield fetcher
+        except psycopg2.Error:
+            self._discard(fetcher)
+            raise
+        except BaseException:
+            self._release(fetcher)
+            raise
+        self._release(fetcher)
+
+    def _release(self, fetcher: DataFetcher) -> None:
+        try:
+            fetcher.psql_conn.rollback()
+        except psycopg2.Error:
+            self._discard(fetcher)
+            return
+        self._idle.put((fetcher, time.monotonic()))
+
+    def metrics(self) -> PoolMetrics:
+        """Counters of the current process since it created the pool, logged every _METRICS_LOG_INTERVAL_SECONDS."""
+        with self._lock:
+            return replace(self._metrics, connections=self._nb_created)
+
+
+class PooledDataFetcher:
+    """Runs each call of the fetcher interface on a fetcher checked out from the pool."""
+
+    def __init__(self, pool: DataFetcherPool):
+        self.pool = pool
+
+    def __getattr__(self, name: str) -> Any:
+        if not callable(getattr(self.pool.factory, name, None)):
+            raise AttributeError(name)
+
+        def _call(*args, **kwargs):
+            with self.pool.checkout() as fetcher:
+                return getattr(fetcher, name)(*args, **kwargs)
+
+        return _call
@@ -0,0 +1,24 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Tuple, TypeVar
+
+import diskcache
+
+T = TypeVar('T')
+
+_INSTANCES: Dict[Tuple[int, str], Any] = {}
+_LOCK = threading.RLock()
+
+
+def process_singleton(key: str, factory: Callable[[], T]) -> T:
+    """Object built by factory once per process, hence after fork in gunicorn workers."""
+    process_key = (os.getpid(), key)
+    with _LOCK:
+        if process_key not in _INSTANCES:
+            _INSTANCES[process_key] = factory()
+        return _INSTANCES[process_key]
+
+
+def process_cache(directory: str, **settings: Any) -> diskcache.Cache:
+    """diskcache.Cache shared by the threads of the current process."""
+    return process_singleton(f'diskcache:{directory}', lambda: diskcache.Cache(directory, **settings))
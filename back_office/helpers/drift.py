@@ -0,0 +1,103 @@
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+import diskcache
+from envinorma.models import AMMetadata, AMState, ArreteMinisteriel
+from text_diff import TextDifferences, UnchangedLine
+
+from back_office.helpers.diff import compute_am_diff
+from back_office.helpers.disk_cache import process_cache
+from back_office.helpers.legifrance import extract_legifrance_am
+from back_office.utils import DATA_FETCHER
+
+_CACHE_DIRECTORY = '/tmp/drift-report'
+_NB_WORKERS = 4
+
+
+@dataclass
+class AMDrift:
+    """Differences between an Envinorma AM and its current Légifrance version, on normalized lines."""
+
+    am_id: str
+    nb_changed_lines: int
+    similarity: float
+    computed_at: datetime
+    error: Optional[str] = None
+
+
+def _drift_cache() -> diskcache.Cache:
+    return process_cache(_CACHE_DIRECTORY)
+
+
+def drift_from_diff(am_id: str, diff: TextDifferences, computed_at: datetime) -> AMDrift:
+    nb_unchanged = sum(1 for line in diff.diff_lines if isinstance(line, UnchangedLine))
+    nb_lines = len(diff.diff_lines)
+    similarity = nb_unchanged / nb_lines if nb_lines else 1.0
+    return AMDrift(am_id, nb_lines - nb_unchanged, similarity, computed_at)
+
+
+def _fingerprint(am: ArreteMinisteriel) -> str:
+    return hashlib.sha256(json.dumps(am.to_dict(), sort_keys=True).encode()).hexdigest()
+
+
+def _compute_drift(am_id: str) -> AMDrift:
+    """Drift of an AM, recomputed only if the Envinorma or Légifrance version changed since last run."""
+    envinorma_version = DATA_FETCHER.load_am(am_id)
+    if not envinorma_version:
+        return AMDrift(am_id, 0, 0.0, datetime.now(), 'AM introuvable dans la base.')
+    legifrance_version = extract_legifrance_am(am_id, fallback_to_non_consolidated=True)
+    fingerprint = (_fingerprint(envinorma_version), _fingerprint(legifrance_version))
+    cached: Optional[Tuple[Tuple[str, str], AMDrift]] = _drift_cache().get(('drift', am_id))
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+    diff = compute_am_diff(legifrance_version, envinorma_version, normalize_text=True)
+    drift = drift_from_diff(am_id, diff, datetime.now())
+    _drift_cache().set(('drift', am_id), (fingerprint, drift))
+    return drift
+
+
+def _safe_compute_drift(am_id: str) -> AMDrift:
+    try:
+        return _compute_drift(am_id)
+    except Exception as exc:
+        logging.exception(f'Could not compute drift of AM {am_id}.')
+        drift = AMDrift(am_id, 0, 0.0, datetime.now(), f'{type(exc).__name__}: {exc}')
+        _drift_cache().set(('drift', am_id), (None, drift))
+        return drift
+
+
+def _in_force_am_ids() -> List[str]:
+    metadata = DATA_FETCHER.load_all_am_metadata().values()
+    return sorted(md.cid for md in metadata if md.state == AMState.VIGUEUR)
+
+
+def sort_by_drift(drifts: List[AMDrift]) -> List[AMDrift]:
+    """Most diverging AMs first, AMs whose drift could not be computed last."""
+    return sorted(drifts, key=lambda drift: (drift.error is not None, drift.similarity, -drift.nb_changed_lines))
+
+
+def refresh_drift_report(
+    set_progress: Optional[Callable[[Tuple[int]], None]] = None, nb_workers: int = _NB_WORKERS
+) -> List[AMDrift]:
+    """Computes and stores the drift of every in-force AM, at most nb_workers at a time."""
+    am_ids = _in_force_am_ids()
+    drifts: List[AMDrift] = []
+    with ThreadPoolExecutor(nb_workers) as executor:
+        futures = [executor.submit(_safe_compute_drift, am_id) for am_id in am_ids]
+        for future in as_completed(futures):
+            drifts.append(future.result())
+            if set_progress:
+                set_progress((int(100 * len(drifts) / len(am_ids)),))
+    return sort_by_drift(drifts)
+
+
+def load_drift_report(metadata: List[AMMetadata]) -> List[AMDrift]:
+    """Last computed drifts of the given AMs, most diverging first."""
+    cache = _drift_cache()
+    entries = [cache.get(('drift', md.cid)) for md in metadata]
+    return sort_by_drift([entry[1] for entry in entries if entry])
@@ -1,26 +1,39 @@
+import multiprocessing
 import random
-from datetime import date, datetime
-from typing import Optional
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
 
+import diskcache
 from envinorma.from_legifrance.legifrance_to_am import legifrance_to_arrete_ministeriel
 from envinorma.models import ArreteMinisteriel
-from leginorma import LegifranceClient, LegifranceRequestError, LegifranceText
+from leginorma import LegifranceRequestError, LegifranceText
 
 from back_office.config import LEGIFRANCE_CLIENT_ID, LEGIFRANCE_CLIENT_SECRET
+from back_office.helpers.disk_cache import process_cache, process_singleton
+from back_office.helpers.legifrance_client import SharedLegifranceClient
 
-LEGIFRANCE_CLIENT = None
+LEGIFRANCE_CLIENT: Optional[SharedLegifranceClient] = None
+_LEGIFRANCE_CLIENT_LOCK = threading.Lock()
 NO_CONSOLIDATION_ERROR_MESSAGE = "L'expression à valider est fausse."
+_CACHE_DIRECTORY = '/tmp/legifrance-responses'
+_CACHE_SIZE_LIMIT = 2 ** 30
+_CACHE_TTL_SECONDS = 24 * 3600
+_MISSING = object()
+T = TypeVar('T')
 
 
 class NoConsolidationError(Exception):
     pass
 
 
-def get_legifrance_client() -> LegifranceClient:
+def get_legifrance_client() -> SharedLegifranceClient:
     global LEGIFRANCE_CLIENT
-    if not LEGIFRANCE_CLIENT:
-        LEGIFRANCE_CLIENT = LegifranceClient(LEGIFRANCE_CLIENT_ID, LEGIFRANCE_CLIENT_SECRET)
-    return LEGIFRANCE_CLIENT
+    with _LEGIFRANCE_CLIENT_LOCK:
+        if not LEGIFRANCE_CLIENT:
+            LEGIFRANCE_CLIENT = SharedLegifranceClient(LEGIFRANCE_CLIENT_ID, LEGIFRANCE_CLIENT_SECRET)
+        return LEGIFRANCE_CLIENT
 
 
 def _to_datetime(date_: date) -> datetime:
@@ -31,16 +44,106 @@ def _is_a_missing_consolidation_error(error: LegifranceRequestError) -> bool:
     return NO_CONSOLIDATION_ERROR_MESSAGE in str(error)
 
 
-def _fetch_legifrance_text(am_id: str, datetime_: datetime, fallback_to_non_consolidated: bool) -> LegifranceText:
+def _response_cache() -> diskcache.Cache:
+    return process_cache(_CACHE_DIRECTORY, size_limit=_CACHE_SIZE_LIMIT, eviction_policy='least-recently-used')
+
+
+def _timestamp_to_date(timestamp_ms: int) -> date:
+    return (datetime(1970, 1, 1) + timedelta(milliseconds=timestamp_ms)).date()
+
+
+def _version_interval(response: Dict[str, Any]) -> Optional[Tuple[date, date]]:
+    """[start, end) interval during which the consolidated version returned by the API is in force."""
+    start, end = response.get('dateDebutVersion'), response.get('dateFinVersion')
+    if not isinstance(start, int) or not isinstance(end, int):
+        return None
+    return _timestamp_to_date(start), _timestamp_to_date(end)
+
+
+def _known_version(am_id: str, date_: date) -> Optional[str]:
+    """Start date of the known consolidated version in force at date_, if any."""
+    intervals: Dict[str, str] = _response_cache().get(('law_decree_versions', am_id), default={})
+    for start, end in intervals.items():
+        if start <= date_.isoformat() < end:
+            return start
+    return None
+
+
+def _store_version(am_id: str, interval: Tuple[date, date], response: Dict[str, Any]) -> str:
+    cache = _response_cache()
+    start, end = interval[0].isoformat(), interval[1].isoformat()
+    cache.set(('law_decree_version', am_id, start), response, expire=_CACHE_TTL_SECONDS)
+    with cache.transact():
+        intervals = cache.get(('law_decree_versions', am_id), default={})
+        cache.set(('law_decree_versions', am_id), {**intervals, start: end}, expire=_CACHE_TTL_SECONDS)
+    return start
+
+
+def _consult_law_decree(am_id: str, datetime_: datetime) -> Tuple[Optional[Dict[str, Any]], str]:
+    """Consolidated version of the text at the given date, None if not consolidated, with its version key."""
+    version = _known_version(am_id, datetime_.date())
+    if version:
+        response = _response_cache().get(('law_decree_version', am_id, version))
+        if response is not None:
+            return response, f'law_decree:{version}'
+    key = ('law_decree', am_id, datetime_.date().isoformat())
+    response = _response_cache().get(key, default=_MISSING)
+    if response is not _MISSING:
+        return response, f'law_decree:{key[2]}'
     try:
         response = get_legifrance_client().consult_law_decree(am_id, datetime_)
     except LegifranceRequestError as exc:
         if not _is_a_missing_consolidation_error(exc):
             raise
+        response = None
+    interval = _version_interval(response) if response else None
+    if response is not None and interval is not None and interval[0] <= datetime_.date() < interval[1]:
+        return response, f'law_decree:{_store_version(am_id, interval, response)}'
+    _response_cache().set(key, response, expire=_CACHE_TTL_SECONDS)
+    return response, f'law_decree:{key[2]}'
+
+
+def _consult_jorf(am_id: str) -> Dict[str, Any]:
+    key = ('jorf', am_id)
+    response = _response_cache().get(key)
+    if response is None:
+        response = get_legifrance_client().consult_jorf(am_id)
+        _response_cache().set(key, response, expire=_CACHE_TTL_SECONDS)
+    return response
+
+
+def _fetch_legifrance_response(
+    am_id: str, datetime_: datetime, fallback_to_non_consolidated: bool
+) -> Tuple[Dict[str, Any], str]:
+    response, version = _consult_law_decree(am_id, datetime_)
+    if response is None:
         if not fallback_to_non_consolidated:
             raise NoConsolidationError
-        response = get_legifrance_client().consult_jorf(am_id)
-    return LegifranceText.from_dict(response)
+        return _consult_jorf(am_id), 'jorf'
+    return response, version
+
+
+def _conversion_executor() -> ProcessPoolExecutor:
+    # spawn, not fork: other threads of the worker may hold locks that the child would inherit
+    context = multiprocessing.get_context('spawn')
+    return process_singleton('legifrance.conversion', lambda: ProcessPoolExecutor(1, mp_context=context))
+
+
+def _in_conversion_process(function: Callable[..., T], *args: Any) -> T:
+    """Runs function in a single-threaded child process: in web workers, other threads (e.g. through
+    envinorma.utils.random_id) may draw from the global random generator at any time."""
+    return _conversion_executor().submit(function, *args).result()
+
+
+def _seeded_conversion(am_id: str, response: Dict[str, Any]) -> ArreteMinisteriel:
+    legifrance_version = LegifranceText.from_dict(response)
+    random.seed(legifrance_version.title)
+    return legifrance_to_arrete_ministeriel(legifrance_version, am_id=am_id)
+
+
+def _convert(am_id: str, response: Dict[str, Any]) -> ArreteMinisteriel:
+    """Converts in the child process: section ids are drawn from the global random generator, seeded with the title."""
+    return _in_conversion_process(_seeded_conversion, am_id, response)
 
 
 def extract_legifrance_am(
@@ -62,6 +165,10 @@ def extract_legifrance_am(
         ArreteMinisteriel: the arrete_ministeriel extracted from legifrance
     """
     datetime_ = _to_datetime(date_ or date.today())
-    legifrance_current_version = _fetch_legifrance_text(am_id, datetime_, fallback_to_non_consolidated)
-    random.seed(legifrance_current_version.title)
-    return legifrance_to_arrete_ministeriel(legifrance_current_version, am_id=am_id)
+    response, version = _fetch_legifrance_response(am_id, datetime_, fallback_to_non_consolidated)
+    key = ('am', am_id, version)
+    am = _response_cache().get(key)
+    if am is None:
+        am = _convert(am_id, response)
+        _response_cache().set(key, am, expire=_CACHE_TTL_SECONDS)
+    return am
@@ -0,0 +1,231 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import urlsplit
+
+import diskcache
+import requests
+from leginorma import LegifranceClient, LegifranceRequestError
+from requests.adapters import HTTPAdapter
+from requests_oauthlib import OAuth2Session
+
+from back_office.helpers.disk_cache import process_cache
+
+_TOKEN_URL = 'https://oauth.aife.economie.gouv.fr/api/oauth/token'
+_CACHE_DIRECTORY = '/tmp/legifrance-client'
+_TOKEN_KEY = 'piste_token'
+_RATE_LIMITER_KEY = 'piste_rate_limiter'
+_CALLS_PER_SECOND = 10.0
+_RETRIED_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_ATTEMPTS = 5
+_BASE_BACKOFF_SECONDS = 0.5
+_MAX_BACKOFF_SECONDS = 10.0
+_TIMEOUT_SECONDS = 30.0
+_SLOW_CALL_SECONDS = 5.0
+_METRICS_LOG_INTERVAL_SECONDS = 600.0
+# Not the global generator, which legifrance._convert seeds to get stable section ids.
+_RANDOM = random.Random()
+
+
+@dataclass
+class CallMetrics:
+    calls: int = 0
+    failures: int = 0
+    retries: int = 0
+    total_latency_seconds: float = 0.0
+    max_latency_seconds: float = 0.0
+
+    @property
+    def mean_latency_seconds(self) -> float:
+        return self.total_latency_seconds / self.calls if self.calls else 0.0
+
+    def summary(self) -> str:
+        return (
+            f'{self.calls} calls, {self.failures} failures, {self.retries} retries, '
+            f'mean latency {self.mean_latency_seconds:.2f}s, max latency {self.max_latency_seconds:.2f}s'
+        )
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _backoff_seconds(nb_failed_attempts: int, response: Optional[requests.Response]) -> float:
+    """Retry-After if given, else full-jitter exponential backoff, bounded by _MAX_BACKOFF_SECONDS."""
+    retry_after = _retry_after_seconds(response) if response is not None else None
+    if retry_after is not None:
+        return min(retry_after, _MAX_BACKOFF_SECONDS)
+    return _RANDOM.uniform(0, min(_BASE_BACKOFF_SECONDS * 2 ** nb_failed_attempts, _MAX_BACKOFF_SECONDS))
+
+
+class _LegifranceAdapter(HTTPAdapter):
+    """Rate limits, times and retries every request sent by the leginorma session, each attempt taking a token."""
+
+    def __init__(self, client: 'SharedLegifranceClient'):
+        super().__init__(max_retries=0)
+        self._legifrance_client = client
+
+    def _send_once(self, request: requests.PreparedRequest, *args: Any) -> requests.Response:
+        self._legifrance_client.wait_for_rate_limiter()
+        return super().send(request, *args)
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: Any = True,
+        cert: Any = None,
+        proxies: Optional[Mapping[str, str]] = None,
+    ) -> requests.Response:
+        route = urlsplit(request.url or '').path.rsplit('/', 2)[-2:]
+        route_name = '/' + '/'.join(route)
+        args = (stream, timeout or _TIMEOUT_SECONDS, verify, cert, proxies)
+        start = time.monotonic()
+        for attempt in range(_MAX_ATTEMPTS):
+            is_last_attempt = attempt == _MAX_ATTEMPTS - 1
+            try:
+                response = self._send_once(request, *args)
+            except (requests.ConnectionError, requests.Timeout):
+                if is_last_attempt:
+                    self._legifrance_client.record(route_name, time.monotonic() - start, False, attempt)
+                    raise
+                time.sleep(_backoff_seconds(attempt, None))
+                continue
+            except requests.RequestException:
+                self._legifrance_client.record(route_name, time.monotonic() - start, False, attempt)
+                raise
+            if response.status_code not in _RETRIED_STATUSES or is_last_attempt:
+                break
+            delay = _backoff_seconds(attempt, response)
+            response.close()
+            time.sleep(delay)
+        success = 200 <= response.status_code < 300
+        self._legifrance_client.record(route_name, time.monotonic() - start, success, attempt)
+        if response.status_code == 401:
+            self._legifrance_client.forget_token(request.headers.get('Authorization', ''))
+        return response
+
+
+def _fetch_token(client_id: str, client_secret: str) -> Dict[str, Any]:
+    data = {
+        'grant_type': 'client_credentials',
+        'client_id': client_id,
+        'client_secret': client_secret,
+        'scope': 'openid',
+    }
+    response = requests.post(_TOKEN_URL, data=data, timeout=_TIMEOUT_SECONDS)
+    if not 200 <= response.status_code < 300:
+        raise LegifranceRequestError(f'Error when retrieving token: {response.text}')
+    return response.json()
+
+
+class SharedLegifranceClient(LegifranceClient):
+    """leginorma client whose OAuth token and rate limiter are shared by all workers."""
+
+    def __init__(self, client_id: str, client_secret: str, calls_per_second: float = _CALLS_PER_SECOND):
+        # LegifranceClient.__init__ is not called: it would fetch a new token in each process. The consult
+        # methods of leginorma 0.0.4 only use _update_client_if_necessary and _client, set below.
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self.calls_per_second = calls_per_second
+        self._client: Optional[OAuth2Session] = None
+        self._client_pid: Optional[int] = None
+        self._client_lock = threading.Lock()
+        self._metrics: Dict[str, CallMetrics] = defaultdict(CallMetrics)
+        self._metrics_lock = threading.Lock()
+        self._last_metrics_log = time.monotonic()
+
+    @staticmethod
+    def _cache() -> diskcache.Cache:
+        return process_cache(_CACHE_DIRECTORY)
+
+    def _shared_token(self) -> Dict[str, Any]:
+        token = self._cache().get(_TOKEN_KEY)
+        if token:
+            return token
+        with diskcache.Lock(self._cache(), f'{_TOKEN_KEY}_lock', expire=_TIMEOUT_SECONDS):
+            token = self._cache().get(_TOKEN_KEY)
+            if not token:
+                token = _fetch_token(self._client_id, self._client_secret)
+                expire = max(int(token.get('expires_in', 3600)) - 60, 1)
+                self._cache().set(_TOKEN_KEY, token, expire=expire)
+            return token
+
+    def forget_token(self, authorization: str) -> None:
+        with self._cache().transact():
+            token = self._cache().get(_TOKEN_KEY)
+            if token and authorization == f'Bearer {token.get("access_token")}':
+                self._cache().delete(_TOKEN_KEY)
+
+    def _update_client_if_necessary(self) -> None:
+        token = self._shared_token()
+        with self._client_lock:
+            if self._client is None or self._client_pid != os.getpid() or self._client.token != token:
+                client = OAuth2Session(self._client_id, token=token)
+                client.mount('https://', _LegifranceAdapter(self))
+                self._client, self._client_pid = client, os.getpid()
+
+    def _take_rate_limiter_token(self) -> float:
+        """Returns 0 if a token was taken from the bucket, else the time to wait."""
+        with self._cache().transact():
+            now = time.time()
+            tokens, last_update = self._cache().get(_RATE_LIMITER_KEY, default=(self.calls_per_second, now))
+            tokens = min(self.calls_per_second, tokens + (now - last_update) * self.calls_per_second)
+            if tokens >= 1:
+                self._cache().set(_RATE_LIMITER_KEY, (tokens - 1, now))
+                return 0.0
+            self._cache().set(_RATE_LIMITER_KEY, (tokens, now))
+            return (1 - tokens) / self.calls_per_second
+
+    def wait_for_rate_limiter(self) -> None:
+        delay = self._take_rate_limiter_token()
+        while delay > 0:
+            time.sleep(delay)
+            delay = self._take_rate_limiter_token()
+
+    def record(self, route: str, latency_seconds: float, success: bool, nb_retries: int) -> None:
+        with self._metrics_lock:
+            metrics = self._metrics[route]
+            metrics.calls += 1
+            metrics.failures += 0 if success else 1
+            metrics.retries += nb_retries
+            metrics.total_latency_seconds += latency_seconds
+            metrics.max_latency_seconds = max(metrics.max_latency_seconds, latency_seconds)
+            now = time.monotonic()
+            log_metrics = now - self._last_metrics_log >= _METRICS_LOG_INTERVAL_SECONDS
+            if log_metrics:
+                self._last_metrics_log = now
+        if latency_seconds > _SLOW_CALL_SECONDS:
+            logging.warning(f'Légifrance call {route} took {latency_seconds:.1f}s.')
+        if log_metrics:
+            self.log_metrics()
+
+    def metrics(self) -> Dict[str, CallMetrics]:
+        """Counters of the current process by route, logged every _METRICS_LOG_INTERVAL_SECONDS."""
+        with self._metrics_lock:
+            return {route: replace(metrics) for route, metrics in self._metrics.items()}
+
+    def log_metrics(self) -> None:
+        for route, metrics in sorted(self.metrics().items()):
+            logging.info(f'Légifrance route {route} in process {os.getpid()}: {metrics.summary()}.')
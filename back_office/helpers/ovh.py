@@ -1,15 +1,18 @@
+import os
 from functools import lru_cache
 from typing import Any, Dict, Iterable, List, Literal
 
-from swiftclient.service import SwiftService, SwiftUploadObject
+from swiftclient.service import SwiftCopyObject, SwiftService, SwiftUploadObject
 
 BucketName = Literal['ap', 'am']
+_SEGMENT_SIZE = 32 * 1024 * 1024
+_SEGMENT_THREADS = 8
 
 
-def _check_upload(results: List[Dict]) -> None:
+def _check_results(results: List[Dict], operation: str) -> None:
     for result in results:
         if not result.get('success'):
-            raise ValueError(f'Failed Uploading document. Response:\n{result}')
+            raise ValueError(f'Failed {operation} document. Response:\n{result}')
 
 
 def _check_auth(service: SwiftService) -> None:
@@ -25,7 +28,7 @@ def _check_auth(service: SwiftService) -> None:
 
 @lru_cache
 def _get_swift_service() -> SwiftService:
-    service = SwiftService()
+    service = SwiftService({'segment_threads': _SEGMENT_THREADS})
     _check_auth(service)
     return service
 
@@ -42,10 +45,26 @@ class OVHClient:
         return results[0]['success']
 
     @staticmethod
-    def upload_document(bucket_name: BucketName, source: str, destination: str) -> None:
+    def upload_document(
+        bucket_name: BucketName, source: str, destination: str, segment_size: int = _SEGMENT_SIZE
+    ) -> None:
+        """Files larger than segment_size are uploaded as a static large object, in parallel segments."""
         remote = SwiftUploadObject(source, object_name=destination)
-        result = list(_get_swift_service().upload(bucket_name, [remote]))
-        _check_upload(result)
+        options = {'segment_size': segment_size, 'use_slo': True} if os.path.getsize(source) > segment_size else {}
+        result = list(_get_swift_service().upload(bucket_name, [remote], options))
+        _check_results(result, 'uploading')
+
+    @staticmethod
+    def copy_document(bucket_name: BucketName, source: str, destination: str) -> None:
+        """Server-side copy: the content is not sent again."""
+        copy = SwiftCopyObject(source, {'destination': f'/{bucket_name}/{destination}'})
+        result = list(_get_swift_service().copy(bucket_name, [copy]))
+        _check_results(result, 'copying')
+
+    @staticmethod
+    def download_document(bucket_name: BucketName, source: str, destination: str) -> None:
+        result = list(_get_swift_service().download(bucket_name, [source], {'out_file': destination}))
+        _check_results(result, 'downloading')
 
     @staticmethod
     def list_bucket_objects(bucket_name: BucketName) -> Iterable[Dict[str, Any]]:
@@ -0,0 +1,25 @@
+import json
+from typing import Any, Dict, Union
+
+AM_TABLE = 'am_structure'
+PARAMETRIZATION_TABLE = 'parametrization'
+AM_COMPACT_TABLE = 'am_structure_compact'
+AM_COMPACT_DICTIONARY_TABLE = 'am_structure_compact_dictionary'
+AM_OUTLINE_TABLE = 'am_structure_outline'
+
+
+def json_column(value: Union[str, bytes, Dict[str, Any]]) -> Dict[str, Any]:
+    """json columns are decoded by psycopg2, text columns are not."""
+    if isinstance(value, (str, bytes)):
+        return json.loads(value)
+    return value
+
+
+def select_am_data_query(compact: bool, condition: str) -> str:
+    """Query selecting (am_id, compact_data, json_data) rows."""
+    if not compact:
+        return f'SELECT am_id, NULL, data FROM {AM_TABLE} WHERE {condition}'
+    return (
+        f'SELECT am_id, compact.data, CASE WHEN compact.data IS NULL THEN {AM_TABLE}.data END '
+        f'FROM {AM_TABLE} LEFT JOIN {AM_COMPACT_TABLE} compact USING (am_id) WHERE {condition}'
+    )
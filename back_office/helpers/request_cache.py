@@ -0,0 +1,151 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from envinorma.models import AMMetadata, ArreteMinisteriel
+from envinorma.parametrization import ParameterElement, Parametrization
+from flask import Flask, g, has_request_context
+
+from back_office.helpers.am_outline import AMOutline
+from back_office.helpers.am_patch import AMPatch
+from back_office.helpers.disk_cache import process_singleton
+
+_G_KEY = 'data_fetcher_identity_map'
+_Key = Tuple[str, str]
+_PREFETCH_WORKERS = 4
+_KIND_TO_LOADER = {
+    'am': 'load_am',
+    'metadata': 'load_am_metadata',
+    'outline': 'load_am_outline',
+    'parametrization': 'load_or_init_parametrization',
+}
+
+
+@dataclass
+class _IdentityMap:
+    entries: Dict[_Key, Any] = field(default_factory=dict)
+    saved_round_trips: int = 0
+
+
+def _current_identity_map() -> Optional[_IdentityMap]:
+    if not has_request_context():
+        return None
+    if _G_KEY not in g:
+        setattr(g, _G_KEY, _IdentityMap())
+    return getattr(g, _G_KEY)
+
+
+def saved_round_trips() -> int:
+    identity_map = g.get(_G_KEY) if has_request_context() else None
+    return identity_map.saved_round_trips if identity_map else 0
+
+
+def _prefetch_executor() -> ThreadPoolExecutor:
+    return process_singleton(
+        'request_cache.executor', lambda: ThreadPoolExecutor(_PREFETCH_WORKERS, thread_name_prefix='prefetch')
+    )
+
+
+class RequestScopedDataFetcher:
+    """Loads each AM, AM metadata and parametrization at most once per flask request."""
+
+    def __init__(self, fetcher: Any):
+        self._fetcher = fetcher
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._fetcher, name)
+
+    def _load(self, kind: str, am_id: str, loader: Callable[[str], Any]) -> Any:
+        identity_map = _current_identity_map()
+        if identity_map is None:
+            return loader(am_id)
+        key = (kind, am_id)
+        if key in identity_map.entries:
+            identity_map.saved_round_trips += 1
+            return identity_map.entries[key]
+        result = loader(am_id)
+        identity_map.entries[key] = result
+        return result
+
+    @staticmethod
+    def _store(kind: str, am_id: str, value: Any) -> None:
+        identity_map = _current_identity_map()
+        if identity_map is not None:
+            identity_map.entries[(kind, am_id)] = value
+
+    @staticmethod
+    def _forget(kind: str, am_id: str) -> None:
+        identity_map = _current_identity_map()
+        if identity_map is not None:
+            identity_map.entries.pop((kind, am_id), None)
+
+    def prefetch(self, keys: List[_Key]) -> None:
+        """Loads the (kind, am_id) entries concurrently, failed loads being left out of the map."""
+        identity_map = _current_identity_map()
+        if identity_map is None:
+            return
+        missing = [key for key in keys if key not in identity_map.entries]
+        if len(missing) < 2:
+            return
+        executor = _prefetch_executor()
+        futures = {key: executor.submit(getattr(self._fetcher, _KIND_TO_LOADER[key[0]]), key[1]) for key in missing}
+        for key, future in futures.items():
+            try:
+                identity_map.entries[key] = future.result()
+            except Exception:
+                logging.exception(f'Could not prefetch {key}.')
+
+    def load_am(self, am_id: str) -> Optional[ArreteMinisteriel]:
+        return self._load('am', am_id, self._fetcher.load_am)
+
+    def load_am_metadata(self, am_id: str) -> Optional[AMMetadata]:
+        return self._load('metadata', am_id, self._fetcher.load_am_metadata)
+
+    def load_am_outline(self, am_id: str) -> Optional[AMOutline]:
+        return self._load('outline', am_id, self._fetcher.load_am_outline)
+
+    def load_or_init_parametrization(self, am_id: str) -> Parametrization:
+        return self._load('parametrization', am_id, self._fetcher.load_or_init_parametrization)
+
+    def load_all_am_metadata(self, with_deleted_ams: bool = False) -> Dict[str, AMMetadata]:
+        result = self._fetcher.load_all_am_metadata(with_deleted_ams=with_deleted_ams)
+        for am_id, metadata in result.items():
+            self._store('metadata', am_id, metadata)
+        return result
+
+    def upsert_am(self, am_id: str, am: ArreteMinisteriel) -> None:
+        self._fetcher.upsert_am(am_id, am)
+        self._store('am', am_id, am)
+        self._forget('outline', am_id)
+
+    def patch_am(self, am_id: str, patch: AMPatch) -> None:
+        self._forget('am', am_id)
+        self._forget('outline', am_id)
+        self._fetcher.patch_am(am_id, patch)
+
+    def upsert_am_metadata(self, am_metadata: AMMetadata) -> None:
+        self._fetcher.upsert_am_metadata(am_metadata)
+        self._store('metadata', am_metadata.cid, am_metadata)
+
+    def upsert_parameter(self, am_id: str, parameter: ParameterElement, parameter_id: Optional[str]) -> None:
+        self._fetcher.upsert_parameter(am_id, parameter, parameter_id)
+        self._forget('parametrization', am_id)
+
+    def upsert_parameters(
+        self, am_id: str, parameters: List[ParameterElement], parameter_id: Optional[str] = None
+    ) -> None:
+        self._fetcher.upsert_parameters(am_id, parameters, parameter_id)
+        self._forget('parametrization', am_id)
+
+    def remove_parameter(self, am_id: str, parameter_type: Type[ParameterElement], parameter_id: str) -> None:
+        self._fetcher.remove_parameter(am_id, parameter_type, parameter_id)
+        self._forget('parametrization', am_id)
+
+
+def log_saved_round_trips(server: Flask) -> None:
+    @server.teardown_request
+    def _log(_: Optional[BaseException]) -> None:
+        nb_saved = saved_round_trips()
+        if nb_saved:
+            logging.info(f'DATA_FETCHER identity map saved {nb_saved} database round-trip(s).')
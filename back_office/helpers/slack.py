@@ -1,9 +1,33 @@
 import logging
+import os
+import threading
+import time
 from enum import Enum
+from itertools import groupby, islice
+from typing import List, Tuple
 
+import diskcache
 import requests
+from flask import Flask
 
-from back_office.config import ENVIRONMENT_TYPE, SLACK_ENRICHMENT_NOTIFICATION_URL, EnvironmentType
+from back_office.config import (
+    ENVIRONMENT_TYPE,
+    SLACK_ENRICHMENT_NOTIFICATION_URL,
+    SLACK_OUTBOX_DIRECTORY,
+    EnvironmentType,
+)
+from back_office.helpers.disk_cache import process_cache, process_singleton
+
+_DELIVERY_LOCK_KEY = 'slack_delivery_lock'
+_DELIVERY_LOCK_EXPIRE_SECONDS = 120.0
+_BATCH_SIZE = 20
+_POLL_SECONDS = 5.0
+_MAX_BACKOFF_SECONDS = 300.0
+_MAX_AGE_SECONDS = 24 * 3600
+_TIMEOUT_SECONDS = 10.0
+_WAKE_UP = threading.Event()
+
+_Notification = Tuple[str, str, float]  # channel, message, enqueued at
 
 
 class SlackChannel(Enum):
@@ -15,13 +39,109 @@ class SlackChannel(Enum):
         raise NotImplementedError(f'Missing slack channel url {self}.')
 
 
+def _outbox() -> diskcache.Deque:
+    return diskcache.Deque.fromcache(process_cache(SLACK_OUTBOX_DIRECTORY))
+
+
+def _delivery_lock() -> diskcache.Lock:
+    cache = process_cache(os.path.join(SLACK_OUTBOX_DIRECTORY, 'delivery-lock'))
+    return diskcache.Lock(cache, _DELIVERY_LOCK_KEY, expire=_DELIVERY_LOCK_EXPIRE_SECONDS)
+
+
+def coalesce(messages: List[str]) -> str:
+    """Single message made of the given ones, consecutive duplicates being merged."""
+    lines = []
+    for message, duplicates in groupby(messages):
+        nb_duplicates = len(list(duplicates))
+        lines.append(message if nb_duplicates == 1 else f'{message} (x{nb_duplicates})')
+    return '\n'.join(lines)
+
+
+def _post(channel: SlackChannel, text: str) -> bool:
+    try:
+        answer = requests.post(channel.slack_url(), json={'text': text}, timeout=_TIMEOUT_SECONDS)
+    except requests.RequestException:
+        logging.exception('Could not reach slack.')
+        return False
+    if not (200 <= answer.status_code < 300):
+        logging.error(f'Slack answered with status code {answer.status_code}: {answer.content.decode()}')
+        return False
+    return True
+
+
+def _peek_batch(outbox: diskcache.Deque) -> List[_Notification]:
+    return list(islice(outbox, _BATCH_SIZE))
+
+
+def _remove_batch(outbox: diskcache.Deque, batch: List[_Notification], failed: List[_Notification]) -> None:
+    with outbox.transact():
+        for _ in batch:
+            outbox.popleft()
+        outbox.extendleft(reversed(failed))
+
+
+def _send_batch(batch: List[_Notification]) -> List[_Notification]:
+    failed: List[_Notification] = []
+    for channel, notifications in groupby(sorted(batch, key=lambda el: (el[0], el[2])), key=lambda el: el[0]):
+        channel_notifications = list(notifications)
+        if not _post(SlackChannel(channel), coalesce([message for _, message, _ in channel_notifications])):
+            failed.extend(channel_notifications)
+    return failed
+
+
+def _deliver_pending() -> bool:
+    """Sends every pending notification, returns False if some could not be sent."""
+    outbox = _outbox()
+    while True:
+        with _delivery_lock():
+            batch = _peek_batch(outbox)
+            if not batch:
+                return True
+            failed = _send_batch(batch)
+            expired = [el for el in failed if time.time() - el[2] >= _MAX_AGE_SECONDS]
+            if expired:
+                logging.error(f'Dropping {len(expired)} slack notification(s) older than a day.')
+                failed = [el for el in failed if el not in expired]
+            _remove_batch(outbox, batch, failed)
+        if failed:
+            return False
+
+
+def _run_sender() -> None:
+    backoff_seconds = _POLL_SECONDS
+    while True:
+        _WAKE_UP.wait(backoff_seconds)
+        _WAKE_UP.clear()
+        try:
+            success = _deliver_pending()
+        except Exception:
+            logging.exception('Slack notifications delivery failed.')
+            success = False
+        backoff_seconds = _POLL_SECONDS if success else min(2 * backoff_seconds, _MAX_BACKOFF_SECONDS)
+
+
+def _start_sender() -> threading.Thread:
+    sender = threading.Thread(target=_run_sender, name='slack-sender', daemon=True)
+    sender.start()
+    return sender
+
+
+def _ensure_sender() -> None:
+    process_singleton('slack.sender', _start_sender)
+
+
+def start_slack_sender(server: Flask) -> None:
+    @server.before_first_request
+    def _start() -> None:
+        _ensure_sender()
+
+
 def send_slack_notification(
     message: str, channel: SlackChannel = SlackChannel.ENRICHMENT_NOTIFICATIONS, prod_only: bool = True
 ) -> None:
+    """Queues the notification, which is sent by a background thread."""
     if ENVIRONMENT_TYPE != EnvironmentType.PROD and prod_only:
         return
-    url = channel.slack_url()
-    answer = requests.post(url, json={'text': message})
-    if not (200 <= answer.status_code < 300):
-        logging.error('Error with status code', answer.status_code)
-        logging.error(answer.content.decode())
+    _outbox().append((channel.value, message, time.time()))
+    _ensure_sender()
+    _WAKE_UP.set()
@@ -1,68 +1,210 @@
+import hashlib
 import json
 import os
-import shutil
 import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Callable, Dict, List, Tuple, Union
+from typing import IO, Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
 
+from envinorma.models import AMState
 from envinorma.models.arrete_ministeriel import ArreteMinisteriel
 from envinorma.models.validate_am import check_am
 
+from back_office.config import EXPORT_NB_WORKERS
+from back_office.helpers.bulk_loading import AMBundle, iter_ams, select_ams
 from back_office.helpers.ovh import OVHClient
-from back_office.utils import DATA_FETCHER
+
+T = TypeVar('T')
+U = TypeVar('U')
+_LATEST_MANIFEST = 'ams/manifests/latest.json'
 
 
 def _upload_to_ovh(local_filename: str, remote_filename: str) -> None:
     OVHClient.upload_document('am', local_filename, remote_filename)
 
 
-def _dump(object_: Union[Dict, List], filename: str) -> None:
-    with open(filename, 'w') as file_:
-        json.dump(object_, file_, ensure_ascii=False, indent=2, sort_keys=True)
+class AMExportError(Exception):
+    pass
 
 
-def _dump_am(am: Dict[str, Any], folder: str) -> None:
-    filename = os.path.join(folder, am['id'] + '.json')
-    _dump(am, filename)
+@dataclass
+class _ExportedAM:
+    am_id: str
+    content: Optional[str]
+    error: Optional[str]
+    content_hash: Optional[str] = None
 
 
-def _load_ams() -> List[ArreteMinisteriel]:
-    return DATA_FETCHER.build_enriched_ams()
+@dataclass
+class Manifest:
+    """Content hash of each AM of an export, used to build the delta archive of the next export."""
 
+    export: Optional[str]
+    hashes: Dict[str, str]
 
-def _dump_ams(ams: List[ArreteMinisteriel], folder: str, set_progress: Callable[[Tuple[int]], None]) -> None:
-    for index, am in enumerate(ams):
-        _dump_am(am.to_dict(), folder)
-        if index % 10 == 0:
-            set_progress((int((index + 1) / len(ams) * 40) + 50,))
+    def to_dict(self) -> Dict[str, Any]:
+        return {'export': self.export, 'hashes': self.hashes}
 
+    @classmethod
+    def from_dict(cls, dict_: Dict[str, Any]) -> 'Manifest':
+        return cls(dict_['export'], dict_['hashes'])
 
-def _check_ams(ams: List[ArreteMinisteriel]) -> None:
-    for am in ams:
-        check_am(am)
+    def changed_am_ids(self, new_manifest: 'Manifest') -> List[str]:
+        """Ids of AMs added or modified in new_manifest."""
+        return sorted(am_id for am_id, hash_ in new_manifest.hashes.items() if self.hashes.get(am_id) != hash_)
 
+    def removed_am_ids(self, new_manifest: 'Manifest') -> List[str]:
+        return sorted(set(self.hashes) - set(new_manifest.hashes))
 
-def _remote_filename() -> str:
-    return f'ams/{datetime.now().isoformat()}.zip'
 
+@dataclass
+class AMExport:
+    filename: str
+    delta_filename: str
+    nb_changed_ams: int
+    nb_removed_ams: int
 
-def _zip_and_upload(folder: str) -> str:
-    filename = _remote_filename()
-    with tempfile.NamedTemporaryFile('w', prefix='am-repo') as file_:
-        shutil.make_archive(file_.name, 'zip', folder)
-        _upload_to_ovh(f'{file_.name}.zip', filename)
-        _upload_to_ovh(f'{file_.name}.zip', 'ams/latest.zip')
-    return filename
 
+def _serialize(am: ArreteMinisteriel) -> str:
+    return json.dumps(am.to_dict(), ensure_ascii=False, indent=2, sort_keys=True)
 
-def upload_ams(set_progress: Callable[[Tuple[int]], None]) -> str:
-    print('Uploading AMs...')
-    ams = _load_ams()
-    set_progress((33,))
-    _check_ams(ams)
-    set_progress((50,))
+
+def _check_and_serialize(bundle: AMBundle) -> _ExportedAM:
+    """Enriches, checks and serializes an AM, any failure being reported for this AM only."""
+    am_id = bundle.metadata.cid
+    try:
+        am = bundle.enriched_am()
+        check_am(am)
+        content = _serialize(am)
+        return _ExportedAM(am_id, content, None, hashlib.sha256(content.encode()).hexdigest())
+    except Exception as exc:
+        return _ExportedAM(am_id, None, f'{type(exc).__name__}: {exc}')
+
+
+def _map_in_order(function: Callable[[T], U], values: Iterable[T], executor: Executor, max_pending: int) -> Iterator[U]:
+    """Yields function(value) in the order of values, with at most max_pending values in flight."""
+    pending: Deque['Future[U]'] = deque()
+    try:
+        for value in values:
+            pending.append(executor.submit(function, value))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:  # the consumer stopped early or a task failed: tasks not yet started are dropped
+        for future in pending:
+            future.cancel()
+
+
+@contextmanager
+def _process_pool() -> Iterator[Executor]:
+    with ProcessPoolExecutor(EXPORT_NB_WORKERS) as executor:
+        yield executor
+
+
+def _export_error(errors: List[_ExportedAM]) -> AMExportError:
+    lines = [f'{exported.am_id} : {exported.error}' for exported in errors]
+    return AMExportError(f'{len(errors)} AM(s) invalide(s), export annulé :\n' + '\n'.join(lines))
+
+
+def _write_ams(
+    archive: zipfile.ZipFile,
+    delta_archive: zipfile.ZipFile,
+    previous_manifest: Manifest,
+    set_progress: Callable[[Tuple[int]], None],
+) -> Manifest:
+    """Enriches, checks and serializes AMs in a process pool, in the order of iter_ams."""
+    nb_ams = len(select_ams(AMState.VIGUEUR))
+    errors: List[_ExportedAM] = []
+    hashes: Dict[str, str] = {}
+    progress = 0
+    with _process_pool() as executor:
+        exported_ams = _map_in_order(_check_and_serialize, iter_ams(AMState.VIGUEUR), executor, EXPORT_NB_WORKERS * 4)
+        for index, exported in enumerate(exported_ams):
+            if exported.content is None or exported.content_hash is None:
+                errors.append(exported)
+            elif not errors:
+                filename = f'{exported.am_id}.json'
+                archive.writestr(filename, exported.content)
+                if previous_manifest.hashes.get(exported.am_id) != exported.content_hash:
+                    delta_archive.writestr(filename, exported.content)
+                hashes[exported.am_id] = exported.content_hash
+            new_progress = int((index + 1) / max(nb_ams, 1) * 90) + 5
+            if new_progress != progress:
+                progress = new_progress
+                set_progress((progress,))
+    if errors:
+        raise _export_error(errors)
+    return Manifest(None, hashes)
+
+
+def _load_previous_manifest() -> Manifest:
+    if not OVHClient.file_exists(_LATEST_MANIFEST, 'am'):
+        return Manifest(None, {})
     with tempfile.TemporaryDirectory() as tmp_dir:
-        _dump_ams(ams, tmp_dir, set_progress)
-        filename = _zip_and_upload(tmp_dir)
-        set_progress((100,))
-    return filename
+        filename = os.path.join(tmp_dir, 'manifest.json')
+        OVHClient.download_document('am', _LATEST_MANIFEST, filename)
+        with open(filename) as file_:
+            return Manifest.from_dict(json.load(file_))
+
+
+def _delta_description(previous_manifest: Manifest, manifest: Manifest) -> Dict[str, Any]:
+    return {
+        'base': previous_manifest.export,
+        'export': manifest.export,
+        'changed': previous_manifest.changed_am_ids(manifest),
+        'removed': previous_manifest.removed_am_ids(manifest),
+    }
+
+
+def _remote_filename(prefix: str, extension: str, now: datetime) -> str:
+    return f'{prefix}{now.isoformat()}.{extension}'
+
+
+def _upload_manifest(manifest: Manifest, now: datetime) -> None:
+    with tempfile.NamedTemporaryFile('w', prefix='am-manifest', suffix='.json') as file_:
+        json.dump(manifest.to_dict(), file_, sort_keys=True)
+        file_.flush()
+        manifest_filename = _remote_filename('ams/manifests/', 'json', now)
+        _upload_to_ovh(file_.name, manifest_filename)
+        OVHClient.copy_document('am', manifest_filename, _LATEST_MANIFEST)
+
+
+def _write_archives(
+    file_: IO[bytes],
+    delta_file: IO[bytes],
+    previous_manifest: Manifest,
+    filename: str,
+    set_progress: Callable[[Tuple[int]], None],
+) -> Tuple[Manifest, Dict[str, Any]]:
+    with zipfile.ZipFile(file_, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        with zipfile.ZipFile(delta_file, 'w', compression=zipfile.ZIP_DEFLATED) as delta_archive:
+            manifest = _write_ams(archive, delta_archive, previous_manifest, set_progress)
+            manifest.export = filename
+            delta = _delta_description(previous_manifest, manifest)
+            delta_archive.writestr('delta.json', json.dumps(delta, indent=2))
+    file_.flush()
+    delta_file.flush()
+    return manifest, delta
+
+
+def upload_ams(set_progress: Callable[[Tuple[int]], None]) -> AMExport:
+    """Uploads the full archive, the delta archive and, last, the manifest of the export."""
+    print('Uploading AMs...')
+    now = datetime.now()
+    filename = _remote_filename('ams/', 'zip', now)
+    delta_filename = _remote_filename('ams/deltas/', 'zip', now)
+    previous_manifest = _load_previous_manifest()
+    with tempfile.NamedTemporaryFile(prefix='am-repo', suffix='.zip') as file_:
+        with tempfile.NamedTemporaryFile(prefix='am-repo-delta', suffix='.zip') as delta_file:
+            manifest, delta = _write_archives(file_, delta_file, previous_manifest, filename, set_progress)
+            _upload_to_ovh(file_.name, filename)
+            _upload_to_ovh(delta_file.name, delta_filename)
+    OVHClient.copy_document('am', filename, 'ams/latest.zip')
+    _upload_manifest(manifest, now)
+    set_progress((100,))
+    return AMExport(filename, delta_filename, len(delta['changed']), len(delta['removed']))
@@ -0,0 +1,117 @@
+"""Nightly warm-up of the Légifrance and AIDA caches, followed by a refresh of the drift report.
+
+    python -m back_office.helpers.warm_up
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List
+
+from envinorma.models import AMMetadata, AMState
+from flask import Flask
+
+from back_office.helpers.aida import extract_aida_am
+from back_office.helpers.disk_cache import process_cache, process_singleton
+from back_office.helpers.drift import refresh_drift_report
+from back_office.helpers.legifrance import extract_legifrance_am
+from back_office.utils import DATA_FETCHER
+
+_WARM_UP_HOUR = 3
+_NB_WORKERS = 4
+_LOCK_DIRECTORY = '/tmp/warm-up'
+_LAST_RUN_KEY = 'last_warm_up'
+
+
+@dataclass
+class WarmUpReport:
+    nb_ams: int = 0
+    legifrance_failures: List[str] = field(default_factory=list)
+    aida_failures: List[str] = field(default_factory=list)
+    duration_seconds: float = 0.0
+
+
+def _in_force_ams() -> List[AMMetadata]:
+    return [md for md in DATA_FETCHER.load_all_am_metadata().values() if md.state == AMState.VIGUEUR]
+
+
+def _warm_up_legifrance(metadata: AMMetadata) -> bool:
+    try:
+        extract_legifrance_am(metadata.cid, fallback_to_non_consolidated=True)
+    except Exception:
+        logging.exception(f'Légifrance warm-up failed for AM {metadata.cid}.')
+        return False
+    return True
+
+
+def _warm_up_aida(metadata: AMMetadata) -> bool:
+    if not metadata.aida_page:
+        return True
+    try:
+        return extract_aida_am(metadata.aida_page, am_id=metadata.cid) is not None
+    except Exception:
+        logging.exception(f'AIDA warm-up failed for AM {metadata.cid}.')
+        return False
+
+
+def warm_up_sources(nb_workers: int = _NB_WORKERS) -> WarmUpReport:
+    """Fetches and converts the current versions of every in-force AM, logging failures."""
+    start = time.perf_counter()
+    ams = _in_force_ams()
+    report = WarmUpReport(nb_ams=len(ams))
+    with ThreadPoolExecutor(nb_workers) as executor:
+        legifrance_results = list(executor.map(_warm_up_legifrance, ams))
+        aida_results = list(executor.map(_warm_up_aida, ams))
+    report.legifrance_failures = [md.cid for md, success in zip(ams, legifrance_results) if not success]
+    report.aida_failures = [md.cid for md, success in zip(ams, aida_results) if not success]
+    report.duration_seconds = time.perf_counter() - start
+    return report
+
+
+def seconds_until_next_run(now: datetime, hour: int = _WARM_UP_HOUR) -> float:
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+def _claim_run(day: str) -> bool:
+    """True for the first worker of the machine claiming the warm-up of the day."""
+    return process_cache(_LOCK_DIRECTORY).add(_LAST_RUN_KEY, day, expire=20 * 3600)
+
+
+def _run_nightly() -> None:
+    while True:
+        time.sleep(seconds_until_next_run(datetime.now()))
+        if not _claim_run(datetime.now().date().isoformat()):
+            continue
+        try:
+            report = warm_up_sources()
+            logging.info(
+                f'Warmed up sources of {report.nb_ams} AMs in {report.duration_seconds:.0f}s '
+                f'({len(report.legifrance_failures)} Légifrance and {len(report.aida_failures)} AIDA failures).'
+            )
+            refresh_drift_report()
+        except Exception:
+            logging.exception('Sources warm-up failed.')
+
+
+def _start_thread() -> threading.Thread:
+    thread = threading.Thread(target=_run_nightly, name='sources-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+def schedule_nightly_warm_up(server: Flask) -> None:
+    """Starts the warm-up thread in each worker, a single worker per machine running it."""
+
+    @server.before_first_request
+    def _start() -> None:
+        process_singleton('warm_up.thread', _start_thread)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(warm_up_sources())
@@ -0,0 +1,182 @@
+"""Creates and fills the compact AM storage and the AM outlines, or benchmarks it against json.
+
+    python -m back_office.migrate_am_storage migrate [--train-dictionary]
+    python -m back_office.migrate_am_storage benchmark
+"""
+import argparse
+import json
+import time
+from copy import deepcopy
+from typing import Any, Dict, Iterator, List, Tuple
+
+from envinorma.models import ArreteMinisteriel
+from psycopg2.extras import execute_values
+from tqdm import tqdm
+
+from back_office.config import PSQL_DSN, AMStorageFormat
+from back_office.helpers.am_encoding import dictionary_id, train_dictionary
+from back_office.helpers.am_outline import outline_from_dict
+from back_office.helpers.data_fetcher import BackOfficeDataFetcher
+from back_office.helpers.psql_tables import (
+    AM_COMPACT_DICTIONARY_TABLE,
+    AM_COMPACT_TABLE,
+    AM_OUTLINE_TABLE,
+    AM_TABLE,
+)
+
+_BATCH_SIZE = 50
+_SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS {AM_COMPACT_DICTIONARY_TABLE} (
+    dict_id BIGINT PRIMARY KEY,
+    data BYTEA NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS {AM_COMPACT_TABLE} (am_id TEXT PRIMARY KEY, data BYTEA NOT NULL);
+CREATE TABLE IF NOT EXISTS {AM_OUTLINE_TABLE} (am_id TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE OR REPLACE FUNCTION {AM_COMPACT_TABLE}_invalidate() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM {AM_COMPACT_TABLE} WHERE am_id = OLD.am_id;
+    DELETE FROM {AM_OUTLINE_TABLE} WHERE am_id = OLD.am_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS {AM_COMPACT_TABLE}_invalidate ON {AM_TABLE};
+CREATE TRIGGER {AM_COMPACT_TABLE}_invalidate AFTER UPDATE OR DELETE ON {AM_TABLE}
+    FOR EACH ROW EXECUTE PROCEDURE {AM_COMPACT_TABLE}_invalidate();
+'''
+
+
+def _fetcher() -> BackOfficeDataFetcher:
+    fetcher = BackOfficeDataFetcher(PSQL_DSN)
+    fetcher.storage_format = AMStorageFormat.COMPACT
+    return fetcher
+
+
+def _iter_json_ams(fetcher: BackOfficeDataFetcher, name: str) -> Iterator[Tuple[str, str]]:
+    """Yields (am_id, json text) for every AM. Casting to text gives the same result for json and text columns."""
+    with fetcher.psql_conn.cursor(name=name) as cursor:
+        cursor.itersize = _BATCH_SIZE
+        cursor.execute(f'SELECT am_id, data::text FROM {AM_TABLE} ORDER BY am_id;')
+        yield from cursor
+
+
+def _sample_am_dicts(fetcher: BackOfficeDataFetcher, sample_size: int) -> List[Dict[str, Any]]:
+    with fetcher.psql_conn.cursor() as cursor:
+        cursor.execute(f'SELECT data::text FROM {AM_TABLE} ORDER BY random() LIMIT %s;', (sample_size,))
+        rows = cursor.fetchall()
+    fetcher.psql_conn.rollback()
+    return [json.loads(row[0]) for row in rows]
+
+
+def _add_dictionary(fetcher: BackOfficeDataFetcher, sample_size: int) -> None:
+    dictionary = train_dictionary(_sample_am_dicts(fetcher, sample_size))
+    with fetcher.psql_conn.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {AM_COMPACT_DICTIONARY_TABLE}(dict_id, data) VALUES(%s, %s) ON CONFLICT DO NOTHING;',
+            (dictionary_id(dictionary), dictionary),
+        )
+    fetcher.psql_conn.commit()
+    print(f'Trained a {len(dictionary)} bytes dictionary on {sample_size} AMs.')
+
+
+def _has_dictionary(fetcher: BackOfficeDataFetcher) -> bool:
+    with fetcher.psql_conn.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {AM_COMPACT_DICTIONARY_TABLE};')
+        count = cursor.fetchone()[0]
+    fetcher.psql_conn.rollback()
+    return count > 0
+
+
+def _upsert_rows(fetcher: BackOfficeDataFetcher, table: str, rows: List[Tuple[str, Any]]) -> None:
+    if not rows:
+        return
+    query = f'INSERT INTO {table}(am_id, data) VALUES %s ON CONFLICT (am_id) DO UPDATE SET data = EXCLUDED.data;'
+    with fetcher.psql_conn.cursor() as cursor:
+        execute_values(cursor, query, rows)
+
+
+def _lock_json_ams_batch(fetcher: BackOfficeDataFetcher, after_am_id: str) -> List[Tuple[str, str]]:
+    """Next batch of (am_id, json text), locked until the end of the transaction."""
+    query = f'SELECT am_id, data::text FROM {AM_TABLE} WHERE am_id > %s ORDER BY am_id LIMIT %s FOR UPDATE;'
+    with fetcher.psql_conn.cursor() as cursor:
+        cursor.execute(query, (after_am_id, _BATCH_SIZE))
+        return cursor.fetchall()
+
+
+def migrate(train_new_dictionary: bool, sample_size: int) -> None:
+    """Creates the compact storage tables and trigger, then (re)encodes every AM and its outline."""
+    fetcher = _fetcher()
+    with fetcher.psql_conn.cursor() as cursor:
+        cursor.execute(_SCHEMA)
+    fetcher.psql_conn.commit()
+    if train_new_dictionary or not _has_dictionary(fetcher):
+        _add_dictionary(fetcher, sample_size)
+    codec = fetcher.load_codec()
+    nb_ams = 0
+    last_am_id = ''
+    with tqdm() as progress:
+        while True:
+            try:
+                rows = _lock_json_ams_batch(fetcher, last_am_id)
+                am_dicts = [(am_id, json.loads(data)) for am_id, data in rows]
+                _upsert_rows(fetcher, AM_COMPACT_TABLE, [(am_id, codec.encode(am_dict)) for am_id, am_dict in am_dicts])
+                outlines = [(am_id, json.dumps(outline_from_dict(am_dict).to_dict())) for am_id, am_dict in am_dicts]
+                _upsert_rows(fetcher, AM_OUTLINE_TABLE, outlines)
+                fetcher.psql_conn.commit()
+            except BaseException:
+                fetcher.psql_conn.rollback()
+                raise
+            if not rows:
+                break
+            last_am_id = rows[-1][0]
+            nb_ams += len(rows)
+            progress.update(len(rows))
+    print(f'{nb_ams} AMs encoded with dictionary {codec.current_dictionary_id}.')
+
+
+def _timed(function: Any, values: List[Any]) -> float:
+    start = time.perf_counter()
+    for value in values:
+        function(value)
+    return time.perf_counter() - start
+
+
+def benchmark() -> None:
+    """Compares size and decoding time of json and compact blobs, and the cost of a worker cache hit, on every AM."""
+    fetcher = _fetcher()
+    codec = fetcher.load_codec()
+    json_blobs = [data for _, data in _iter_json_ams(fetcher, 'back_office_benchmark_am_storage')]
+    fetcher.psql_conn.rollback()
+    compact_blobs = [codec.encode(json.loads(data)) for data in json_blobs]
+    json_size = sum(len(data.encode()) for data in json_blobs)
+    compact_size = sum(len(blob) for blob in compact_blobs)
+    json_decode = _timed(json.loads, json_blobs)
+    compact_decode = _timed(codec.decode, compact_blobs)
+    json_load = _timed(lambda data: ArreteMinisteriel.from_dict(json.loads(data)), json_blobs)
+    compact_load = _timed(lambda blob: ArreteMinisteriel.from_dict(codec.decode(blob)), compact_blobs)
+    am_dicts = [json.loads(data) for data in json_blobs]
+    cache_hit_from_dict = _timed(ArreteMinisteriel.from_dict, am_dicts)
+    cache_hit_deepcopy = _timed(deepcopy, [ArreteMinisteriel.from_dict(am_dict) for am_dict in am_dicts])
+    print(f'{len(json_blobs)} AMs, dictionary {codec.current_dictionary_id}')
+    print(f'{"":<10}{"size (MB)":>12}{"decode (s)":>12}{"decode + from_dict (s)":>24}')
+    print(f'{"json":<10}{json_size / 1e6:>12.2f}{json_decode:>12.3f}{json_load:>24.3f}')
+    print(f'{"compact":<10}{compact_size / 1e6:>12.2f}{compact_decode:>12.3f}{compact_load:>24.3f}')
+    print(f'Cache hits (s): from_dict of the cached dict {cache_hit_from_dict:.3f}, deepcopy {cache_hit_deepcopy:.3f}')
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = subparsers.add_parser('migrate', help='Create and fill the compact AM storage.')
+    migrate_parser.add_argument('--train-dictionary', action='store_true', help='Train a new zstd dictionary.')
+    migrate_parser.add_argument('--sample-size', type=int, default=200, help='Number of AMs used for training.')
+    subparsers.add_parser('benchmark', help='Compare json and compact storage on the current database.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = _parse_args()
+    if args.command == 'migrate':
+        migrate(args.train_dictionary, args.sample_size)
+    else:
+        benchmark()
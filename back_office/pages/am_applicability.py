@@ -11,6 +11,7 @@ from envinorma.models.condition import load_condition
 
 from back_office.components import error_component, success_component
 from back_office.components.condition_form import callbacks, condition_form
+from back_office.helpers.am_patch import StaleAMError, applicability_patch
 from back_office.routing import Page, Routing
 from back_office.utils import DATA_FETCHER, generate_id
 
@@ -30,6 +31,7 @@ class _Ids:
     CONDITION = generate_id(_PREFIX, 'condition')
     CONDITION_DIV = generate_id(_PREFIX, 'condition-div')
     USE_CONDITION = generate_id(_PREFIX, 'use-condition')
+    PREVIOUS_APPLICABILITY = generate_id(_PREFIX, 'previous-applicability')
 
     @staticmethod
     def delete_warning_button(rank: int) -> Dict[str, Any]:
@@ -102,7 +104,7 @@ def _condition_form(condition: Optional[Condition]) -> Component:
     )
 
 
-def _form(am_id: str, applicability: AMApplicability) -> Component:
+def _form(am_id: str, applicability: AMApplicability, stored_applicability: Optional[Dict[str, Any]]) -> Component:
     return html.Div(
         [
             _warnings_form(applicability.warnings),
@@ -110,6 +112,7 @@ def _form(am_id: str, applicability: AMApplicability) -> Component:
             html.Div(id=_Ids.FORM_OUTPUT),
             _buttons(),
             dcc.Store(data=am_id, id=_Ids.AM_ID),
+            dcc.Store(data=stored_applicability, id=_Ids.PREVIOUS_APPLICABILITY),
         ]
     )
 
@@ -124,11 +127,12 @@ def _cancel_button(am_id: Optional[str]) -> Component:
 
 def _page(am_id: str) -> Component:
     am = DATA_FETCHER.load_am(am_id)
-    if not am:
+    outline = DATA_FETCHER.load_am_outline(am_id)
+    if not am or not outline:
         return html.Div('AM introuvable')
     btn = _cancel_button(am_id)
     title = html.H3(f'Editer les paramètres d\'application de l\'arrêté ministériel {am_id}.')
-    return html.Div([btn, title, _form(am_id, am.applicability)], className='container mt-3')
+    return html.Div([btn, title, _form(am_id, am.applicability, outline.applicability)], className='container mt-3')
 
 
 def _applicability(warnings: List[str], use_condition: bool, condition_str: Optional[str]) -> AMApplicability:
@@ -138,14 +142,21 @@ def _applicability(warnings: List[str], use_condition: bool, condition_str: Opti
     return AMApplicability(warnings, condition)
 
 
-def _handle_form(warnings: List[str], use_condition: bool, condition: Optional[str], am_id: str) -> Component:
+def _handle_form(
+    warnings: List[str],
+    use_condition: bool,
+    condition: Optional[str],
+    am_id: str,
+    previous_applicability: Optional[Dict[str, Any]],
+) -> Component:
     try:
         new_applicability = _applicability(warnings, use_condition, condition)
-        am = DATA_FETCHER.load_am(am_id)
-        if not am:
-            raise _FormHandlingError('AM introuvable. Impossible d\'enregistrer le formulaire.')
-        am.applicability = new_applicability
-        DATA_FETCHER.upsert_am(am_id, am)
+        try:
+            DATA_FETCHER.patch_am(am_id, applicability_patch(new_applicability, previous_applicability))
+        except StaleAMError:
+            raise _FormHandlingError(
+                'AM introuvable ou modifié depuis le chargement de la page. Impossible d\'enregistrer le formulaire.'
+            )
     except _FormHandlingError as exc:
         return error_component(f"Erreur dans le formulaire : {exc}")
     redirect = dcc.Location(id='am-applicability-redirect', href=Routing.parametrization_path(am_id))
@@ -160,10 +171,11 @@ def _add_callbacks(app: Dash) -> None:
         State(_Ids.USE_CONDITION, 'value'),
         State(_Ids.CONDITION, 'data'),
         State(_Ids.AM_ID, 'data'),
+        State(_Ids.PREVIOUS_APPLICABILITY, 'data'),
         prevent_initial_call=True,
     )
-    def handle_form(_, warnings, use_condition, condition, am_id):
-        return _handle_form(warnings, use_condition, condition, am_id)
+    def handle_form(_, warnings, use_condition, condition, am_id, previous_applicability):
+        return _handle_form(warnings, use_condition, condition, am_id, previous_applicability)
 
     @app.callback(
         Output(_Ids.CONDITION_DIV, 'hidden'),
@@ -0,0 +1,106 @@
+import traceback
+from typing import Callable, Dict, List, Tuple
+
+import dash_bootstrap_components as dbc
+from dash import Dash, Input, Output, dcc, html
+from dash.development.base_component import Component
+from envinorma.models import AMMetadata, AMState
+
+from back_office.components import error_component
+from back_office.helpers.drift import AMDrift, load_drift_report, refresh_drift_report
+from back_office.routing import Endpoint, Page
+from back_office.utils import DATA_FETCHER, generate_id
+
+_REFRESH = generate_id(__file__, 'refresh')
+_CANCEL = generate_id(__file__, 'cancel')
+_PROGRESS_BAR = generate_id(__file__, 'progress-bar')
+_REPORT = generate_id(__file__, 'report')
+
+
+def _td(content) -> Component:
+    return html.Td(content, className='align-middle', style={'font-size': '0.85em'})
+
+
+def _row(rank: int, drift: AMDrift, metadata: Dict[str, AMMetadata]) -> Component:
+    compare_href = f'/{Endpoint.AM_COMPARE}/{drift.am_id}/legifrance/normalize'
+    md = metadata.get(drift.am_id)
+    cells = [
+        _td(rank),
+        _td(dcc.Link(drift.am_id, href=compare_href)),
+        _td(md.nickname or md.title if md else ''),
+        _td('' if drift.error else f'{drift.similarity:.1%}'),
+        _td('' if drift.error else drift.nb_changed_lines),
+        _td(drift.computed_at.strftime('%d/%m/%y %H:%M')),
+        _td(drift.error or ''),
+    ]
+    return html.Tr(cells, className='table-warning' if drift.error else '')
+
+
+def _report_table(drifts: List[AMDrift], metadata: Dict[str, AMMetadata]) -> Component:
+    if not drifts:
+        return html.P('Aucun écart calculé pour le moment.')
+    titles = ['#', 'N° CID', 'Titre', 'Similarité', 'Lignes modifiées', 'Calculé le', 'Erreur']
+    header = html.Thead(html.Tr([html.Th(title, style={'font-size': '0.85em'}) for title in titles]))
+    rows = [_row(rank, drift, metadata) for rank, drift in enumerate(drifts)]
+    return html.Table([header, html.Tbody(rows)], className='table table-sm')
+
+
+def _in_force_metadata() -> Dict[str, AMMetadata]:
+    metadata = DATA_FETCHER.load_all_am_metadata()
+    return {id_: md for id_, md in metadata.items() if md.state == AMState.VIGUEUR}
+
+
+def _report() -> Component:
+    metadata = _in_force_metadata()
+    return _report_table(load_drift_report(list(metadata.values())), metadata)
+
+
+def _explanation() -> Component:
+    return html.P(
+        'Écarts entre chaque arrêté en vigueur et sa version consolidée Légifrance actuelle, calculés sur les '
+        'textes normalisés (chiffres et lettres seulement). Seuls les arrêtés modifiés dans Envinorma ou sur '
+        'Légifrance depuis le dernier calcul sont recomparés.'
+    )
+
+
+def _buttons() -> Component:
+    refresh = html.Button('Mettre à jour', id=_REFRESH, className='btn btn-primary')
+    cancel = html.Button('Annuler', id=_CANCEL, className='btn btn-danger ml-2', hidden=True)
+    return html.Div([refresh, cancel], className='mb-3')
+
+
+def _layout() -> Component:
+    return html.Div(
+        [
+            html.H2('Écarts avec Légifrance'),
+            _explanation(),
+            _buttons(),
+            dbc.Progress(id=_PROGRESS_BAR, min=0, max=100, value=0, animated=True, className='d-none'),
+            html.Div(_report(), id=_REPORT),
+        ],
+        className='container mt-3',
+    )
+
+
+def _callbacks(app: Dash) -> None:
+    @app.long_callback(
+        output=Output(_REPORT, 'children'),
+        inputs=Input(_REFRESH, 'n_clicks'),
+        running=[
+            (Output(_REFRESH, 'disabled'), True, False),
+            (Output(_CANCEL, 'hidden'), False, True),
+            (Output(_PROGRESS_BAR, 'className'), '', 'd-none'),
+        ],
+        cancel=[Input(_CANCEL, 'n_clicks')],
+        progress=[Output(_PROGRESS_BAR, 'value')],
+        prevent_initial_call=True,
+    )
+    def _refresh(set_progress: Callable[[Tuple[int]], None], _):
+        try:
+            drifts = refresh_drift_report(set_progress)
+        except Exception:
+            return error_component(traceback.format_exc())
+        return _report_table(drifts, _in_force_metadata())
+
+
+PAGE = Page(_layout, _callbacks, True)
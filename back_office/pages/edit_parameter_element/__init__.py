@@ -2,7 +2,6 @@ from typing import List, Optional, Union
 
 from dash import dcc, html
 from dash.development.base_component import Component
-from envinorma.models import ArreteMinisteriel
 from envinorma.parametrization import (
     AlternativeSection,
     AMWarning,
@@ -11,6 +10,7 @@ from envinorma.parametrization import (
     Parametrization,
 )
 
+from back_office.helpers.am_outline import AMOutline
 from back_office.routing import Page
 from back_office.utils import DATA_FETCHER, AMOperation, RouteParsingError
 
@@ -19,16 +19,17 @@ from .form import add_callbacks, parameter_element_form
 
 
 def _get_main_component(
-    am: ArreteMinisteriel,
+    am_id: str,
+    outline: AMOutline,
     operation: AMOperation,
     destination_id: Optional[str],
     loaded_parameter: Optional[ParameterElement],
 ) -> Component:
-    return parameter_element_form(am.id or '', am, operation, loaded_parameter, destination_id)
+    return parameter_element_form(am_id, outline, operation, loaded_parameter, destination_id)
 
 
 def _build_page(
-    am: ArreteMinisteriel,
+    outline: AMOutline,
     operation: AMOperation,
     am_id: str,
     destination_id: Optional[str],
@@ -39,14 +40,10 @@ def _build_page(
         dcc.Store(data=operation.value, id=page_ids.AM_OPERATION),
         dcc.Store(data=destination_id, id=page_ids.PARAMETER_ID),
     ]
-    page = _get_main_component(am, operation, destination_id, loaded_parameter)
+    page = _get_main_component(am_id, outline, operation, destination_id, loaded_parameter)
     return html.Div([page, *hidden_components], className='parametrization_content container mt-3')
 
 
-def _load_am(am_id: str) -> Optional[ArreteMinisteriel]:
-    return DATA_FETCHER.load_am(am_id)
-
-
 def _get_parameter(parametrization: Parametrization, operation_id: AMOperation, parameter_id: str) -> ParameterElement:
     parameters: Union[List[AlternativeSection], List[InapplicableSection], List[AMWarning]]
     if operation_id == operation_id.ADD_ALTERNATIVE_SECTION:
@@ -68,18 +65,18 @@ def _page(am_id: str, operation: AMOperation, parameter_id: Optional[str] = None
         am_metadata = DATA_FETCHER.load_am_metadata(am_id)
         if not am_metadata:
             return html.P('404 - Arrêté inconnu')
-        am = _load_am(am_id)
+        outline = DATA_FETCHER.load_am_outline(am_id)
         parametrization = DATA_FETCHER.load_or_init_parametrization(am_id)
         loaded_parameter = (
             _get_parameter(parametrization, operation, parameter_id) if parameter_id is not None else None
         )
     except RouteParsingError as exc:
         return html.P(f'404 - Page introuvable - {str(exc)}')
-    if not am or not parametrization or not am_metadata:
+    if not outline or not parametrization or not am_metadata:
         return html.P(f'404 - Arrêté {am_id} introuvable.')
     if copy:
         parameter_id = None
-    return _build_page(am, operation, am_id, parameter_id, loaded_parameter)
+    return _build_page(outline, operation, am_id, parameter_id, loaded_parameter)
 
 
 def _page_condition(am_id: str, parameter_id: Optional[str] = None, copy: bool = False):
@@ -5,12 +5,12 @@ from typing import List, Optional, Tuple, Type, cast
 import dash_bootstrap_components as dbc
 from dash import ALL, Dash, Input, Output, State, dcc, html
 from dash.development.base_component import Component
-from envinorma.models import ArreteMinisteriel, StructuredText
 from envinorma.parametrization import AlternativeSection, AMWarning, Condition, InapplicableSection, ParameterElement
 from envinorma.parametrization.exceptions import ParametrizationError
 
 from back_office.components.condition_form import callbacks as condition_form_callbacks
 from back_office.components.condition_form import condition_form
+from back_office.helpers.am_outline import AMOutline, SectionOutline
 from back_office.helpers.texts import get_truncated_str
 from back_office.routing import Routing
 from back_office.utils import DATA_FETCHER, AMOperation
@@ -66,10 +66,10 @@ def _get_target_section_block(
     operation: AMOperation,
     text_title_options: DropdownOptions,
     loaded_parameter: Optional[ParameterElement],
-    am: ArreteMinisteriel,
+    am_id: str,
     is_edition: bool,
 ) -> Component:
-    blocks = [target_section_form(operation, text_title_options, loaded_parameter, am, 0, is_edition)]
+    blocks = [target_section_form(operation, text_title_options, loaded_parameter, am_id, 0, is_edition)]
     return html.Div(
         [html.H5('Paragraphes visés'), html.Div(blocks, id=ids.TARGET_BLOCKS), _add_block_button(is_edition)]
     )
@@ -126,14 +126,14 @@ def _fields(
     operation: AMOperation,
     loaded_parameter: Optional[ParameterElement],
     destination_id: Optional[str],
-    am: ArreteMinisteriel,
+    am_id: str,
 ) -> Component:
     is_edition = destination_id is not None
     fields = [
-        _go_back_button(am.id or ''),
+        _go_back_button(am_id),
         _main_title(operation, is_edition=is_edition, destination_id=destination_id),
         _get_delete_button(is_edition=is_edition),
-        _get_target_section_block(operation, text_title_options, loaded_parameter, am, is_edition=is_edition),
+        _get_target_section_block(operation, text_title_options, loaded_parameter, am_id, is_edition=is_edition),
         _warning_content_form(operation, loaded_parameter),
         _condition_form(operation, loaded_parameter),
     ]
@@ -146,11 +146,10 @@ def _make_form(
     operation: AMOperation,
     loaded_parameter: Optional[ParameterElement],
     destination_id: Optional[str],
-    am: ArreteMinisteriel,
 ) -> Component:
     return html.Div(
         [
-            _fields(text_title_options, operation, loaded_parameter, destination_id, am),
+            _fields(text_title_options, operation, loaded_parameter, destination_id, am_id),
             html.Div(id='param-edition-upsert-output', className='mt-2'),
             html.Div(id='param-edition-delete-output'),
             dcc.Store(id=ids.DROPDOWN_OPTIONS, data=json.dumps(text_title_options)),
@@ -159,26 +158,28 @@ def _make_form(
     )
 
 
-def _extract_reference_and_values_titles(text: StructuredText, level: int) -> List[Tuple[str, str]]:
-    return [(text.id, get_truncated_str('#' * level + ' ' + text.title.text))] + [
-        elt for sec in text.sections for elt in _extract_reference_and_values_titles(sec, level + 1)
+def _extract_reference_and_values_titles(section: SectionOutline, level: int) -> List[Tuple[str, str]]:
+    return [(section.id, get_truncated_str('#' * level + ' ' + section.title))] + [
+        elt for sec in section.sections for elt in _extract_reference_and_values_titles(sec, level + 1)
     ]
 
 
-def _extract_paragraph_reference_dropdown_values(am: ArreteMinisteriel) -> DropdownOptions:
-    title_references_and_values = [elt for sec in am.sections for elt in _extract_reference_and_values_titles(sec, 1)]
+def _extract_paragraph_reference_dropdown_values(outline: AMOutline) -> DropdownOptions:
+    title_references_and_values = [
+        elt for sec in outline.sections for elt in _extract_reference_and_values_titles(sec, 1)
+    ]
     return [{'label': title, 'value': reference} for reference, title in title_references_and_values]
 
 
 def parameter_element_form(
     am_id: str,
-    am: ArreteMinisteriel,
+    outline: AMOutline,
     operation: AMOperation,
     loaded_parameter: Optional[ParameterElement],
     destination_id: Optional[str],
 ) -> Component:
-    dropdown_values = _extract_paragraph_reference_dropdown_values(am)
-    return _make_form(am_id, dropdown_values, operation, loaded_parameter, destination_id, am)
+    dropdown_values = _extract_paragraph_reference_dropdown_values(outline)
+    return _make_form(am_id, dropdown_values, operation, loaded_parameter, destination_id)
 
 
 def _handle_submit(
@@ -193,14 +193,4 @@ def extract_and_upsert_new_parameter(
         operation, am, target_section_form_values, condition, warning_content
     )
     _check_consistency(operation, new_parameters)
-    _upsert_parameters(am_id, new_parameters, parameter_id)
-
-
-def _upsert_parameters(am_id: str, new_parameters: List[ParameterElement], parameter_id: Optional[str]):
-    if parameter_id is not None:
-        if len(new_parameters) != 1:
-            raise ValueError('Must have only one parameter when updating a specific parameter..')
-        DATA_FETCHER.upsert_parameter(am_id, new_parameters[0], parameter_id)
-    else:
-        for parameter in new_parameters:
-            DATA_FETCHER.upsert_parameter(am_id, parameter, None)
+    DATA_FETCHER.upsert_parameters(am_id, new_parameters, parameter_id)
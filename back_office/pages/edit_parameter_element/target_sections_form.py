@@ -6,20 +6,26 @@ import dash_bootstrap_components as dbc
 from dash import MATCH, Input, Output, State, dcc, html
 from dash.development.base_component import Component
 from envinorma.models import StructuredText
-from envinorma.models.arrete_ministeriel import ArreteMinisteriel
 from envinorma.parametrization import AlternativeSection, InapplicableSection, ParameterElement
 
+from back_office.helpers.am_patch import section_path
 from back_office.pages.edit_parameter_element import page_ids
 from back_office.utils import DATA_FETCHER, AMOperation
 
 DropdownOptions = List[Dict[str, Any]]
 
 
-def _find_section_by_id(section_id: str, am: ArreteMinisteriel) -> StructuredText:
-    for section in am.descendent_sections():
-        if section.id == section_id:
-            return section
-    raise ValueError(f'Section {section_id} not found')
+def _load_section(am_id: str, section_id: str) -> Optional[StructuredText]:
+    """Loads only the selected section, located with the AM outline. None if not found (e.g. if the AM changed)."""
+    outline = DATA_FETCHER.load_am_outline(am_id)
+    if not outline:
+        return None
+    try:
+        path = section_path(outline, section_id)
+    except ValueError:
+        return None
+    section = DATA_FETCHER.load_am_section(am_id, path)
+    return section if section and section.id == section_id else None
 
 
 def _target_section_form(
@@ -59,7 +65,7 @@ def _propagate_in_subsections_checkbox(
 
 
 def _target_alineas_form(
-    operation: AMOperation, loaded_parameter: Optional[ParameterElement], am: Optional[ArreteMinisteriel], rank: int
+    operation: AMOperation, loaded_parameter: Optional[ParameterElement], am_id: Optional[str], rank: int
 ) -> Component:
     title = html.H6('Alineas inapplicables', className='mt-3')
     if not _is_condition(operation):
@@ -73,12 +79,9 @@ def _target_alineas_form(
         value = []
         options = []
     else:
-        if not am:
-            raise ValueError('am is required')
-        try:
-            section = _find_section_by_id(condition.section_id, am)
-        except ValueError:  # Section could not be found if am has changed
-            section = None
+        if not am_id:
+            raise ValueError('am_id is required')
+        section = _load_section(am_id, condition.section_id)
         alineas = condition.alineas
         target_section_alineas = section.outer_alineas if section else []
         if target_section_alineas:
@@ -155,10 +158,7 @@ def _new_section_form_from_default(
 def _build_new_text_component(section_id: Optional[str], am_id: str, operation: AMOperation, rank: int) -> Component:
     if operation != AMOperation.ADD_ALTERNATIVE_SECTION or not section_id:
         return _new_section_form('', '', rank, operation)
-    am = DATA_FETCHER.load_am(am_id)
-    if not am:
-        return _new_section_form('', '', rank, operation)
-    section = _find_section_by_id(section_id, am)
+    section = _load_section(am_id, section_id)
     if not section:
         return _new_section_form('', '', rank, operation)
     title, content = _extract_title_and_content(section)
@@ -176,11 +176,8 @@ def _build_targeted_alineas_options(section_dict: Dict[str, Any], operation: AMO
 def _store_target_section(section_id: Optional[str], am_id: str) -> Dict[str, Any]:
     if not section_id:
         return {}
-    am = DATA_FETCHER.load_am(am_id)
-    if not am:
-        return {}
-    section = _find_section_by_id(section_id, am)
-    return section.to_dict()
+    section = _load_section(am_id, section_id)
+    return section.to_dict() if section else {}
 
 
 def _build_targeted_alineas_value(section_dict: Dict[str, Any], operation: AMOperation) -> List[int]:
@@ -203,7 +200,7 @@ def target_section_form(
     operation: AMOperation,
     text_title_options: DropdownOptions,
     loaded_parameter: Optional[ParameterElement],
-    am: Optional[ArreteMinisteriel],
+    am_id: Optional[str],
     rank: int,
     is_edition: bool,
 ) -> Component:
@@ -212,7 +209,7 @@ def target_section_form(
             _delete_button(rank, is_edition),
             _target_section_form(text_title_options, loaded_parameter, rank),
             _propagate_in_subsections_checkbox(operation, loaded_parameter, rank),
-            _target_alineas_form(operation, loaded_parameter, am, rank),
+            _target_alineas_form(operation, loaded_parameter, am_id, rank),
             html.Div(_new_section_form_from_default(operation, loaded_parameter, rank), id=page_ids.new_text(rank)),
             dcc.Store(id=page_ids.target_section_store(rank)),
         ],
@@ -1,15 +1,16 @@
 import json
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple
 
 import dash_bootstrap_components as dbc
 from dash import ALL, Dash, Input, Output, State, callback_context, dcc, html
 from dash.development.base_component import Component
-from envinorma.models import Annotations, ArreteMinisteriel, StructuredText
 from envinorma.topics.patterns import TopicName
 from envinorma.topics.simple_topics import SIMPLE_ONTOLOGY
 
 from back_office.components import error_component, success_component
 from back_office.components.am_component import am_with_summary_component
+from back_office.helpers.am_outline import AMOutline, SectionOutline
+from back_office.helpers.am_patch import StaleAMError, topic_patch
 from back_office.routing import Page, Routing
 from back_office.utils import DATA_FETCHER, ensure_not_none, generate_id
 
@@ -20,10 +21,9 @@ _AM_STRUCTURE_STORE = generate_id(__file__, 'am-structure-store')
 _TOPICS_DROPDOWN = generate_id(__file__, 'topics-dropdown')
 _TOPIC_EDITION_OUTPUT = generate_id(__file__, 'topic-edition-output')
 _AM_MODAL = generate_id(__file__, 'am-modal')
+_AM_MODAL_BODY = generate_id(__file__, 'am-modal-body')
 _AM_MODAL_TRIGGER = generate_id(__file__, 'am-modal-trigger')
 
-_Section = Union[ArreteMinisteriel, StructuredText]
-
 
 def _set_topic_id(section_id: Any) -> Dict[str, Any]:
     return {'type': generate_id(__file__, 'set-topic'), 'key': section_id}
@@ -33,9 +33,8 @@ def _delete_topic_id(section_id: Any) -> Dict[str, Any]:
     return {'type': generate_id(__file__, 'delete-topic'), 'key': section_id}
 
 
-def _topic_name(section: StructuredText) -> Optional[str]:
-    topic = section.annotations.topic if section.annotations else None
-    return topic.name if topic else None
+def _topic_name(section: SectionOutline) -> Optional[str]:
+    return section.topic.name if section.topic else None
 
 
 def _topic_badge(topic_name: str, section_id: str) -> Component:
@@ -48,13 +47,13 @@ def _topic_badge(topic_name: str, section_id: str) -> Component:
     return html.Span([badge, close_button])
 
 
-def _title(section: StructuredText) -> Component:
+def _title(section: SectionOutline) -> Component:
     topic_name = _topic_name(section)
     badge = _topic_badge(topic_name, section.id) if topic_name else ''
-    return html.Span([f'{section.title.text} ', badge], style={'font-size': '0.8em'})
+    return html.Span([f'{section.title} ', badge], style={'font-size': '0.8em'})
 
 
-def _section_topics(section: StructuredText, depth: int = 0) -> Component:
+def _section_topics(section: SectionOutline, depth: int = 0) -> Component:
     common_style = {'border-left': '3px solid #007bff', 'padding-left': '25px'}
     style = {'margin-top': '3px'} if _topic_name(section) else {}
     additional_class_name = ' section-with-defined-topic' if _topic_name(section) else ''
@@ -66,7 +65,7 @@ def _section_topics(section: StructuredText, depth: int = 0) -> Component:
     )
 
 
-def _am_topics(am: ArreteMinisteriel) -> Component:
+def _am_topics(am: AMOutline) -> Component:
     return html.Div([_section_topics(section) for section in am.sections])
 
 
@@ -74,7 +73,7 @@ def _link_to_am(am_id: str) -> Component:
     return dcc.Link(html.Button('< Retour', className='btn btn-link'), href=Routing.topics_path(am_id))
 
 
-def _am_topics_with_loader(am: ArreteMinisteriel) -> Component:
+def _am_topics_with_loader(am: AMOutline) -> Component:
     return html.Div(
         [
             html.H5("Structure de l'AM à éditer."),
@@ -100,38 +99,41 @@ def _topics_dropdown() -> Component:
     )
 
 
-def _am_structure(section: _Section, depth: int = 0) -> Dict[str, Any]:
-    result = {
-        key: value for subsection in section.sections for key, value in _am_structure(subsection, depth + 1).items()
-    }
-    result[section.id or ''] = depth
-    return result
+def _am_structure(am: AMOutline) -> Dict[str, int]:
+    return {section.id: section.depth for section in am.descendent_sections()}
 
 
-def _id_store(am: ArreteMinisteriel) -> Component:
+def _id_store(am: AMOutline) -> Component:
     return html.Div([dcc.Store(data=_am_structure(am), id=_AM_STRUCTURE_STORE), dcc.Store(data=am.id, id=_AM_ID)])
 
 
-def _am_modal(am: ArreteMinisteriel) -> Component:
-    body = dbc.ModalBody(am_with_summary_component(am, first_level=3))
+def _am_modal() -> Component:
+    body = dbc.ModalBody(dbc.Spinner(html.Div(id=_AM_MODAL_BODY)))
     header = dbc.ModalHeader()
     modal = dbc.Modal([header, body], id=_AM_MODAL, size='xl')
     trigger = html.Button('Consulter l\'AM', className='btn btn-primary mt-3', id=_AM_MODAL_TRIGGER)
     return html.Div([trigger, modal])
 
 
-def _first_column(am_id: str, am: ArreteMinisteriel) -> Component:
-    return html.Div([_link_to_am(am_id), _topics_dropdown(), _am_modal(am)], className='col-3')
+def _am_modal_body(am_id: str) -> Component:
+    am = DATA_FETCHER.load_am(am_id)
+    if not am:
+        return html.Div('404')
+    return am_with_summary_component(am, first_level=3)
+
+
+def _first_column(am_id: str) -> Component:
+    return html.Div([_link_to_am(am_id), _topics_dropdown(), _am_modal()], className='col-3')
 
 
 def _layout(am_id: str) -> Component:
-    am = DATA_FETCHER.load_am(am_id)
+    am = DATA_FETCHER.load_am_outline(am_id)
     if not am:
         return html.Div('404')
     return html.Div(
         [
             html.H3(f'AM {am_id} - Edition des thèmes'),
-            html.Div([_first_column(am_id, am), _am_topics_with_loader(am)], className='row mt-3'),
+            html.Div([_first_column(am_id), _am_topics_with_loader(am)], className='row mt-3'),
             _id_store(am),
         ]
     )
@@ -152,18 +154,14 @@ class _EditionError(Exception):
     pass
 
 
-def _has_topic(section: StructuredText) -> bool:
-    return bool(section.annotations and section.annotations.topic)
-
-
-def _ensure_sections_have_no_subtopics(sections: List[StructuredText]) -> None:
+def _ensure_sections_have_no_subtopics(sections: List[SectionOutline]) -> None:
     for section in sections:
-        if _has_topic(section):
+        if section.topic:
             raise _EditionError("Impossible d'affecter le thème car une sous-section contient un thème.")
         _ensure_sections_have_no_subtopics(section.sections)
 
 
-def _check_edition_is_permitted(section: StructuredText, topic: Optional[TopicName], ascendant_has_topic: bool) -> None:
+def _check_edition_is_permitted(section: SectionOutline, topic: Optional[TopicName], ascendant_has_topic: bool) -> None:
     if not topic:  # Erasing a topic is always allowed
         return
     if ascendant_has_topic:
@@ -171,48 +169,49 @@ def _check_edition_is_permitted(section: StructuredText, topic: Optional[TopicNa
     _ensure_sections_have_no_subtopics(section.sections)
 
 
-def _edit_section_topic(
-    section: StructuredText,
-    target_section_id: str,
-    topic: Optional[TopicName],
-    delete_topic: bool,
-    ascendant_has_topic: bool = False,
-) -> StructuredText:
-    if section.id == target_section_id:
-        if not delete_topic:
-            _check_edition_is_permitted(section, topic, ascendant_has_topic)
-        if not section.annotations:
-            section.annotations = Annotations()
-        section.annotations.topic = topic
-    else:
-        ascendant_has_topic = ascendant_has_topic or _has_topic(section)
-        section.sections = [
-            _edit_section_topic(sub, target_section_id, topic, delete_topic, ascendant_has_topic)
-            for sub in section.sections
-        ]
-    return section
+def _find_section(
+    sections: List[SectionOutline], target_section_id: str, ascendant_has_topic: bool = False
+) -> Optional[Tuple[SectionOutline, bool]]:
+    for section in sections:
+        if section.id == target_section_id:
+            return section, ascendant_has_topic
+        found = _find_section(section.sections, target_section_id, ascendant_has_topic or bool(section.topic))
+        if found:
+            return found
+    return None
 
 
-def _edit_am_topic(am_id: str, target_section: str, topic_name: Optional[str], delete_topic: bool) -> ArreteMinisteriel:
-    am = DATA_FETCHER.load_am(am_id)
-    if not am:
-        raise ValueError('Expecting AM.')
+def _edit_am_topic(am_id: str, target_section: str, topic_name: Optional[str], delete_topic: bool) -> AMOutline:
     if not topic_name and not delete_topic:
         raise _EditionError('Aucun thème n\'est sélectionné.')
+    am = DATA_FETCHER.load_am_outline(am_id)
+    if not am:
+        raise ValueError('Expecting AM.')
     topic = TopicName(topic_name) if topic_name else None
-    am.sections = [_edit_section_topic(section, target_section, topic, delete_topic) for section in am.sections]
-    DATA_FETCHER.upsert_am(am_id, am)
+    found = _find_section(am.sections, target_section)
+    if not found:
+        raise _EditionError('La section n\'existe plus dans l\'arrêté, veuillez recharger la page.')
+    section, ascendant_has_topic = found
+    if not delete_topic:
+        _check_edition_is_permitted(section, topic, ascendant_has_topic)
+    try:
+        DATA_FETCHER.patch_am(am_id, topic_patch(am, target_section, topic))
+    except StaleAMError:
+        raise _EditionError('L\'arrêté a été modifié entre temps, veuillez recharger la page.')
+    section.topic = topic
     return am
 
 
 def _callbacks(app: Dash) -> None:
     @app.callback(
         Output(_AM_MODAL, 'is_open'),
+        Output(_AM_MODAL_BODY, 'children'),
         Input(_AM_MODAL_TRIGGER, 'n_clicks'),
+        State(_AM_ID, 'data'),
         prevent_initial_call=True,
     )
-    def toggle_am(_):
-        return True
+    def toggle_am(_, am_id):
+        return True, _am_modal_body(am_id)
 
     @app.callback(
         Output(_TOPIC_EDITION_OUTPUT, 'children'),
@@ -226,16 +225,17 @@ def _callbacks(app: Dash) -> None:
     )
     def _edit_topic(_, __, dropdown_value, am_structure, am_id):
         delete_topic_ids, set_topic_ids = _extract_trigger_keys(callback_context.triggered)
-        if delete_topic_ids:
-            am = _edit_am_topic(am_id, delete_topic_ids[0], None, True)
-            return success_component('Le thème a été supprimé.'), _am_topics(am)
-        target_section = _keep_deepest_id(set_topic_ids, am_structure)
         try:
+            if delete_topic_ids:
+                am = _edit_am_topic(am_id, delete_topic_ids[0], None, True)
+                return success_component('Le thème a été supprimé.'), _am_topics(am)
+            target_section = _keep_deepest_id(set_topic_ids, am_structure)
             am = _edit_am_topic(am_id, target_section, dropdown_value, False)
         except _EditionError as exc:
-            am = ensure_not_none(DATA_FETCHER.load_am(am_id))
-            return error_component(str(exc)), _am_topics(am)
-        return success_component(f'Section correctement affectée au thème {dropdown_value}.'), _am_topics(am)
+            outline = ensure_not_none(DATA_FETCHER.load_am_outline(am_id))
+            return error_component(str(exc)), _am_topics(outline)
+        message = f'Section correctement affectée au thème {dropdown_value}.'
+        return success_component(message), _am_topics(am)
 
 
 def _page(am_id: str) -> Component:
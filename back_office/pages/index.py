@@ -1,15 +1,27 @@
+import math
 from collections import Counter
-from typing import Dict, Union
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
 
 import dash_bootstrap_components as dbc
-from dash import dcc, html
+from dash import Dash, Input, Output, State, callback_context, dcc, html
 from dash.development.base_component import Component
-from envinorma.models import AMMetadata, AMState, Classement
+from envinorma.models import AMMetadata, AMSource, AMState, Classement
 
 from back_office.components.upload_ams import upload_ams_callbacks, upload_ams_component
 from back_office.helpers.login import get_current_user
 from back_office.routing import Endpoint, Page
-from back_office.utils import AM_ID_TO_NB_CLASSEMENTS, DATA_FETCHER
+from back_office.utils import AM_ID_TO_NB_CLASSEMENTS, DATA_FETCHER, generate_id
+
+_STATE = generate_id(__file__, 'state')
+_SOURCE = generate_id(__file__, 'source')
+_TRANSVERSE_ONLY = generate_id(__file__, 'transverse-only')
+_SORT = generate_id(__file__, 'sort')
+_TABLE = generate_id(__file__, 'table')
+_PAGE = generate_id(__file__, 'page')
+_PAGE_LABEL = generate_id(__file__, 'page-label')
+_PREVIOUS_PAGE = generate_id(__file__, 'previous-page')
+_NEXT_PAGE = generate_id(__file__, 'next-page')
 
 
 def _get_str_classement(classement: Classement) -> str:
@@ -72,13 +84,82 @@ def _table_header() -> Component:
     )
 
 
-def _build_am_table(metadata: Dict[str, AMMetadata], occs: Dict[str, int]) -> Component:
+class _Sort(Enum):
+    RELEVANCE = 'relevance'
+    DATE = 'date'
+    CID = 'cid'
+
+
+_ALL = 'ALL'
+_DELETED = 'DELETED'
+_PAGE_SIZE = 50
+_STATE_OPTIONS = [
+    {'label': 'En vigueur', 'value': AMState.VIGUEUR.value},
+    {'label': 'En cours de création', 'value': AMState.EN_CREATION.value},
+    {'label': 'Supprimés ou abrogés', 'value': _DELETED},
+    {'label': 'Tous', 'value': _ALL},
+]
+_SOURCE_OPTIONS = [{'label': 'Toutes', 'value': _ALL}, *[{'label': el.value, 'value': el.value} for el in AMSource]]
+_SORT_OPTIONS = [
+    {'label': 'Non transverses puis nombre de classements', 'value': _Sort.RELEVANCE.value},
+    {'label': 'Date de signature', 'value': _Sort.DATE.value},
+    {'label': 'N° CID', 'value': _Sort.CID.value},
+]
+
+
+def _state_matches(metadata: AMMetadata, state: str) -> bool:
+    if state == _ALL:
+        return True
+    if state == _DELETED:
+        return metadata.state in (AMState.DELETED, AMState.ABROGE)
+    return metadata.state.value == state
+
+
+def _matches(metadata: AMMetadata, state: str, source: str, transverse_only: bool) -> bool:
+    if not _state_matches(metadata, state):
+        return False
+    if source != _ALL and metadata.source.value != source:
+        return False
+    return metadata.is_transverse or not transverse_only
+
+
+def _sort_key(sort: _Sort, occs: Dict[str, int]) -> Callable[[AMMetadata], Any]:
+    if sort == _Sort.RELEVANCE:
+        return lambda md: (md.is_transverse, -occs.get(md.cid, 0))
+    if sort == _Sort.DATE:
+        return lambda md: (-md.date_of_signature.toordinal(), md.cid)
+    if sort == _Sort.CID:
+        return lambda md: md.cid
+    raise NotImplementedError(f'Unhandled sort {sort}')
+
+
+def _filter_and_sort(
+    metadata: Iterable[AMMetadata], occs: Dict[str, int], state: str, source: str, transverse_only: bool, sort: _Sort
+) -> List[AMMetadata]:
+    selected = [md for md in metadata if _matches(md, state, source, transverse_only)]
+    return sorted(selected, key=_sort_key(sort, occs))
+
+
+def _nb_pages(nb_items: int) -> int:
+    return max(1, math.ceil(nb_items / _PAGE_SIZE))
+
+
+def _build_am_table(ams: List[AMMetadata], first_rank: int) -> Component:
     header = _table_header()
-    sorted_ids = sorted(metadata, key=lambda x: (not metadata[x].is_transverse, occs.get(x, 0)), reverse=True)
-    rows = [_get_row(rank, metadata[am_id]) for rank, am_id in enumerate(sorted_ids)]
+    rows = [_get_row(rank, am) for rank, am in enumerate(ams, start=first_rank)]
     return html.Table([html.Thead(header), html.Tbody(rows)], className='table table-sm')
 
 
+def _table_page(state: str, source: str, transverse_only: bool, sort: _Sort, page: int) -> Tuple[Component, int]:
+    id_to_metadata = DATA_FETCHER.load_all_am_metadata(with_deleted_ams=True)
+    ams = _filter_and_sort(id_to_metadata.values(), AM_ID_TO_NB_CLASSEMENTS, state, source, transverse_only, sort)
+    nb_pages = _nb_pages(len(ams))
+    page = min(max(page, 0), nb_pages - 1)
+    first_rank = page * _PAGE_SIZE
+    table = _build_am_table(ams[first_rank : first_rank + _PAGE_SIZE], first_rank)
+    return html.Div([html.P(f'{len(ams)} arrêté(s)', style={'font-size': '0.85em'}), table]), nb_pages
+
+
 def _build_recap(state_counter: Dict[AMState, int]) -> Component:
     deleted = state_counter[AMState.DELETED] + state_counter[AMState.ABROGE]
     txts = [
@@ -90,32 +171,33 @@ def _build_recap(state_counter: Dict[AMState, int]) -> Component:
     return html.Div(cols, className='row mt-4 mb-4')
 
 
-def _inforced_am_row(id_to_am_metadata: Dict[str, AMMetadata], id_to_occurrences: Dict[str, int]) -> Component:
-    id_to_am_metadata = {id_: md for id_, md in id_to_am_metadata.items() if md.state == AMState.VIGUEUR}
-    displayed_ids = set(list(id_to_am_metadata))
-    id_to_occurrences = {id_: occ for id_, occ in id_to_occurrences.items() if id_ in displayed_ids}
-    return html.Div(_build_am_table(id_to_am_metadata, id_to_occurrences))
+def _dropdown(id_: str, label: str, options: List[Dict[str, str]], value: str) -> Component:
+    dropdown = dcc.Dropdown(id=id_, options=options, value=value, clearable=False, style={'font-size': '0.85em'})
+    return html.Div([html.Label(label, htmlFor=id_, style={'font-size': '0.85em'}), dropdown], className='col-3')
 
 
-def _in_creation_am_row(id_to_am_metadata: Dict[str, AMMetadata], id_to_occurrences: Dict[str, int]) -> Component:
-    id_to_am_metadata = {id_: md for id_, md in id_to_am_metadata.items() if md.state == AMState.EN_CREATION}
-    displayed_ids = set(list(id_to_am_metadata))
-    id_to_occurrences = {id_: occ for id_, occ in id_to_occurrences.items() if id_ in displayed_ids}
-    return html.Div(_build_am_table(id_to_am_metadata, id_to_occurrences))
+def _filters() -> Component:
+    transverse = dbc.Checkbox(id=_TRANSVERSE_ONLY, value=False, label='Transverses uniquement')
+    return html.Div(
+        [
+            _dropdown(_STATE, 'Statut', _STATE_OPTIONS, AMState.VIGUEUR.value),
+            _dropdown(_SOURCE, 'Source', _SOURCE_OPTIONS, _ALL),
+            _dropdown(_SORT, 'Trier par', _SORT_OPTIONS, _Sort.RELEVANCE.value),
+            html.Div(transverse, className='col-3 mt-4', style={'font-size': '0.85em'}),
+        ],
+        className='row mb-3',
+    )
 
 
-def _deleted_am_row(id_to_am_metadata: Dict[str, AMMetadata]) -> Component:
-    deleted_am = {
-        id_: metadata
-        for id_, metadata in id_to_am_metadata.items()
-        if metadata.state not in (AMState.VIGUEUR, AMState.EN_CREATION)
-    }
+def _pagination() -> Component:
     return html.Div(
         [
-            html.H3('Arrêtés supprimés ou abrogés.', className='mt-5'),
-            html.P('Ces arrêtés ne sont pas exploités dans l\'application envinorma.'),
-            _build_am_table(deleted_am, {}),
+            html.Button('< Précédent', id=_PREVIOUS_PAGE, className='btn btn-light btn-sm'),
+            html.Span(id=_PAGE_LABEL, className='ml-2 mr-2', style={'font-size': '0.85em'}),
+            html.Button('Suivant >', id=_NEXT_PAGE, className='btn btn-light btn-sm'),
+            dcc.Store(id=_PAGE, data=0),
         ],
+        className='mb-5',
     )
 
 
@@ -138,26 +220,55 @@ def _header(state_counter: Dict[AMState, int]) -> Component:
     return html.Div([_title(), html.Hr(), _export_alert(), _build_recap(state_counter)])
 
 
-def _index_component(id_to_am_metadata: Dict[str, AMMetadata], id_to_occurrences: Dict[str, int]) -> Component:
+def _index_component(id_to_am_metadata: Dict[str, AMMetadata]) -> Component:
     states = Counter([md.state for md in id_to_am_metadata.values()])
-    sentence = 'Ces arrêtés doivent être déclarés en vigueur une fois les thèmes et le paramétrage définis.'
     return html.Div(
-        [
-            _header(states),
-            html.H3('Arrêtés ministériels en cours de création.', className='mt-2'),
-            html.P(sentence),
-            _in_creation_am_row(id_to_am_metadata, id_to_occurrences),
-            html.H3('Arrêtés ministériels en vigueur.', className='mt-5'),
-            _inforced_am_row(id_to_am_metadata, id_to_occurrences),
-            _deleted_am_row(id_to_am_metadata),
-        ],
-        className='container mt-3',
+        [_header(states), _filters(), dbc.Spinner(html.Div(id=_TABLE)), _pagination()], className='container mt-3'
     )
 
 
 def _layout() -> Component:
     id_to_metadata = DATA_FETCHER.load_all_am_metadata(with_deleted_ams=True)
-    return _index_component(id_to_metadata, AM_ID_TO_NB_CLASSEMENTS)
+    return _index_component(id_to_metadata)
+
+
+def _callbacks(app: Dash) -> None:
+    upload_ams_callbacks(app)
+
+    @app.callback(
+        Output(_PAGE, 'data'),
+        Input(_PREVIOUS_PAGE, 'n_clicks'),
+        Input(_NEXT_PAGE, 'n_clicks'),
+        Input(_STATE, 'value'),
+        Input(_SOURCE, 'value'),
+        Input(_TRANSVERSE_ONLY, 'value'),
+        Input(_SORT, 'value'),
+        State(_PAGE, 'data'),
+        prevent_initial_call=True,
+    )
+    def _change_page(_, __, ___, ____, _____, ______, page):
+        trigger = callback_context.triggered[0]['prop_id'] if callback_context.triggered else ''
+        if trigger.startswith(_PREVIOUS_PAGE):
+            return max(page - 1, 0)
+        if trigger.startswith(_NEXT_PAGE):
+            return page + 1
+        return 0
+
+    @app.callback(
+        Output(_TABLE, 'children'),
+        Output(_PAGE_LABEL, 'children'),
+        Output(_PREVIOUS_PAGE, 'disabled'),
+        Output(_NEXT_PAGE, 'disabled'),
+        Input(_PAGE, 'data'),
+        State(_STATE, 'value'),
+        State(_SOURCE, 'value'),
+        State(_TRANSVERSE_ONLY, 'value'),
+        State(_SORT, 'value'),
+    )
+    def _display_table(page, state, source, transverse_only, sort):
+        table, nb_pages = _table_page(state, source, bool(transverse_only), _Sort(sort), page)
+        page = min(page, nb_pages - 1)
+        return table, f'Page {page + 1} / {nb_pages}', page == 0, page >= nb_pages - 1
 
 
-PAGE = Page(_layout, upload_ams_callbacks, False)
+PAGE = Page(_layout, _callbacks, False)
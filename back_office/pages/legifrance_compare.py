@@ -1,4 +1,5 @@
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from typing import Optional, Tuple
 
@@ -56,8 +57,12 @@ def _am_id(am_id: Optional[str]) -> Component:
 
 
 def _diff(am_id: str, date_before: date, date_after: date) -> Component:
-    am_before = extract_legifrance_am(am_id, date_before)
-    am_after = extract_legifrance_am(am_id, date_after)
+    # Both versions are fetched and converted concurrently. result() raises the errors
+    # (NoConsolidationError, LegifranceRequestError) in this thread, where they are handled.
+    with ThreadPoolExecutor(2) as executor:
+        future_before = executor.submit(extract_legifrance_am, am_id, date_before)
+        future_after = executor.submit(extract_legifrance_am, am_id, date_after)
+        am_before, am_after = future_before.result(), future_after.result()
     diff = compute_am_diff(am_before, am_after, False)
     return diff_component(diff, 'Version de référence', 'Version comparée')
 
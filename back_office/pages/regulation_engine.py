@@ -1,27 +1,25 @@
-import json
-import os
 import random
 from typing import Any, Dict, List, Tuple
 
 import dash_bootstrap_components as dbc
 from dash import Dash, html
 from dash.development.base_component import Component
-from envinorma.models import ArreteMinisteriel, DetailedClassement, Parameter, ParameterEnum, Regime
+from envinorma.models import AMState, ArreteMinisteriel, DetailedClassement, Parameter, ParameterEnum, Regime
 from envinorma.parametrization.apply_parameter_values import AMWithApplicability, build_am_with_applicability
 
 from back_office.components import replace_line_breaks
 from back_office.components.table import ExtendedComponent, table_component
+from back_office.helpers.bulk_loading import iter_ams
 from back_office.routing import Page
-from back_office.utils import DATA_FETCHER, ensure_not_none
+from back_office.utils import DATA_FETCHER
 
-_FOLDER = '[REPLACE]/envinorma-web/db/seeds/ams'
 _CLASSEMENTS_FILENAME = '[REPLACE]/envinorma-web/db/seeds/classements_idf.csv'
 
 
-def _fetch_all_ams() -> List[ArreteMinisteriel]:
-    paths = [os.path.join(_FOLDER, file_) for file_ in os.listdir(_FOLDER)]
-    print(f'{len(paths)} AM found.')
-    return [ArreteMinisteriel.from_dict(json.load(open(path))) for path in paths]
+def _fetch_all_ams() -> Dict[str, ArreteMinisteriel]:
+    ams = {bundle.metadata.cid: bundle.enriched_am() for bundle in iter_ams(AMState.VIGUEUR)}
+    print(f'{len(ams)} AM found.')
+    return ams
 
 
 def _prepare_parameters(classements: List[DetailedClassement]) -> Dict[Parameter, Any]:
@@ -92,8 +90,7 @@ def _get_am_id_to_classements(
 def _compute_arrete_list(
     classements: List[DetailedClassement],
 ) -> List[Tuple[AMWithApplicability, List[DetailedClassement]]]:
-    all_ams = _fetch_all_ams()
-    ams: Dict[str, ArreteMinisteriel] = {ensure_not_none(am.id): am for am in all_ams}
+    ams = _fetch_all_ams()
     return _compute_applicable_versions(_get_am_id_to_classements(classements, ams), ams)
 
 
@@ -3,25 +3,24 @@ from typing import Optional
 import dash_bootstrap_components as dbc
 from dash import Dash, dcc, html
 from dash.development.base_component import Component
-from envinorma.models import ArreteMinisteriel, StructuredText
 
 from back_office.components.am_side_nav import page_with_sidebar
+from back_office.helpers.am_outline import AMOutline, SectionOutline
 from back_office.routing import Endpoint, Page
 from back_office.utils import DATA_FETCHER
 
 
-def _topic_name(section: StructuredText) -> Optional[str]:
-    topic = section.annotations.topic if section.annotations else None
-    return topic.name if topic else None
+def _topic_name(section: SectionOutline) -> Optional[str]:
+    return section.topic.name if section.topic else None
 
 
-def _title(section: StructuredText) -> Component:
+def _title(section: SectionOutline) -> Component:
     topic_name = _topic_name(section)
     badge = html.Span(topic_name, className='badge badge-primary') if topic_name else ''
-    return html.Span([f'{section.title.text} ', badge], style={'font-size': '0.8em'})
+    return html.Span([f'{section.title} ', badge], style={'font-size': '0.8em'})
 
 
-def _section_topics(section: StructuredText) -> Component:
+def _section_topics(section: SectionOutline) -> Component:
     style = {'margin-top': '3px', 'background-color': '#007bff33'} if _topic_name(section) else {}
     return html.Div(
         [_title(section), *[_section_topics(sub) for sub in section.sections]],
@@ -29,7 +28,7 @@ def _section_topics(section: StructuredText) -> Component:
     )
 
 
-def _am_topics(am: Optional[ArreteMinisteriel]) -> Component:
+def _am_topics(am: Optional[AMOutline]) -> Component:
     if not am:
         return html.Div('AM non initialisé')
     return html.Div([_section_topics(section) for section in am.sections])
@@ -57,7 +56,7 @@ def _layout(am_id: str) -> Component:
     row = html.Div(
         [
             html.Div(_left_col(), className='col-3'),
-            html.Div(className='col-9', children=_am_topics(DATA_FETCHER.load_am(am_id))),
+            html.Div(className='col-9', children=_am_topics(DATA_FETCHER.load_am_outline(am_id))),
         ],
         className='row',
     )
@@ -27,6 +27,7 @@ class Endpoint(Enum):
     ADD_INAPPLICABILITY = 'add_inapplicability'
     ADD_ALTERNATIVE_SECTION = 'add_alternative_section'
     AM_APPLICABILITY = 'am_applicability'
+    DRIFT_REPORT = 'drift_report'
 
     def __repr__(self):
         return self.value
@@ -59,6 +60,7 @@ _ENDPOINT_TO_ROUTES: Dict[Endpoint, List[str]] = {
         '/{}/<am_id>/<parameter_id>/<copy>',
     ],
     Endpoint.AM_APPLICABILITY: ['/{}/<am_id>'],
+    Endpoint.DRIFT_REPORT: ['/{}'],
 }
 
 ROUTER: MapAdapter = Map(
@@ -5,11 +5,14 @@ from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, TypeVar, Union
 
-from envinorma.data_fetcher import DataFetcher
-
-from back_office.config import PSQL_DSN
-
-DATA_FETCHER = DataFetcher(PSQL_DSN)
+from back_office.config import PSQL_DSN, PSQL_POOL_SIZE
+from back_office.helpers.am_cache import CachedDataFetcher
+from back_office.helpers.data_fetcher import BackOfficeDataFetcher
+from back_office.helpers.db_pool import DataFetcherPool, PooledDataFetcher
+from back_office.helpers.request_cache import RequestScopedDataFetcher
+
+DATA_FETCHER_POOL = DataFetcherPool(PSQL_DSN, PSQL_POOL_SIZE, factory=BackOfficeDataFetcher)
+DATA_FETCHER = RequestScopedDataFetcher(CachedDataFetcher(PooledDataFetcher(DATA_FETCHER_POOL), PSQL_DSN))
 
 
 @lru_cache
@@ -0,0 +1,41 @@
+"""Compares full and fast extraction of the content div of saved AIDA pages.
+
+    PYTHONPATH=. python scripts/benchmark_aida_parsing.py [page.html ...] [--nb-runs 200]
+
+Without argument, the test fixture page is used.
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import List
+
+from back_office.helpers.aida import _content_div
+
+_FIXTURE = Path(__file__).parent.parent / 'tests' / 'data' / 'aida_page.html'
+
+
+def _mean_ms(page: str, fast: bool, nb_runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(nb_runs):
+        _content_div(page, fast)
+    return 1000 * (time.perf_counter() - start) / nb_runs
+
+
+def benchmark(filenames: List[str], nb_runs: int) -> None:
+    print(f'{"page":<30}{"size (kB)":>12}{"full (ms)":>12}{"fast (ms)":>12}')
+    for filename in filenames:
+        page = Path(filename).read_text()
+        full, fast = _mean_ms(page, False, nb_runs), _mean_ms(page, True, nb_runs)
+        print(f'{Path(filename).name:<30}{len(page) / 1000:>12.1f}{full:>12.3f}{fast:>12.3f}')
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('filenames', nargs='*', default=[str(_FIXTURE)], help='Saved AIDA pages.')
+    parser.add_argument('--nb-runs', type=int, default=200, help='Number of parses of each page.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = _parse_args()
+    benchmark(args.filenames, args.nb_runs)
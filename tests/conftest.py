@@ -0,0 +1,24 @@
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+import pytest
+
+if TYPE_CHECKING:
+    from back_office.helpers.data_fetcher import BackOfficeDataFetcher
+
+
+@pytest.fixture
+def psql_fetcher() -> Iterator['BackOfficeDataFetcher']:
+    # Runs against the database of TEST_PSQL_DSN (set in CI): rows written by queries that bypass the
+    # envinorma API must be read back by envinorma. Missing tables are created as in the backups.
+    if not os.environ.get('TEST_PSQL_DSN'):
+        pytest.skip('TEST_PSQL_DSN is not set.')
+    from back_office.helpers.data_fetcher import BackOfficeDataFetcher
+
+    fetcher = BackOfficeDataFetcher(os.environ['TEST_PSQL_DSN'])
+    with fetcher.psql_conn.cursor() as cursor:
+        cursor.execute((Path(__file__).parent / 'data' / 'envinorma_schema.sql').read_text())
+    fetcher.psql_conn.commit()
+    yield fetcher
+    fetcher.psql_conn.close()
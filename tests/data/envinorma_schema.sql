@@ -0,0 +1,4 @@
+-- Tables of the envinorma storage that back_office queries directly, as restored from the backups.
+CREATE TABLE IF NOT EXISTS am_structure (am_id TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS parametrization (am_id TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS am_metadata (am_id TEXT PRIMARY KEY, data TEXT NOT NULL);
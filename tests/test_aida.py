@@ -1,4 +1,15 @@
-from back_office.helpers.aida import _truncate_title
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4.element import Comment
+from envinorma.io.parse_html import extract_text_elements
+from envinorma.models import StructuredText
+from envinorma.models.text_elements import EnrichedString
+
+from back_office.helpers import aida
+from back_office.helpers.aida import _clean_section, _content_div, _download_html, _truncate_title
+
+_AIDA_PAGE = Path(__file__).parent / 'data' / 'aida_page.html'
 
 
 def test_truncate_title():
@@ -9,3 +20,71 @@ def test_truncate_title():
     title = "Article 1er de l'arrêté du 28 juin 2013"
     truncated_title = _truncate_title(title)
     assert truncated_title == 'Article 1er'
+
+
+class _FakeResponse:
+    def __init__(self, status_code: int, content: bytes = b'', headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+class _FakeSession:
+    def __init__(self):
+        self.requests_headers: List[Dict[str, str]] = []
+
+    def get(self, url: str, headers: Dict[str, str], timeout: Any):
+        self.requests_headers.append(headers)
+        if headers.get('If-None-Match') == '"v1"':
+            return _FakeResponse(304)
+        return _FakeResponse(200, b'<html>v1</html>', {'ETag': '"v1"'})
+
+
+def test_download_html_revalidates_cached_pages(monkeypatch, tmp_path):
+    session = _FakeSession()
+    monkeypatch.setattr(aida, '_CACHE_DIRECTORY', str(tmp_path))
+    monkeypatch.setattr(aida, '_session', lambda: session)
+    assert _download_html('123') == '<html>v1</html>'
+    assert _download_html('123') == '<html>v1</html>'
+    assert session.requests_headers == [{}, {'If-None-Match': '"v1"'}]
+
+
+def test_fast_parsing_is_equivalent_to_full_parsing():
+    page = _AIDA_PAGE.read_text()
+    full_div, fast_div = _content_div(page, fast=False), _content_div(page, fast=True)
+    assert full_div is not None and fast_div is not None
+    assert extract_text_elements(fast_div) == extract_text_elements(full_div)
+    assert _content_div('<html><body><div id="content"></div></body></html>') is None
+
+
+def test_content_div_drops_comments():
+    page = '<div id="content-inner"><p>Article<!-- note -->1</p><!-- <p>hidden</p> --></div>'
+    for fast in (False, True):
+        content_div = _content_div(page, fast)
+        assert content_div is not None
+        assert not content_div.find_all(text=lambda text: isinstance(text, Comment))
+        assert content_div.get_text() == 'Article1'
+
+
+def _text(title: str, alineas: List[str], sections: List[StructuredText]) -> StructuredText:
+    return StructuredText(EnrichedString(title), [EnrichedString(alinea) for alinea in alineas], sections, None)
+
+
+def _summary(text: StructuredText) -> Tuple[str, List[str], List[Any]]:
+    return text.title.text, [alinea.text for alinea in text.outer_alineas], [_summary(sec) for sec in text.sections]
+
+
+def test_clean_section():
+    long_title = "Article 1er de l'arrêté du 28 juin 2013"
+    text = _text(
+        'Arrêté',
+        [' Préambule ', ''],
+        [
+            _text('Titre', ['Avant les visas'], []),
+            _text('Vus', ['Vu le code'], []),
+            _text(long_title, ['  ', 'Alinéa '], [_text(long_title, [' '], [])]),
+        ],
+    )
+    expected = ('Arrêté', ['Préambule'], [('Article 1er', ['Alinéa'], [('Article 1er', [], [])])])
+    assert _summary(_clean_section(text)) == expected
+    assert text.sections[2].title.text == long_title
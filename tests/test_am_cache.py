@@ -0,0 +1,113 @@
+from envinorma.models import ArreteMinisteriel
+from envinorma.models.text_elements import EnrichedString
+from envinorma.parametrization import AMWarning, Parametrization
+
+from back_office.helpers.am_cache import CachedDataFetcher, VersionedLRUCache, _parse_payload, _payload
+
+
+def test_versioned_lru_cache():
+    cache: VersionedLRUCache[str] = VersionedLRUCache(2)
+    assert cache.get('a') is None
+    assert cache.put('a', 'A', cache.version('a'))
+    assert cache.put('b', 'B', cache.version('b'))
+    assert cache.get('a') == 'A'
+    assert cache.put('c', 'C', cache.version('c'))
+    assert cache.get('b') is None  # least recently used
+    assert cache.get('a') == 'A'
+    assert len(cache) == 2
+
+
+def test_versioned_lru_cache_invalidation():
+    cache: VersionedLRUCache[str] = VersionedLRUCache(10)
+    version = cache.version('a')
+    cache.invalidate('a')  # concurrent write while 'a' was loading
+    assert not cache.put('a', 'stale', version)
+    assert cache.get('a') is None
+    assert cache.put('a', 'A', cache.version('a'))
+    cache.clear()
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_versioned_lru_cache_expiration():
+    cache: VersionedLRUCache[str] = VersionedLRUCache(10, ttl_seconds=0.0)
+    assert cache.put('a', 'A', cache.version('a'))
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_payload():
+    assert _parse_payload('token:' + _payload(('am', 'JORFTEXT:1'))) == ('am', 'JORFTEXT:1')
+
+
+def test_versioned_lru_cache_forgets_old_invalidations():
+    cache: VersionedLRUCache[str] = VersionedLRUCache(10, max_tracked_invalidations=2)
+    version = cache.version('a')
+    for key in 'abc':
+        cache.invalidate(key)
+    assert len(cache._invalidations) == 2
+    assert not cache.put('a', 'stale', version)  # invalidation of 'a' forgotten, 'a' may be stale
+    assert not cache.put('d', 'D', version)  # loaded before the forgotten invalidation
+    assert cache.put('d', 'D', cache.version('d'))
+
+
+class _FakeChannel:
+    def poll(self):
+        return []
+
+    def notify(self, payload):
+        pass
+
+
+class _FakeFetcher:
+    def __init__(self):
+        self.nb_calls = 0
+
+    def load_all_am_metadata(self, with_deleted_ams=False):
+        self.nb_calls += 1
+        return {}
+
+    def load_am_dict(self, am_id):
+        self.nb_calls += 1
+        return ArreteMinisteriel(title=EnrichedString('Arrêté'), sections=[], visa=[], id=am_id).to_dict()
+
+    def load_or_init_parametrization(self, am_id):
+        self.nb_calls += 1
+        return Parametrization([], [], [])
+
+
+def _cached_fetcher(fetcher: _FakeFetcher) -> CachedDataFetcher:
+    cached_fetcher = CachedDataFetcher(fetcher, 'dsn', {'am': 1, 'parametrization': 1, 'all_metadata': 1})
+    cached_fetcher._channel = _FakeChannel()
+    return cached_fetcher
+
+
+def test_cached_data_fetcher_rebuilds_values_on_each_read():
+    fetcher = _FakeFetcher()
+    cached_fetcher = _cached_fetcher(fetcher)
+    assert cached_fetcher.load_all_am_metadata() == cached_fetcher.load_all_am_metadata() == {}
+    assert cached_fetcher.load_am('am-1') == cached_fetcher.load_am('am-1')
+    assert cached_fetcher.load_am('am-1') is not cached_fetcher.load_am('am-1')
+    assert fetcher.nb_calls == 2  # AMs and metadata are cached separately
+
+
+def test_cached_data_fetcher_is_not_corrupted_by_callers():
+    fetcher = _FakeFetcher()
+    cached_fetcher = _cached_fetcher(fetcher)
+    for _ in range(2):
+        am = cached_fetcher.load_am('am-1')
+        am.title.text = 'edited'
+        am.visa.append(EnrichedString('edited'))
+        cached_fetcher.load_or_init_parametrization('am-1').warnings.append(AMWarning('section-1', 'edited'))
+    assert cached_fetcher.load_am('am-1') == ArreteMinisteriel(EnrichedString('Arrêté'), [], [], id='am-1')
+    assert cached_fetcher.load_or_init_parametrization('am-1') == Parametrization([], [], [])
+    assert fetcher.nb_calls == 2
+
+
+def test_cached_data_fetcher_entries_expire():
+    fetcher = _FakeFetcher()
+    cached_fetcher = _cached_fetcher(fetcher)
+    cached_fetcher._caches['am'].ttl_seconds = 0.0  # written by another process, without notification
+    cached_fetcher.load_am('am-1')
+    cached_fetcher.load_am('am-1')
+    assert fetcher.nb_calls == 2
@@ -0,0 +1,26 @@
+import pytest
+
+from back_office.helpers.am_encoding import AMCodec, UnknownDictionaryError, frame_dictionary_id, train_dictionary
+
+
+def _am_dict(index: int):
+    sections = [{'title': {'text': f'Article {i}'}, 'outer_alineas': [{'text': 'Texte ' * i}]} for i in range(index)]
+    return {'id': f'JORFTEXT{index:012}', 'title': {'text': 'Arrêté du 01/01/21'}, 'sections': sections}
+
+
+def test_codec_round_trip():
+    am_dict = _am_dict(5)
+    assert AMCodec().decode(AMCodec().encode(am_dict)) == am_dict
+
+
+def test_codec_with_dictionaries():
+    samples = [_am_dict(i) for i in range(200)]
+    old_dictionary, new_dictionary = train_dictionary(samples[:100]), train_dictionary(samples[100:])
+    old_codec = AMCodec([old_dictionary])
+    codec = AMCodec([old_dictionary, new_dictionary])
+
+    old_blob, blob = old_codec.encode(samples[3]), codec.encode(samples[3])
+    assert frame_dictionary_id(blob) == codec.current_dictionary_id != old_codec.current_dictionary_id
+    assert codec.decode(old_blob) == codec.decode(blob) == samples[3]
+    with pytest.raises(UnknownDictionaryError):
+        old_codec.decode(blob)
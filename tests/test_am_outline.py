@@ -0,0 +1,35 @@
+from envinorma.models import Annotations, ArreteMinisteriel, StructuredText
+from envinorma.models.text_elements import estr
+from envinorma.topics.patterns import TopicName
+
+from back_office.helpers.am_outline import AMOutline, outline_from_am, outline_from_dict
+
+
+def _get_am() -> ArreteMinisteriel:
+    subsections = [StructuredText(estr('Article 1.1'), [estr('al1.1.1'), estr('al1.1.2')], [], None)]
+    section = StructuredText(estr('Article 1'), [estr('al1.1'), estr('al1.2')], subsections, None)
+    section.annotations = Annotations(topic=list(TopicName)[0])
+    return ArreteMinisteriel(estr('Arrêté du 10/10/10'), [section], [], None, id='JORFTEXT')
+
+
+def test_outline_from_am():
+    am = _get_am()
+    outline = outline_from_am(am)
+    assert outline.id == 'JORFTEXT'
+    assert [(section.title, section.depth) for section in outline.descendent_sections()] == [
+        ('Article 1', 1),
+        ('Article 1.1', 2),
+    ]
+    assert outline.sections[0].id == am.sections[0].id
+    assert outline.sections[0].topic == list(TopicName)[0]
+    assert outline.sections[0].sections[0].topic is None
+
+
+def test_outline_from_dict():
+    am = _get_am()
+    assert outline_from_dict(am.to_dict()) == outline_from_am(am)
+
+
+def test_outline_to_dict():
+    outline = outline_from_am(_get_am())
+    assert AMOutline.from_dict(outline.to_dict()) == outline
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+from envinorma.models.am_applicability import AMApplicability
+from envinorma.topics.patterns import TopicName
+
+from back_office.helpers.am_outline import AMOutline, SectionOutline
+from back_office.helpers.am_patch import AMPatch, applicability_patch, patch_query, section_path, topic_patch
+
+
+def _outline() -> AMOutline:
+    leaf = SectionOutline('c', 'Article 2.1', 2, None, [])
+    sections = [SectionOutline('a', 'Article 1', 1, None, []), SectionOutline('b', 'Article 2', 1, None, [leaf])]
+    return AMOutline('JORFTEXT', 'Arrêté', sections)
+
+
+def test_section_path():
+    assert section_path(_outline(), 'a') == ['sections', '0']
+    assert section_path(_outline(), 'c') == ['sections', '1', 'sections', '0']
+    with pytest.raises(ValueError):
+        section_path(_outline(), 'unknown')
+
+
+def test_topic_patch():
+    patch = topic_patch(_outline(), 'c', None)
+    assert patch.path == ['sections', '1', 'sections', '0', 'annotations']
+    assert patch.changes == {'topic': None}
+    assert patch.expected == [(['sections', '1', 'sections', '0', 'id'], ['c'])]
+    assert topic_patch(_outline(), 'a', list(TopicName)[0]).changes['topic'] is not None
+
+
+def test_topic_patch_expects_no_topic_in_ascendants_and_descendants():
+    topic = list(TopicName)[0]
+    assert topic_patch(_outline(), 'b', topic).expected == [
+        (['sections', '1', 'id'], ['b']),
+        (['sections', '1', 'sections', '0', 'annotations', 'topic'], [None]),
+    ]
+    assert topic_patch(_outline(), 'c', topic).expected == [
+        (['sections', '1', 'sections', '0', 'id'], ['c']),
+        (['sections', '1', 'annotations', 'topic'], [None]),
+    ]
+    assert topic_patch(_outline(), 'a', topic).expected == [(['sections', '0', 'id'], ['a'])]
+
+
+def test_patch_query():
+    query, params = patch_query('JORFTEXT', AMPatch(['sections', '0'], {'a': 1}, [(['id'], ['x', None])]))
+    assert query.count('%s') == len(params)
+    assert query.endswith('RETURNING data;')
+    assert params == [['sections', '0'], ['sections', '0'], json.dumps({'a': 1}), 'JORFTEXT', ['id'], ['"x"', 'null']]
+
+    query, params = patch_query('JORFTEXT', AMPatch([], {'a': 1}, []))
+    assert query.count('%s') == len(params) == 2
+
+
+def test_applicability_patch():
+    stored = {'warnings': ['Ancien avertissement'], 'legacy_key': True}
+    patch = applicability_patch(AMApplicability(['Avertissement'], None), stored)
+    assert patch.path == []
+    assert patch.changes == {'applicability': AMApplicability(['Avertissement'], None).to_dict()}
+    assert patch.expected == [(['applicability'], [stored])]
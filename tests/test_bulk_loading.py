@@ -0,0 +1,119 @@
+import os
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from envinorma.models import AMMetadata, AMSource, AMState, ArreteMinisteriel, Classement, Regime
+from envinorma.models.structured_text import StructuredText
+from envinorma.models.text_elements import EnrichedString
+
+from back_office.config import AMStorageFormat
+from back_office.helpers import bulk_loading
+from back_office.helpers.data_fetcher import BackOfficeDataFetcher
+from back_office.helpers.db_pool import DataFetcherPool
+from back_office.helpers.psql_tables import AM_TABLE
+
+
+class _FakeCursor:
+    def __init__(self, connection: '_FakeConnection'):
+        self.connection = connection
+        self.itersize = 2000
+
+    def __enter__(self) -> '_FakeCursor':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+    def execute(self, query: str, params: Tuple[List[str]]) -> None:
+        self.connection.queries.append(query)
+        self.am_ids = params[0]
+
+    def __iter__(self):
+        for am_id in self.am_ids:
+            yield am_id, None, self.connection.ams[am_id]
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.queries: List[str] = []
+        self.ams: Dict[str, Any] = {}
+        self.metadata: Dict[str, AMMetadata] = {}
+
+    def cursor(self, name: Optional[str] = None) -> _FakeCursor:
+        return _FakeCursor(self)
+
+    def rollback(self) -> None:
+        pass
+
+
+class _FakeFetcher(BackOfficeDataFetcher):
+    storage_format = AMStorageFormat.JSON
+    connection = _FakeConnection()
+
+    def __init__(self, psql_dsn: str):
+        self.psql_conn = self.connection
+        self._codec = None
+
+    def load_all_am_metadata(self, with_deleted_ams: bool = False) -> Dict[str, AMMetadata]:
+        return dict(self.connection.metadata)
+
+
+def _metadata(cid: str, state: AMState = AMState.VIGUEUR, classements: Optional[List[Classement]] = None) -> AMMetadata:
+    return AMMetadata(
+        aida_page='5619',
+        title='Arrêté relatif aux...',
+        nor=None,
+        classements=classements or [],
+        cid=cid,
+        state=state,
+        date_of_signature=date(2010, 1, 1),
+        source=AMSource.LEGIFRANCE,
+        is_transverse=False,
+        nickname=None,
+    )
+
+
+def test_iter_ams_runs_a_single_query(monkeypatch):
+    connection = _FakeConnection()
+    monkeypatch.setattr(_FakeFetcher, 'connection', connection)
+    monkeypatch.setattr(bulk_loading, 'DATA_FETCHER_POOL', DataFetcherPool('dsn', 1, factory=_FakeFetcher))
+    am_ids = [f'AM-{i:02}' for i in range(50)]
+    for index, am_id in enumerate(reversed(am_ids)):
+        connection.ams[am_id] = ArreteMinisteriel(title=EnrichedString(am_id), sections=[], visa=[], id=am_id).to_dict()
+        connection.metadata[am_id] = _metadata(am_id, AMState.VIGUEUR if index % 2 else AMState.ABROGE)
+
+    bundles = list(bulk_loading.iter_ams(AMState.VIGUEUR))
+
+    assert len(connection.queries) == 1
+    assert 'parametrization' not in connection.queries[0]
+    in_force_ids = [am_id for am_id in am_ids if connection.metadata[am_id].state == AMState.VIGUEUR]
+    assert len(in_force_ids) == 25
+    assert [bundle.am.id for bundle in bundles] == in_force_ids
+    assert [bundle.metadata.cid for bundle in bundles] == in_force_ids
+    assert [bundle.am.id for bundle in bulk_loading.iter_ams(None)] == am_ids
+
+
+def _am_with_variants(am_id: str) -> ArreteMinisteriel:
+    sections = [
+        StructuredText(EnrichedString(f'Article {index}'), [EnrichedString(f'Alinéa {index}')], [], None)
+        for index in range(1, 4)
+    ]
+    return ArreteMinisteriel(title=EnrichedString('Arrêté du 1er janvier 2020'), sections=sections, visa=[], id=am_id)
+
+
+def test_enriched_am_matches_build_enriched_ams(psql_fetcher, monkeypatch):
+    am_id = 'TEST-ENRICHED-AM'
+    metadata = _metadata(am_id, classements=[Classement('2760', Regime.A, '1'), Classement('2760', Regime.E, '2')])
+    pool = DataFetcherPool(os.environ['TEST_PSQL_DSN'], 1, factory=BackOfficeDataFetcher)
+    monkeypatch.setattr(bulk_loading, 'DATA_FETCHER_POOL', pool)
+    try:
+        psql_fetcher.upsert_am(am_id, _am_with_variants(am_id))
+        psql_fetcher.upsert_am_metadata(metadata)
+        expected = {am.id: am for am in psql_fetcher.build_enriched_ams()}[am_id]
+        bundle = next(bundle for bundle in bulk_loading.iter_ams(AMState.VIGUEUR) if bundle.am.id == am_id)
+        assert bundle.enriched_am().to_dict() == expected.to_dict()
+    finally:
+        with psql_fetcher.psql_conn.cursor() as cursor:
+            for table in (AM_TABLE, 'am_metadata'):
+                cursor.execute(f'DELETE FROM {table} WHERE am_id = %s;', (am_id,))
+        psql_fetcher.psql_conn.commit()
@@ -0,0 +1,30 @@
+import csv
+from dataclasses import asdict, fields
+
+from envinorma.models import StructuredText
+from envinorma.models.text_elements import EnrichedString
+
+from back_office.crawl_aida import AIDACrawlRow, _keep_successful_rows, count_sections
+
+
+def _section(*sections: StructuredText) -> StructuredText:
+    return StructuredText(EnrichedString(''), [], list(sections), None)
+
+
+def test_count_sections():
+    assert count_sections([]) == 0
+    assert count_sections([_section(_section(), _section(_section())), _section()]) == 5
+
+
+def test_keep_successful_rows(tmp_path):
+    filename = str(tmp_path / 'report.csv')
+    field_names = [field.name for field in fields(AIDACrawlRow)]
+    assert _keep_successful_rows(filename, field_names) == set()
+    with open(filename, 'w', newline='') as file_:
+        writer = csv.DictWriter(file_, fieldnames=field_names)
+        writer.writeheader()
+        writer.writerow(asdict(AIDACrawlRow('JORFTEXT1', '123', True, 3, 2, 0.9)))
+        writer.writerow(asdict(AIDACrawlRow('JORFTEXT2', '456', False, error='ValueError')))
+    assert _keep_successful_rows(filename, field_names) == {'JORFTEXT1'}
+    with open(filename, newline='') as file_:
+        assert [row['am_id'] for row in csv.DictReader(file_)] == ['JORFTEXT1']
@@ -0,0 +1,166 @@
+import json
+from typing import Any, Dict, List
+
+import pytest
+from envinorma.models import ArreteMinisteriel, StructuredText
+from envinorma.models.am_applicability import AMApplicability
+from envinorma.models.text_elements import EnrichedString
+from envinorma.parametrization import AMWarning, Parametrization
+from envinorma.topics.patterns import TopicName
+
+from back_office.config import AMStorageFormat
+from back_office.helpers.am_outline import outline_from_am
+from back_office.helpers.am_patch import AMPatch, StaleAMError, applicability_patch, section_path, topic_patch
+from back_office.helpers.data_fetcher import BackOfficeDataFetcher, add_parameters
+from back_office.helpers.psql_tables import AM_TABLE, PARAMETRIZATION_TABLE
+
+
+def test_add_parameters():
+    parametrization = Parametrization(inapplicable_sections=[], alternative_sections=[], warnings=[])
+    warnings = [AMWarning('section-1', 'Avertissement 1'), AMWarning('section-2', 'Avertissement 2')]
+    result = add_parameters(parametrization, warnings)
+    assert [warning.section_id for warning in result.warnings] == ['section-1', 'section-2']
+
+    result = add_parameters(result, [AMWarning('section-3', 'Avertissement 3')], warnings[0].id)
+    assert [warning.section_id for warning in result.warnings] == ['section-3', 'section-2']
+    assert result.warnings[0].id == warnings[0].id
+
+    with pytest.raises(ValueError):
+        add_parameters(result, warnings, warnings[0].id)
+    with pytest.raises(ValueError):
+        add_parameters(result, [warnings[0]], 'unknown-id')
+
+
+def _delete(fetcher: BackOfficeDataFetcher, table: str, am_id: str) -> None:
+    with fetcher.psql_conn.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE am_id = %s;', (am_id,))
+    fetcher.psql_conn.commit()
+
+
+def test_upsert_parameters_round_trips_through_envinorma(psql_fetcher):
+    am_id = 'TEST-UPSERT-PARAMETERS'
+    first_warning = AMWarning('section-1', 'Avertissement 1')
+    new_warnings = [AMWarning('section-2', 'Avertissement 2'), AMWarning('section-3', 'Avertissement 3')]
+    try:
+        psql_fetcher.upsert_parameter(am_id, first_warning, None)
+        psql_fetcher.upsert_parameters(am_id, new_warnings)
+        parametrization = psql_fetcher.load_parametrization(am_id)
+        assert parametrization is not None
+        assert parametrization.warnings == [first_warning, *new_warnings]
+    finally:
+        _delete(psql_fetcher, PARAMETRIZATION_TABLE, am_id)
+
+
+def test_patch_am_round_trips_through_envinorma(psql_fetcher):
+    am_id = 'TEST-PATCH-AM'
+    am = ArreteMinisteriel(title=EnrichedString('Arrêté du 1er janvier 2020'), sections=[], visa=[], id=am_id)
+    applicability = AMApplicability(['Avertissement'], None)
+    try:
+        psql_fetcher.upsert_am(am_id, am)
+        psql_fetcher.patch_am(am_id, applicability_patch(applicability, am.to_dict().get('applicability')))
+        patched_am = psql_fetcher.load_am(am_id)
+        assert patched_am is not None
+        assert patched_am.applicability == applicability
+    finally:
+        _delete(psql_fetcher, AM_TABLE, am_id)
+
+
+def test_conflicting_topic_patches_are_rejected(psql_fetcher):
+    am_id = 'TEST-TOPIC-PATCH'
+    subsection = StructuredText(EnrichedString('Article 1.1'), [EnrichedString('Alinéa 1.1')], [], None)
+    section = StructuredText(EnrichedString('Article 1'), [], [subsection], None)
+    am = ArreteMinisteriel(title=EnrichedString('Arrêté du 1er janvier 2020'), sections=[section], visa=[], id=am_id)
+    topic = list(TopicName)[0]
+    try:
+        psql_fetcher.upsert_am(am_id, am)
+        outline = psql_fetcher.load_am_outline(am_id)
+        parent_patch = topic_patch(outline, section.id, topic)
+        child_patch = topic_patch(outline, subsection.id, topic)  # computed concurrently, from the same outline
+        psql_fetcher.patch_am(am_id, parent_patch)
+        with pytest.raises(StaleAMError):
+            psql_fetcher.patch_am(am_id, child_patch)
+        patched_outline = psql_fetcher.load_am_outline(am_id)
+        assert patched_outline.sections[0].topic == topic
+        assert patched_outline.sections[0].sections[0].topic is None
+    finally:
+        _delete(psql_fetcher, AM_TABLE, am_id)
+
+
+def test_load_am_section_round_trips_through_envinorma(psql_fetcher):
+    am_id = 'TEST-LOAD-AM-SECTION'
+    subsection = StructuredText(EnrichedString('Article 2.1'), [EnrichedString('Alinéa 2.1')], [], None)
+    sections = [
+        StructuredText(EnrichedString('Article 1'), [EnrichedString('Alinéa 1')], [], None),
+        StructuredText(EnrichedString('Article 2'), [], [subsection], None),
+    ]
+    am = ArreteMinisteriel(title=EnrichedString('Arrêté du 1er janvier 2020'), sections=sections, visa=[], id=am_id)
+    try:
+        psql_fetcher.upsert_am(am_id, am)
+        outline = psql_fetcher.load_am_outline(am_id)
+        assert outline == outline_from_am(am)
+        section = psql_fetcher.load_am_section(am_id, section_path(outline, subsection.id))
+        assert section is not None
+        assert section.to_dict() == subsection.to_dict()
+    finally:
+        _delete(psql_fetcher, AM_TABLE, am_id)
+
+
+class _FakeCursor:
+    def __init__(self, rows: List[Any]):
+        self.rows = rows
+        self.rowcount = len(rows)
+
+    def __enter__(self) -> '_FakeCursor':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+    def execute(self, query: str, params: List[Any]) -> None:
+        pass
+
+    def fetchone(self) -> Any:
+        return self.rows[0]
+
+
+class _FakeConnection:
+    def __init__(self, rows: List[Any]):
+        self.rows = rows
+
+    def cursor(self) -> _FakeCursor:
+        return _FakeCursor(self.rows)
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+
+class _FakeFetcher(BackOfficeDataFetcher):
+    storage_format = AMStorageFormat.COMPACT
+
+    def __init__(self, rows: List[Any]):
+        self.psql_conn = _FakeConnection(rows)
+        self.compact_upserts: List[Dict[str, Any]] = []
+
+    def upsert_compact_am(self, am_id: str, am_dict: Dict[str, Any]) -> None:
+        self.compact_upserts.append(am_dict)
+
+
+def test_patch_am_reencodes_the_compact_blob():
+    fetcher = _FakeFetcher([('{"id": "JORFTEXT", "applicability": {}}',)])
+    fetcher.patch_am('JORFTEXT', AMPatch([], {'applicability': {}}, []))
+    assert fetcher.compact_upserts == [{'id': 'JORFTEXT', 'applicability': {}}]
+
+    fetcher = _FakeFetcher([])
+    with pytest.raises(StaleAMError):
+        fetcher.patch_am('JORFTEXT', AMPatch([], {'applicability': {}}, []))
+    assert fetcher.compact_upserts == []
+
+
+def test_load_am_outline_reads_the_stored_outline():
+    am = ArreteMinisteriel(title=EnrichedString('Arrêté du 1er janvier 2020'), sections=[], visa=[], id='JORFTEXT')
+    outline = outline_from_am(am)
+    fetcher = _FakeFetcher([(json.dumps(outline.to_dict()),)])
+    assert fetcher.load_am_outline('JORFTEXT') == outline
@@ -0,0 +1,87 @@
+import logging
+
+import psycopg2
+import pytest
+
+from back_office.helpers import db_pool
+from back_office.helpers.db_pool import DataFetcherPool, PoolTimeoutError
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.nb_rollbacks = 0
+
+    def rollback(self) -> None:
+        self.nb_rollbacks += 1
+
+    def close(self) -> None:
+        pass
+
+
+class _FakeFetcher:
+    def __init__(self, psql_dsn: str):
+        self.psql_dsn = psql_dsn
+        self.psql_conn = _FakeConnection()
+
+
+def test_data_fetcher_pool():
+    pool = DataFetcherPool('dsn', max_size=1, timeout_seconds=0.01, factory=_FakeFetcher)  # type: ignore
+    with pool.checkout() as fetcher:
+        first_fetcher = fetcher
+        with pytest.raises(PoolTimeoutError):
+            with pool.checkout():
+                pass
+    with pool.checkout() as fetcher:
+        assert fetcher is first_fetcher
+    metrics = pool.metrics()
+    assert metrics.checkouts == 2
+    assert metrics.timeouts == 1
+
+
+def test_data_fetcher_pool_discards_broken_connections():
+    pool = DataFetcherPool('dsn', max_size=1, factory=_FakeFetcher)  # type: ignore
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.checkout() as fetcher:
+            first_fetcher = fetcher
+            raise psycopg2.OperationalError
+    with pool.checkout() as fetcher:
+        assert fetcher is not first_fetcher
+    assert pool.metrics().discarded_connections == 1
+
+
+def test_data_fetcher_pool_recovers_from_failed_connections():
+    nb_failures = [2]
+
+    def _factory(psql_dsn: str) -> _FakeFetcher:
+        if nb_failures[0]:
+            nb_failures[0] -= 1
+            raise psycopg2.OperationalError
+        return _FakeFetcher(psql_dsn)
+
+    pool = DataFetcherPool('dsn', max_size=2, timeout_seconds=0.01, factory=_factory)  # type: ignore
+    for _ in range(2):
+        with pytest.raises(psycopg2.OperationalError):
+            with pool.checkout():
+                pass
+    with pool.checkout() as fetcher:
+        assert isinstance(fetcher, _FakeFetcher)
+
+
+def test_data_fetcher_pool_rolls_back_released_connections():
+    pool = DataFetcherPool('dsn', max_size=1, factory=_FakeFetcher)  # type: ignore
+    with pytest.raises(KeyError):
+        with pool.checkout() as fetcher:
+            raise KeyError
+    with pool.checkout() as fetcher:
+        pass
+    assert fetcher.psql_conn.nb_rollbacks == 2
+
+
+def test_data_fetcher_pool_logs_its_metrics(monkeypatch, caplog):
+    monkeypatch.setattr(db_pool, '_METRICS_LOG_INTERVAL_SECONDS', 0.0)
+    pool = DataFetcherPool('dsn', max_size=2, factory=_FakeFetcher)  # type: ignore
+    with caplog.at_level(logging.INFO):
+        with pool.checkout():
+            pass
+    assert pool.metrics().connections == 1
+    assert '1/2 connections, 1 checkouts' in caplog.text
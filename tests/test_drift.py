@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from text_diff import text_differences
+
+from back_office.helpers.drift import AMDrift, drift_from_diff, sort_by_drift
+
+
+def test_drift_from_diff():
+    now = datetime(2021, 10, 1)
+    diff = text_differences(['a', 'b', 'c', 'd'], ['a', 'b', 'c', 'e', 'f'])
+    drift = drift_from_diff('JORFTEXT', diff, now)
+    assert drift.nb_changed_lines == len(diff.diff_lines) - 3
+    assert drift.similarity == 3 / len(diff.diff_lines)
+    assert drift_from_diff('JORFTEXT', text_differences([], []), now).similarity == 1.0
+
+
+def test_sort_by_drift():
+    now = datetime(2021, 10, 1)
+    drifts = [
+        AMDrift('A', 0, 1.0, now),
+        AMDrift('B', 0, 0.0, now, 'Error'),
+        AMDrift('C', 10, 0.5, now),
+        AMDrift('D', 20, 0.5, now),
+    ]
+    assert [drift.am_id for drift in sort_by_drift(drifts)] == ['D', 'C', 'A', 'B']
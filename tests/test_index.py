@@ -0,0 +1,46 @@
+from datetime import date
+
+from envinorma.models import AMMetadata, AMSource, AMState
+
+from back_office.pages.index import _ALL, _DELETED, _filter_and_sort, _nb_pages, _Sort
+
+
+def _metadata(cid: str, state: AMState, is_transverse: bool, year: int) -> AMMetadata:
+    return AMMetadata(
+        aida_page='5619',
+        title='Arrêté relatif aux...',
+        nor=None,
+        classements=[],
+        cid=cid,
+        state=state,
+        date_of_signature=date(year, 1, 1),
+        source=AMSource.LEGIFRANCE,
+        is_transverse=is_transverse,
+        nickname=None,
+    )
+
+
+def test_filter_and_sort():
+    metadata = [
+        _metadata('A', AMState.VIGUEUR, False, 2010),
+        _metadata('B', AMState.VIGUEUR, True, 2000),
+        _metadata('C', AMState.VIGUEUR, False, 2020),
+        _metadata('D', AMState.ABROGE, False, 2015),
+    ]
+    occs = {'A': 1, 'C': 3}
+
+    def _cids(state: str, transverse_only: bool, sort: _Sort):
+        return [md.cid for md in _filter_and_sort(metadata, occs, state, _ALL, transverse_only, sort)]
+
+    assert _cids(AMState.VIGUEUR.value, False, _Sort.RELEVANCE) == ['C', 'A', 'B']
+    assert _cids(AMState.VIGUEUR.value, True, _Sort.RELEVANCE) == ['B']
+    assert _cids(_DELETED, False, _Sort.RELEVANCE) == ['D']
+    assert _cids(_ALL, False, _Sort.DATE) == ['C', 'D', 'A', 'B']
+    assert _cids(_ALL, False, _Sort.CID) == ['A', 'B', 'C', 'D']
+    assert [md.cid for md in _filter_and_sort(metadata, occs, _ALL, AMSource.AIDA.value, False, _Sort.CID)] == []
+
+
+def test_nb_pages():
+    assert _nb_pages(0) == 1
+    assert _nb_pages(50) == 1
+    assert _nb_pages(51) == 2
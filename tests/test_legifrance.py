@@ -0,0 +1,98 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from leginorma import LegifranceRequestError
+
+from back_office.helpers import legifrance
+from back_office.helpers.legifrance import (
+    NO_CONSOLIDATION_ERROR_MESSAGE,
+    _consult_jorf,
+    _consult_law_decree,
+    _in_conversion_process,
+)
+
+
+class _FakeClient:
+    def __init__(self):
+        self.nb_calls = 0
+
+    def consult_law_decree(self, am_id: str, datetime_: datetime):
+        self.nb_calls += 1
+        if am_id == 'JORFTEXT-NOT-CONSOLIDATED':
+            raise LegifranceRequestError(NO_CONSOLIDATION_ERROR_MESSAGE)
+        if am_id == 'JORFTEXT-ERROR':
+            raise LegifranceRequestError('Quota exceeded')
+        if am_id == 'JORFTEXT-VERSIONED':
+            start = 1546300800000 if datetime_ >= datetime(2019, 1, 1) else 0  # 2019-01-01
+            end = 32472144000000 if datetime_ >= datetime(2019, 1, 1) else 1546300800000  # 2999-01-01
+            return {'id': am_id, 'dateDebutVersion': start, 'dateFinVersion': end}
+        return {'id': am_id, 'date': datetime_.isoformat()}
+
+    def consult_jorf(self, am_id: str):
+        self.nb_calls += 1
+        return {'id': am_id}
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    client = _FakeClient()
+    monkeypatch.setattr(legifrance, '_CACHE_DIRECTORY', str(tmp_path))
+    monkeypatch.setattr(legifrance, 'get_legifrance_client', lambda: client)
+    return client
+
+
+def test_response_cache(client):
+    response = {'id': 'JORFTEXT', 'date': '2020-01-01T00:00:00'}
+    assert _consult_law_decree('JORFTEXT', datetime(2020, 1, 1)) == (response, 'law_decree:2020-01-01')
+    _consult_law_decree('JORFTEXT', datetime(2020, 1, 1))
+    assert client.nb_calls == 1
+    _consult_law_decree('JORFTEXT', datetime(2020, 1, 2))
+    assert client.nb_calls == 2
+
+    assert _consult_law_decree('JORFTEXT-NOT-CONSOLIDATED', datetime(2020, 1, 1))[0] is None
+    assert _consult_law_decree('JORFTEXT-NOT-CONSOLIDATED', datetime(2020, 1, 1))[0] is None
+    assert client.nb_calls == 3
+    _consult_jorf('JORFTEXT-NOT-CONSOLIDATED')
+    _consult_jorf('JORFTEXT-NOT-CONSOLIDATED')
+    assert client.nb_calls == 4
+
+    for _ in range(2):
+        with pytest.raises(LegifranceRequestError):
+            _consult_law_decree('JORFTEXT-ERROR', datetime(2020, 1, 1))
+    assert client.nb_calls == 6
+
+
+def test_version_interval_cache(client):
+    assert _consult_law_decree('JORFTEXT-VERSIONED', datetime(2019, 3, 1))[1] == 'law_decree:2019-01-01'
+    assert _consult_law_decree('JORFTEXT-VERSIONED', datetime(2019, 3, 2))[1] == 'law_decree:2019-01-01'
+    assert _consult_law_decree('JORFTEXT-VERSIONED', datetime(2021, 1, 1))[1] == 'law_decree:2019-01-01'
+    assert client.nb_calls == 1
+    assert _consult_law_decree('JORFTEXT-VERSIONED', datetime(2018, 12, 31))[1] == 'law_decree:1970-01-01'
+    assert _consult_law_decree('JORFTEXT-VERSIONED', datetime(2010, 1, 1))[1] == 'law_decree:1970-01-01'
+    assert client.nb_calls == 2
+
+
+def _seeded_draws(seed: str):
+    random.seed(seed)
+    draws = []
+    for _ in range(5):
+        draws.append(random.random())
+        time.sleep(0.001)
+    return draws
+
+
+def test_conversions_do_not_share_the_global_random_generator():
+    expected_generator = random.Random('Arrêté')
+    expected = [expected_generator.random() for _ in range(5)]
+
+    def _draw_or_convert(index: int):
+        if index % 2:
+            return [random.random() for _ in range(100)]
+        return _in_conversion_process(_seeded_draws, 'Arrêté')
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(_draw_or_convert, range(16)))
+    assert all(result == expected for result in results[::2])
@@ -0,0 +1,120 @@
+import io
+import logging
+import random
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from back_office.helpers import legifrance_client
+from back_office.helpers.legifrance_client import SharedLegifranceClient, _backoff_seconds, _LegifranceAdapter
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(legifrance_client, '_CACHE_DIRECTORY', str(tmp_path))
+    return SharedLegifranceClient('id', 'secret', calls_per_second=1000)
+
+
+def _response(status_code: int, retry_after: Optional[str] = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(b'')
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return response
+
+
+def test_backoff_seconds():
+    assert _backoff_seconds(0, _response(503, '3600')) == legifrance_client._MAX_BACKOFF_SECONDS
+    assert _backoff_seconds(0, _response(503, '2')) == 2
+    assert _backoff_seconds(0, _response(503, 'Wed, 21 Oct 2015 07:28:00 GMT')) == 0
+    for nb_failed_attempts in range(10):
+        assert 0 <= _backoff_seconds(nb_failed_attempts, _response(503)) <= legifrance_client._MAX_BACKOFF_SECONDS
+    random.seed(0)
+    _backoff_seconds(3, None)
+    assert random.random() == random.Random(0).random()  # the global generator is left untouched
+
+
+class _FakeClient:
+    def __init__(self):
+        self.nb_rate_limiter_calls = 0
+        self.records: List[Tuple[str, bool, int]] = []
+
+    def wait_for_rate_limiter(self) -> None:
+        self.nb_rate_limiter_calls += 1
+
+    def record(self, route: str, latency_seconds: float, success: bool, nb_retries: int) -> None:
+        self.records.append((route, success, nb_retries))
+
+    def forget_token(self, authorization: str) -> None:
+        pass
+
+
+def test_each_attempt_goes_through_the_rate_limiter(monkeypatch):
+    statuses = [429, 503, 200]
+    monkeypatch.setattr(HTTPAdapter, 'send', lambda *args, **kwargs: _response(statuses.pop(0)))
+    monkeypatch.setattr(legifrance_client.time, 'sleep', lambda _: None)
+    client = _FakeClient()
+    adapter = _LegifranceAdapter(client)  # type: ignore
+    request = requests.Request('POST', 'https://legifrance.fr/lf-engine-app/consult/jorf').prepare()
+    assert adapter.send(request).status_code == 200
+    assert client.nb_rate_limiter_calls == 3
+    assert client.records == [('/consult/jorf', True, 2)]
+
+    statuses = [503] * legifrance_client._MAX_ATTEMPTS
+    assert adapter.send(request).status_code == 503
+    assert client.nb_rate_limiter_calls == 3 + legifrance_client._MAX_ATTEMPTS
+    assert client.records[-1] == ('/consult/jorf', False, legifrance_client._MAX_ATTEMPTS - 1)
+
+
+def test_leginorma_consult_methods_use_the_shared_session(client, monkeypatch):
+    # SharedLegifranceClient skips LegifranceClient.__init__: the consult methods of the pinned leginorma
+    # version must only rely on _update_client_if_necessary and _client.
+    urls = []
+    session = SimpleNamespace(post=lambda url, json: urls.append(url) or SimpleNamespace(status_code=200, json=dict))
+    monkeypatch.setattr(client, '_update_client_if_necessary', lambda: setattr(client, '_client', session))
+    assert client.consult_jorf('JORFTEXT') == {}
+    assert client.consult_law_decree('JORFTEXT') == {}
+    assert client.consult_article('LEGIARTI') == {}
+    assert [url.rsplit('/', 1)[-1] for url in urls] == ['jorf', 'lawDecree', 'getArticle']
+
+
+def test_token_is_shared(client, monkeypatch):
+    nb_token_calls = []
+
+    def _fake_fetch_token(client_id: str, client_secret: str):
+        nb_token_calls.append(client_id)
+        return {'access_token': f'token-{len(nb_token_calls)}', 'expires_in': 3600}
+
+    monkeypatch.setattr(legifrance_client, '_fetch_token', _fake_fetch_token)
+    assert client._shared_token()['access_token'] == 'token-1'
+    assert SharedLegifranceClient('id', 'secret')._shared_token()['access_token'] == 'token-1'
+    assert len(nb_token_calls) == 1
+
+    client.forget_token('Bearer another-token')
+    assert client._shared_token()['access_token'] == 'token-1'
+    client.forget_token('Bearer token-1')
+    assert client._shared_token()['access_token'] == 'token-2'
+
+
+def test_rate_limiter(client, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(legifrance_client.time, 'time', lambda: now[0])
+    client.calls_per_second = 2
+    assert client._take_rate_limiter_token() == 0
+    assert client._take_rate_limiter_token() == 0
+    assert client._take_rate_limiter_token() == pytest.approx(0.5)
+    now[0] = 0.5
+    assert client._take_rate_limiter_token() == 0
+
+
+def test_metrics_are_logged_periodically(client, monkeypatch, caplog):
+    monkeypatch.setattr(legifrance_client, '_METRICS_LOG_INTERVAL_SECONDS', 0.0)
+    with caplog.at_level(logging.INFO):
+        client.record('/consult/jorf', 0.5, True, 0)
+        client.record('/consult/jorf', 1.5, False, 2)
+    assert client.metrics()['/consult/jorf'].calls == 2
+    assert '2 calls, 1 failures, 2 retries, mean latency 1.00s, max latency 1.50s' in caplog.text
@@ -0,0 +1,39 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from back_office.helpers import ovh
+from back_office.helpers.ovh import OVHClient
+
+
+class _FakeSwiftService:
+    """Stand-in recording the objects sent to swift."""
+
+    def __init__(self):
+        self.uploads: List[Dict[str, Any]] = []
+        self.copies: List[Dict[str, Any]] = []
+
+    def upload(self, container: str, objects: List, options: Dict[str, Any]):
+        self.uploads.append({'container': container, 'objects': objects, 'options': options})
+        return [{'success': True}]
+
+    def copy(self, container: str, objects: List):
+        self.copies.append({'container': container, 'objects': objects})
+        return [{'success': container == 'am'}]
+
+
+def test_ovh_client(monkeypatch, tmp_path):
+    service = _FakeSwiftService()
+    monkeypatch.setattr(ovh, '_get_swift_service', lambda: service)
+    filename = tmp_path / 'archive.zip'
+    filename.write_bytes(b'0' * 100)
+
+    OVHClient.upload_document('am', str(filename), 'ams/archive.zip')
+    OVHClient.upload_document('am', str(filename), 'ams/archive.zip', segment_size=10)
+    assert service.uploads[0]['options'] == {}
+    assert service.uploads[1]['options'] == {'segment_size': 10, 'use_slo': True}
+
+    OVHClient.copy_document('am', 'ams/archive.zip', 'ams/latest.zip')
+    assert service.copies[0]['objects'][0].destination == '/am/ams/latest.zip'
+    with pytest.raises(ValueError):
+        OVHClient.copy_document('ap', 'archive.zip', 'latest.zip')
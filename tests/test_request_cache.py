@@ -0,0 +1,68 @@
+from collections import Counter
+from typing import Optional
+
+from flask import Flask
+
+from back_office.helpers.request_cache import RequestScopedDataFetcher, saved_round_trips
+
+
+class _FakeFetcher:
+    def __init__(self):
+        self.calls: Counter = Counter()
+
+    def load_am(self, am_id: str) -> Optional[str]:
+        self.calls['load_am'] += 1
+        return f'am-{am_id}'
+
+    def upsert_am(self, am_id: str, am: str) -> None:
+        self.calls['upsert_am'] += 1
+
+    def load_or_init_parametrization(self, am_id: str) -> str:
+        self.calls['load_or_init_parametrization'] += 1
+        return f'parametrization-{am_id}'
+
+    def remove_parameter(self, am_id: str, parameter_type: type, parameter_id: str) -> None:
+        self.calls['remove_parameter'] += 1
+
+
+def test_request_scoped_data_fetcher():
+    fake = _FakeFetcher()
+    fetcher = RequestScopedDataFetcher(fake)
+    with Flask(__name__).test_request_context():
+        assert fetcher.load_am('A') == 'am-A'
+        assert fetcher.load_am('A') == 'am-A'
+        assert fetcher.load_am('B') == 'am-B'
+        assert fake.calls['load_am'] == 2
+        fetcher.upsert_am('A', 'new-am-A')
+        assert fetcher.load_am('A') == 'new-am-A'
+        assert fake.calls['load_am'] == 2
+        fetcher.load_or_init_parametrization('A')
+        fetcher.remove_parameter('A', str, 'id')
+        fetcher.load_or_init_parametrization('A')
+        assert fake.calls['load_or_init_parametrization'] == 2
+        assert saved_round_trips() == 2
+
+    with Flask(__name__).test_request_context():
+        fetcher.load_am('A')
+        assert fake.calls['load_am'] == 3
+
+
+def test_request_scoped_data_fetcher_outside_request():
+    fake = _FakeFetcher()
+    fetcher = RequestScopedDataFetcher(fake)
+    fetcher.load_am('A')
+    fetcher.load_am('A')
+    assert fake.calls['load_am'] == 2
+    assert saved_round_trips() == 0
+
+
+def test_request_scoped_data_fetcher_prefetch():
+    fake = _FakeFetcher()
+    fetcher = RequestScopedDataFetcher(fake)
+    with Flask(__name__).test_request_context():
+        fetcher.prefetch([('am', 'A'), ('parametrization', 'A')])
+        assert fake.calls == Counter({'load_am': 1, 'load_or_init_parametrization': 1})
+        assert fetcher.load_am('A') == 'am-A'
+        assert fetcher.load_or_init_parametrization('A') == 'parametrization-A'
+        fetcher.prefetch([('am', 'A'), ('parametrization', 'A')])
+        assert fake.calls == Counter({'load_am': 1, 'load_or_init_parametrization': 1})
@@ -1,4 +1,4 @@
-from back_office.app import _ENDPOINT_TO_PAGE
+from back_office.app import _ENDPOINT_TO_PAGE, _ENDPOINT_TO_PREFETCHED_ENTITIES
 from back_office.routing import ROUTER, Endpoint
 
 
@@ -11,3 +11,9 @@ def test_routing():
             page = _ENDPOINT_TO_PAGE.get(Endpoint(rule.endpoint))
             assert page, f"{rule.endpoint} is not mapped to a page"
             assert arg in page.layout.__annotations__
+
+
+def test_prefetched_endpoints():
+    for endpoint in _ENDPOINT_TO_PREFETCHED_ENTITIES:
+        for rule in ROUTER.map.iter_rules(endpoint.value):
+            assert 'am_id' in rule.arguments, f'{rule.rule} has no am_id to prefetch'
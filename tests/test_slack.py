@@ -0,0 +1,36 @@
+import pytest
+
+from back_office.helpers import slack
+from back_office.helpers.slack import SlackChannel, _deliver_pending, coalesce
+
+
+def test_coalesce():
+    assert coalesce(['a']) == 'a'
+    assert coalesce(['a', 'a', 'b', 'a']) == 'a (x2)\nb\na'
+
+
+def test_deliver_pending(monkeypatch, tmp_path):
+    monkeypatch.setattr(slack, 'SLACK_OUTBOX_DIRECTORY', str(tmp_path))
+    posted = []
+    answers = [False, True]
+    monkeypatch.setattr(slack, '_post', lambda channel, text: posted.append(text) or answers.pop(0))
+    channel = SlackChannel.ENRICHMENT_NOTIFICATIONS.value
+    slack._outbox().extend([(channel, 'edited', 1e12), (channel, 'edited', 1e12 + 1)])
+    assert not _deliver_pending()
+    assert len(slack._outbox()) == 2
+    assert _deliver_pending()
+    assert len(slack._outbox()) == 0
+    assert posted == ['edited (x2)', 'edited (x2)']
+
+
+def test_deliver_pending_keeps_notifications_until_sent(monkeypatch, tmp_path):
+    monkeypatch.setattr(slack, 'SLACK_OUTBOX_DIRECTORY', str(tmp_path))
+
+    def _crash(channel, text):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(slack, '_post', _crash)
+    slack._outbox().append((SlackChannel.ENRICHMENT_NOTIFICATIONS.value, 'edited', 1e12))
+    with pytest.raises(KeyboardInterrupt):
+        _deliver_pending()
+    assert list(slack._outbox()) == [(SlackChannel.ENRICHMENT_NOTIFICATIONS.value, 'edited', 1e12)]
@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from back_office.helpers.upload_ams import Manifest, _check_and_serialize, _map_in_order
+
+
+def _slow_square(value: int) -> int:
+    time.sleep(0.01 * (value % 3))
+    return value ** 2
+
+
+def test_map_in_order():
+    consumed = []
+
+    def _values():
+        for value in range(20):
+            consumed.append(value)
+            yield value
+
+    with ThreadPoolExecutor(4) as executor:
+        results = _map_in_order(_slow_square, _values(), executor, max_pending=3)
+        assert next(results) == 0
+        assert len(consumed) == 3
+        assert list(results) == [value ** 2 for value in range(1, 20)]
+
+
+def test_map_in_order_cancels_pending_tasks():
+    started = []
+
+    def _record(value: int) -> int:
+        started.append(value)
+        time.sleep(0.01)
+        return value
+
+    with ThreadPoolExecutor(1) as executor:
+        results = _map_in_order(_record, range(20), executor, max_pending=5)
+        assert next(results) == 0
+        results.close()
+    assert len(started) < 20
+
+
+def test_manifest():
+    previous = Manifest('ams/1.zip', {'A': 'hash-a', 'B': 'hash-b', 'C': 'hash-c'})
+    new = Manifest('ams/2.zip', {'A': 'hash-a', 'B': 'new-hash-b', 'D': 'hash-d'})
+    assert previous.changed_am_ids(new) == ['B', 'D']
+    assert previous.removed_am_ids(new) == ['C']
+    assert Manifest.from_dict(new.to_dict()) == new
+    assert Manifest(None, {}).changed_am_ids(new) == ['A', 'B', 'D']
+
+
+class _FailingBundle:
+    metadata = SimpleNamespace(cid='JORFTEXT000000000001')
+
+    def enriched_am(self):
+        raise ValueError('missing variant')
+
+
+def test_check_and_serialize_reports_enrichment_errors():
+    exported = _check_and_serialize(_FailingBundle())  # type: ignore
+    assert exported.am_id == 'JORFTEXT000000000001'
+    assert exported.content is None
+    assert exported.error == 'ValueError: missing variant'
@@ -0,0 +1,9 @@
+from datetime import datetime
+
+from back_office.helpers.warm_up import seconds_until_next_run
+
+
+def test_seconds_until_next_run():
+    assert seconds_until_next_run(datetime(2021, 10, 1, 1, 30), 3) == 1.5 * 3600
+    assert seconds_until_next_run(datetime(2021, 10, 1, 3, 0), 3) == 24 * 3600
+    assert seconds_until_next_run(datetime(2021, 10, 31, 23, 0), 3) == 4 * 3600